@@ -0,0 +1,94 @@
+"""
+Cold-start budget: what a fresh worker pays for its first viewer.
+
+Runs the app once in a fresh interpreter (Streamlit's AppTest, temp working directory,
+no Discord targets) and reports
+  - import_ms:  importing the app's top-level dependencies (streamlit excluded)
+  - render_ms:  the first World page script run
+  - which heavy modules that run pulled in
+
+    python benchmarks/bench_startup.py [--budget-import-ms N] [--budget-render-ms N] [--json]
+
+Exits with status 1 when a budget is exceeded, so CI can gate on it.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "timer_app_streamlit2.py"
+
+# modules the World page should not need on its first render
+LAZY_MODULES = ["pandas", "requests", "streamlit_autorefresh"]
+
+PROBE = r"""
+import json, sys, time
+import streamlit  # the runtime is already loaded in a real worker; not part of the budget
+from streamlit.testing.v1 import AppTest
+
+app_dir = sys.argv[1]
+sys.path.insert(0, app_dir)
+before = set(sys.modules)
+t0 = time.perf_counter()
+import boss_engine, page_assets, table_render  # noqa: F401  (top-level imports of the app)
+import_ms = (time.perf_counter() - t0) * 1000
+
+at = AppTest.from_file(sys.argv[2], default_timeout=60)
+at.secrets["ADMIN_PASSWORD"] = "bench"
+at.secrets["DISCORD_TARGETS"] = []
+t0 = time.perf_counter()
+at.run()
+render_ms = (time.perf_counter() - t0) * 1000
+
+print(json.dumps({
+    "import_ms": round(import_ms, 1),
+    "render_ms": round(render_ms, 1),
+    "errors": [e.message for e in at.exception],
+    "loaded": sorted(m for m in json.loads(sys.argv[3]) if m in sys.modules and m not in before),
+}))
+"""
+
+
+def measure() -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, str(ROOT), str(APP), json.dumps(LAZY_MODULES)],
+            cwd=workdir, capture_output=True, text=True, check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-import-ms", type=float, default=500)
+    parser.add_argument("--budget-render-ms", type=float, default=1500)
+    parser.add_argument("--json", action="store_true", help="print the raw measurement")
+    args = parser.parse_args()
+
+    result = measure()
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"import: {result['import_ms']:.0f} ms (budget {args.budget_import_ms:.0f})")
+        print(f"first render: {result['render_ms']:.0f} ms (budget {args.budget_render_ms:.0f})")
+        print(f"heavy modules loaded by first render: {', '.join(result['loaded']) or 'none'}")
+
+    failures = []
+    if result["errors"]:
+        failures.append(f"app raised: {result['errors']}")
+    if result["import_ms"] > args.budget_import_ms:
+        failures.append("import time over budget")
+    if result["render_ms"] > args.budget_render_ms:
+        failures.append("first render over budget")
+    if result["loaded"]:
+        failures.append(f"loaded lazily-imported modules: {result['loaded']}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-render cost of the World page field table: the old pandas DataFrame + to_html path
+versus table_render.CachedTable (static rows cached, only countdowns recomputed).
+
+    python benchmarks/bench_tables.py
+"""
+import importlib
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from table_render import CachedTable, format_seconds  # noqa: E402
+
+MANILA = ZoneInfo("Asia/Manila")
+
+
+def now_manila():
+    return datetime.now(tz=MANILA)
+
+
+def make_rows(n):
+    base = now_manila().replace(second=0, microsecond=0)
+    rows = []
+    for i in range(n):
+        interval = 600 + (i % 20) * 60
+        last = base - timedelta(minutes=i % interval)
+        rows.append((f"Boss {i}", interval, last, last + timedelta(minutes=interval)))
+    return sorted(rows, key=lambda r: r[3])
+
+
+def render_pandas(rows):
+    # the pre-CachedTable display_boss_table_sorted_newstyle body
+    import pandas as pd
+
+    cells = []
+    for _, _, _, next_time in rows:
+        secs = (next_time - now_manila()).total_seconds()
+        color = "red" if secs <= 60 else "orange" if secs <= 300 else "green"
+        cells.append(f"<span style='color:{color}'>{format_seconds(int((next_time - now_manila()).total_seconds()))}</span>")
+    df = pd.DataFrame({
+        "Boss Name": [r[0] for r in rows],
+        "Interval (min)": [r[1] for r in rows],
+        "Last Spawn": [r[2].strftime("%m-%d-%Y | %H:%M") for r in rows],
+        "Next Spawn Date": [r[3].strftime("%b %d, %Y (%a)") for r in rows],
+        "Next Spawn Time": [r[3].strftime("%I:%M %p") for r in rows],
+        "Countdown": cells,
+    })
+    return df.to_html(escape=False, index=False)
+
+
+def static_cells(row):
+    name, interval, last_time, next_time = row
+    return lambda: (
+        name,
+        interval,
+        last_time.strftime("%m-%d-%Y | %H:%M"),
+        next_time.strftime("%b %d, %Y (%a)"),
+        next_time.strftime("%I:%M %p"),
+    )
+
+
+def render_cached(table, rows, spawn_ts):
+    # spawn epochs come straight from TimerStore.next in the app
+    return table.render(
+        ((i, spawn_ts[i], static_cells(row)) for i, row in enumerate(rows)),
+        now_manila().timestamp(),
+    )
+
+
+def bench(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    importlib.import_module("pandas")  # import cost is not part of a render
+
+    print(f"{'rows':>6} {'pandas+to_html':>16} {'CachedTable':>13} {'speedup':>8}")
+    for n in (22, 1000):
+        rows = make_rows(n)
+        spawn_ts = [int(row[3].timestamp()) for row in rows]
+        table = CachedTable(["Boss Name", "Interval (min)", "Last Spawn", "Next Spawn Date", "Next Spawn Time", "Countdown"])
+        render_cached(table, rows, spawn_ts)  # warm the row cache, as after the first render of a snapshot
+        number = 200 if n < 100 else 10
+        before = bench(lambda: render_pandas(rows), number)
+        after = bench(lambda: render_cached(table, rows, spawn_ts), number)
+        print(f"{n:>6} {before:>13.0f} us {after:>10.0f} us {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+End-to-end load test: how many World-page viewers and InstaKill admins one app process
+sustains before reruns lag past the 1 s refresh, and whether every spawn warning still goes
+out exactly once.
+
+Runs the app in this process (Streamlit's AppTest, one per simulated session, each in its own
+thread, in a temp working directory), with DISCORD_TARGETS pointed at a local stand-in
+webhook server that can add latency and answer with 429 (retry_after) or 5xx:
+
+    python benchmarks/load_test.py [--viewers 50] [--admins 2] [--duration 180] [--latency-ms 100]
+                                   [--rate-429 0.05] [--rate-5xx 0.02] [--targets 2] [--json]
+
+The timers are seeded so that --spawns bosses reach their 5-minute warning during the run;
+the admins InstaKill other bosses (long intervals, so kills never move a warned spawn).
+
+Reports
+  - rerun latency p50/p90/p99/max per session kind, and how many reruns took over 1 s
+  - process CPU per session and resident memory per session
+  - file I/O: the app's state backend reads/writes and the process's read/write syscalls
+  - webhook requests by status, kill messages delivered
+  - duplicate warnings (a boss warned more than once on one target) and missed ones
+    (due during the run but never delivered after --drain seconds), plus how late they were
+
+Each viewer reruns the whole script every --rerun-every seconds; a browser only runs the
+World page's change-polling fragment between edits, so this is the pessimistic case.
+Exits with status 1 on a duplicate or missed warning, a script error, or a p90 rerun over
+--budget-ms, so CI can gate on it.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "timer_app_streamlit2.py"
+sys.path.insert(0, str(ROOT))
+
+from boss_engine import MANILA, METRICS, TIME_FMT, WARNING_WINDOW_SECONDS, now_manila  # noqa: E402
+
+WARNED_BOSS = "Load Boss {:02d}"
+KILLED_BOSS = "Raid Boss {:02d}"
+KILLED_BOSSES = 6
+WARNED_NAME = re.compile(r"\*\*(Load Boss \d+)\*\* spawns")
+
+
+# ------------------- Stand-in Discord -------------------
+class FakeDiscord(ThreadingHTTPServer):
+    """Accepts webhook POSTs like Discord (204), optionally slow, rate limited or failing."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float, rate_429: float, retry_after: float, rate_5xx: float, seed: int = 1):
+        super().__init__(("127.0.0.1", 0), FakeDiscordHandler)
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_5xx = rate_5xx
+        self.requests = []  # (received_at, webhook path, status, content)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def url(self, i: int) -> str:
+        # the dispatcher only sends to URLs that contain discord.com/api/webhooks/
+        return f"http://127.0.0.1:{self.server_address[1]}/discord.com/api/webhooks/{i}/load-test"
+
+    def pick_status(self) -> int:
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return 502
+        return 204
+
+    def record(self, path: str, status: int, content: str) -> None:
+        with self._lock:
+            self.requests.append((time.time(), path, status, content))
+
+
+class FakeDiscordHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            content = json.loads(body).get("content", "")
+        except ValueError:
+            content = ""
+        time.sleep(self.server.latency)
+        status = self.server.pick_status()
+        self.server.record(self.path, status, content)
+        if status == 429:
+            payload = json.dumps({"message": "You are being rate limited.", "retry_after": self.server.retry_after,
+                                  "global": False}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Retry-After", str(math.ceil(self.server.retry_after)))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ------------------- Seed data -------------------
+def seed(workdir: Path, spawns: int, duration: float):
+    """
+    Writes boss_timers.json, which the app imports into its state backend on startup: `spawns`
+    bosses whose warning falls inside the run (spread over its whole minutes, several per
+    minute so grouping is exercised) plus the bosses admins kill.
+    Returns {warned boss: warning time (epoch)}.
+    """
+    now = now_manila()
+    first = math.ceil((now.timestamp() + WARNING_WINDOW_SECONDS + 5) / 60)
+    last = math.floor((now.timestamp() + WARNING_WINDOW_SECONDS + duration - 10) / 60)
+    minutes = list(range(first, max(first, last) + 1))
+    rows, due = [], {}
+    interval = 60
+    for i in range(spawns):
+        spawn_ts = minutes[i % len(minutes)] * 60
+        name = WARNED_BOSS.format(i)
+        last_spawn = datetime.fromtimestamp(spawn_ts - interval * 60, tz=MANILA)
+        rows.append((name, interval, last_spawn.strftime(TIME_FMT), 0))
+        due[name] = spawn_ts - WARNING_WINDOW_SECONDS
+    for i in range(KILLED_BOSSES):
+        rows.append((KILLED_BOSS.format(i), 1440, (now - timedelta(minutes=10)).strftime(TIME_FMT), 0))
+    (workdir / "boss_timers.json").write_text(json.dumps(rows))
+    (workdir / "weekly_bosses.json").write_text("[]")  # no weekly spawns in the way
+    return due
+
+
+# ------------------- Sessions -------------------
+def share_test_runtime() -> None:
+    """
+    Makes AppTest behave like one server process for concurrent sessions. Per run it installs
+    a stand-in Runtime and removes it when the run ends, which would pull it from under the
+    other sessions' runs: keep answering with the last one installed. It also compiles the
+    script afresh every run (which a server does once, and which is not thread-safe on some
+    Pythons): share one script cache.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+    latest = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        if not latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+
+
+class Session(threading.Thread):
+    """One browser tab: reruns the app every `every` seconds; an admin InstaKills on the way."""
+
+    def __init__(self, kind: str, secrets: dict, every: float, stop: threading.Event, kill_every: float = 0):
+        super().__init__(name=f"{kind}-session", daemon=True)
+        from streamlit.testing.v1 import AppTest
+
+        self.kind = kind
+        self.every = every
+        self.kill_every = kill_every
+        self.stop_event = stop
+        self.latencies = []
+        self.errors = []
+        self.kills = 0
+        self.ready = threading.Event()
+        self.at = AppTest.from_file(str(APP), default_timeout=120)
+        for key, value in secrets.items():
+            self.at.secrets[key] = value
+        if kind == "admin":
+            self.at.session_state["auth"] = True
+            self.at.session_state["username"] = self.name
+            self.at.session_state["page"] = "instakill"
+
+    def _run(self, action=None) -> None:
+        start = time.perf_counter()
+        try:
+            if action is None:
+                self.at.run()
+            else:
+                action()
+        except Exception as e:  # a timed-out or crashed rerun is a result, not a harness failure
+            self.errors.append(repr(e))
+            return
+        self.latencies.append(time.perf_counter() - start)
+        self.errors.extend(str(e.value) for e in self.at.exception)
+
+    def _kill(self) -> None:
+        boss = KILLED_BOSS.format(random.randrange(KILLED_BOSSES))
+        self.at.button(key=f"ik_{boss}").click().run()
+        self.kills += 1
+
+    def run(self) -> None:
+        self._run()  # first render, counted towards memory before the load starts
+        self.ready.set()
+        next_kill = time.monotonic() + random.uniform(0, self.kill_every or 0)
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            if self.kill_every and started >= next_kill:
+                self._run(self._kill)
+                next_kill = started + self.kill_every
+            else:
+                self._run()
+            self.stop_event.wait(max(0.0, self.every - (time.monotonic() - started)))
+
+
+# ------------------- Measurements -------------------
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):  # not Linux: peak instead of current
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def proc_io() -> dict:
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(": ") for line in f.read().splitlines())}
+    except OSError:
+        return {}
+
+
+def file_counters() -> dict:
+    return {
+        f"{name}[{labels.get('file') or labels.get('kind', '')}]": value
+        for name, labels, value in METRICS.counters()
+        if name in ("json_reads_total", "state_reads_total", "state_writes_total")
+    }
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(q):
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)] * 1000
+
+    return {
+        "count": len(ordered), "p50_ms": round(rank(0.5), 1), "p90_ms": round(rank(0.9), 1),
+        "p99_ms": round(rank(0.99), 1), "max_ms": round(ordered[-1] * 1000, 1),
+        "over_1s": sum(1 for s in ordered if s > 1.0),
+    }
+
+
+def warning_report(requests, webhooks, due: dict, load_end: float) -> dict:
+    """Duplicates / misses per (webhook path, boss) over the 2xx-delivered warning messages."""
+    delivered = {}
+    for received_at, path, status, content in requests:
+        if 200 <= status < 300 and content.startswith("⏳"):
+            for boss in WARNED_NAME.findall(content):
+                delivered.setdefault((path, boss), []).append(received_at)
+    expected = [(path, boss) for path in webhooks for boss, warn_at in due.items() if warn_at <= load_end]
+    lateness = [times[0] - due[boss] for (path, boss), times in delivered.items() if boss in due]
+    return {
+        "expected": len(expected),
+        "delivered": sum(1 for key in expected if key in delivered),
+        "duplicates": sorted(f"{boss} x{len(times)} on {path}" for (path, boss), times in delivered.items()
+                             if len(times) > 1),
+        "missed": sorted(f"{boss} on {path}" for path, boss in expected if (path, boss) not in delivered),
+        "lateness": percentiles(lateness),
+    }
+
+
+# ------------------- Main -------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=180, help="seconds of load after every session is up")
+    parser.add_argument("--drain", type=float, default=30, help="seconds to let retries finish afterwards")
+    parser.add_argument("--rerun-every", type=float, default=1.0, help="seconds between a viewer's reruns")
+    parser.add_argument("--kill-every", type=float, default=10.0, help="seconds between an admin's InstaKills")
+    parser.add_argument("--spawns", type=int, default=12, help="bosses whose warning is due during the run")
+    parser.add_argument("--targets", type=int, default=2, help="stand-in Discord webhooks")
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--rate-429", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=1.5)
+    parser.add_argument("--rate-5xx", type=float, default=0.02)
+    parser.add_argument("--budget-ms", type=float, default=1000, help="p90 rerun latency budget")
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    share_test_runtime()
+    discord = FakeDiscord(args.latency_ms / 1000, args.rate_429, args.retry_after, args.rate_5xx)
+    threading.Thread(target=discord.serve_forever, name="fake-discord", daemon=True).start()
+    secrets = {
+        "ADMIN_PASSWORD": "load-test",
+        "DISCORD_TARGETS": [{"name": f"fake_{i}", "webhook": discord.url(i), "role_id": ""} for i in range(args.targets)],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        rss_start = rss_bytes()
+        # the warnings must fall inside the load, so seed once the sessions are about to start
+        stop = threading.Event()
+        due = seed(Path(workdir), args.spawns, args.duration)
+        sessions = [Session("viewer", secrets, args.rerun_every, stop) for _ in range(args.viewers)]
+        sessions += [Session("admin", secrets, args.rerun_every, stop, args.kill_every) for _ in range(args.admins)]
+        sessions[0].start()
+        sessions[0].ready.wait()  # one session builds the shared caches and starts the workers
+        for session in sessions[1:]:
+            session.start()
+        for session in sessions:
+            session.ready.wait()
+        rss_ready = rss_bytes()
+
+        io_start, files_start = proc_io(), file_counters()
+        cpu_start, wall_start = time.process_time(), time.monotonic()
+        for session in sessions:
+            session.latencies.clear()  # steady state only
+        stop.wait(args.duration)
+        stop.set()
+        load_end = time.time()
+        cpu, wall = time.process_time() - cpu_start, time.monotonic() - wall_start
+        io_end, files_end = proc_io(), file_counters()
+        for session in sessions:
+            session.join(timeout=30)
+        time.sleep(args.drain)
+        os.chdir(ROOT)
+    discord.shutdown()
+
+    requests = list(discord.requests)
+    statuses = {}
+    for _, _, status, _ in requests:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    report = {
+        "sessions": {"viewers": args.viewers, "admins": args.admins, "seconds": round(wall, 1)},
+        "reruns": {
+            kind: percentiles([s for session in sessions if session.kind == kind for s in session.latencies])
+            for kind in ("viewer", "admin")
+        },
+        "errors": sorted({e for session in sessions for e in session.errors})[:10],
+        "cpu": {
+            "process_cores": round(cpu / wall, 2),
+            "per_session_pct": round(100 * cpu / wall / len(sessions), 2),
+        },
+        "memory": {
+            "rss_mb": round(rss_ready / 2**20, 1),
+            "per_session_kb": round((rss_ready - rss_start) / len(sessions) / 1024, 1),
+        },
+        "file_io": {
+            **{key: value - files_start.get(key, 0) for key, value in files_end.items()},
+            **{key: io_end[key] - io_start[key] for key in ("syscr", "syscw") if key in io_start},
+        },
+        "webhooks": {
+            "requests": len(requests),
+            "by_status": statuses,
+            "kills_made": sum(session.kills for session in sessions),
+            "kill_messages": sum(1 for _, _, status, content in requests if 200 <= status < 300
+                                 and content.startswith("💀")),
+        },
+        "warnings": warning_report(
+            requests, [urlsplit(target["webhook"]).path for target in secrets["DISCORD_TARGETS"]], due, load_end,
+        ),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"{len(sessions)} sessions ({args.viewers} viewers, {args.admins} admins) for {wall:.0f} s")
+        for kind, stats in report["reruns"].items():
+            if stats["count"]:
+                print(f"  {kind} reruns: {stats['count']}, p50 {stats['p50_ms']:.0f} ms, p90 {stats['p90_ms']:.0f} ms, "
+                      f"p99 {stats['p99_ms']:.0f} ms, max {stats['max_ms']:.0f} ms, {stats['over_1s']} over 1 s")
+        print(f"  CPU: {report['cpu']['process_cores']} cores, {report['cpu']['per_session_pct']}% of a core per session")
+        print(f"  memory: {report['memory']['rss_mb']} MB RSS, ~{report['memory']['per_session_kb']} KB per session")
+        print(f"  file I/O: {report['file_io']}")
+        print(f"  webhooks: {report['webhooks']}")
+        warnings = report["warnings"]
+        print(f"  warnings: {warnings['delivered']}/{warnings['expected']} delivered, "
+              f"{len(warnings['duplicates'])} duplicated, {len(warnings['missed'])} missed, "
+              f"lateness p90 {warnings['lateness'].get('p90_ms', 0) / 1000:.1f} s")
+        for line in warnings["duplicates"] + warnings["missed"] + report["errors"]:
+            print(f"    {line}")
+
+    failures = []
+    if report["warnings"]["duplicates"]:
+        failures.append("duplicate warnings")
+    if report["warnings"]["missed"]:
+        failures.append("missed warnings")
+    if report["errors"]:
+        failures.append("script errors")
+    if report["reruns"]["viewer"].get("p90_ms", 0) > args.budget_ms:
+        failures.append("viewer rerun p90 over budget")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Headless boss timer engine: spawn math, persistence and Discord notifications,
+usable without Streamlit (scripts, benchmarks, other front ends).
+"""
+from .alerts import DEFAULT_ALERT_STAGES, AlertStages, TimingWheel, WheelTimer
+from .common import MANILA, TIME_FMT, format_seconds, format_timedelta, now_manila, parse_time_str
+from .dedup import WarnStore
+from .engine import Engine
+from .events import EventBroadcaster, EventLog
+from .forecast import FORECAST_HORIZONS, forecast, forecast_rows, to_ics, to_json
+from .history import DRIFT_COLUMNS, EDITOR_COLUMNS, HISTORY_COLUMNS, LATE_KILL_MINUTES, HistoryStore, kill_drift
+from .metrics import METRICS, Metrics, TextfileExporter
+from .notifier import (
+    WARNING_WINDOW_SECONDS, SpawnNotifier, send_spawn_warning, send_spawn_warnings, spawns_in_window,
+    upcoming_spawns,
+)
+from .storage import (
+    RedisEventLog, RedisHistoryStore, RedisState, RedisWarnStore, SQLiteState, open_events, open_state,
+)
+from .tenants import (
+    DEFAULT_TENANT, DEFAULT_TENANT_TITLE, TenantConfig, TenantHub, manage_order, row_layout, tenant_configs,
+)
+from .timers import (
+    TimerCache, TimerConflict, TimerEntry, TimerSnapshot, TimerStore, catch_up_steps, default_boss_data,
+    load_boss_data, next_spawn_after, validate_boss_rows,
+)
+from .webhooks import CircuitBreaker, DispatchHandle, TokenBucket, WebhookDispatcher, WebhookOutbox
+from .weekly import (
+    WEEK_SECONDS, WEEKDAYS, WeeklySchedule, WeeklyScheduleCache, load_weekly_data,
+    parse_weekly_slot, weekly_boss_data,
+)
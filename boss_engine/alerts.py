@@ -0,0 +1,198 @@
+"""
+Alert scheduling: a hierarchical timing wheel, and which alert stages (e.g. 15 / 5 / 1 minutes
+before, or "spawning now") apply to a boss and a Discord target.
+"""
+import math
+
+DEFAULT_ALERT_STAGES = (5 * 60,)  # seconds before the spawn; 0 = "spawning now"
+
+# wheel levels: 60 one-second slots, 60 one-minute slots, 24 one-hour slots, 8 one-day slots
+WHEEL_SLOTS = (60, 60, 24, 8)
+
+
+class WheelTimer:
+    """One scheduled entry; keep it to cancel() it."""
+
+    __slots__ = ("tick", "payload", "_slot")
+
+    def __init__(self, tick: int, payload):
+        self.tick = tick
+        self.payload = payload
+        self._slot = None
+
+    @property
+    def pending(self) -> bool:
+        return self._slot is not None
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel with one-second ticks (not thread-safe; callers lock).
+
+    An entry sits in the lowest level whose range still contains it: this minute's entries
+    in a one-second slot, this hour's in a one-minute slot, and so on; entries more than a
+    few days out wait in an overflow set. add() and cancel() are O(1), and advancing only
+    touches the slot that just came due, cascading a higher-level slot down when its
+    boundary is crossed. Empty stretches are skipped rather than ticked through.
+    """
+
+    def __init__(self, now_ts: float, slots=WHEEL_SLOTS):
+        self.current = int(math.floor(now_ts))
+        self._sizes = slots
+        self._spans = [1]
+        for size in slots[:-1]:
+            self._spans.append(self._spans[-1] * size)
+        self._blocks = [span * size for span, size in zip(self._spans, slots)]
+        self._levels = [[set() for _ in range(size)] for size in slots]
+        self._overflow = set()
+        self._ready = set()  # added at or before the current tick
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, when_ts: float, payload) -> WheelTimer:
+        timer = WheelTimer(int(math.ceil(when_ts)), payload)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: WheelTimer) -> None:
+        if timer._slot is not None:
+            timer._slot.discard(timer)
+            timer._slot = None
+            self._count -= 1
+
+    def _place(self, timer: WheelTimer) -> None:
+        t, now = timer.tick, self.current
+        slot = self._ready if t <= now else self._overflow
+        if t > now:
+            for level, (span, block) in enumerate(zip(self._spans, self._blocks)):
+                if t // block == now // block:
+                    slot = self._levels[level][(t // span) % self._sizes[level]]
+                    break
+        slot.add(timer)
+        timer._slot = slot
+
+    def _take(self, slot: set):
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            timer._slot = None
+        return timers
+
+    def next_tick(self):
+        """Earliest tick anything could be due (a lower bound), or None if the wheel is empty."""
+        if self._ready:
+            return self.current
+        now = self.current
+        for level, (span, size, block) in enumerate(zip(self._spans, self._sizes, self._blocks)):
+            first = now // span + (1 if level == 0 else 0)
+            end = (now // block + 1) * size  # slots left in this level's current block
+            for k in range(first, end):
+                if self._levels[level][k % size]:
+                    return max(k * span, now + 1)
+        if self._overflow:
+            return (now // self._blocks[-1] + 1) * self._blocks[-1]
+        return None
+
+    def _tick(self):
+        self.current += 1
+        now = self.current
+        if now % self._blocks[-1] == 0:
+            for timer in self._take(self._overflow):
+                self._place(timer)
+        for level in range(len(self._sizes) - 1, 0, -1):
+            if now % self._spans[level] == 0:
+                slot = self._levels[level][(now // self._spans[level]) % self._sizes[level]]
+                for timer in self._take(slot):
+                    self._place(timer)
+        due = self._take(self._levels[0][now % self._sizes[0]])
+        due.extend(self._take(self._ready))  # cascaded onto this very tick
+        return due
+
+    def advance(self, now_ts: float):
+        """Moves the wheel to now_ts and returns every timer that came due, soonest first."""
+        target = int(math.floor(now_ts))
+        due = self._take(self._ready)
+        while self.current < target:
+            nxt = self.next_tick()
+            if nxt is None or nxt > target:
+                self.current = target
+                break
+            self.current = max(self.current, nxt - 1)
+            due.extend(self._tick())
+        self._count -= len(due)
+        due.sort(key=lambda timer: timer.tick)
+        return due
+
+    def pop_until(self, until_ts: float):
+        """Removes and returns the timers due in (current, until_ts] without advancing."""
+        until = int(math.floor(until_ts))
+        now = self.current
+        out = []
+        for level, (span, size, block) in enumerate(zip(self._spans, self._sizes, self._blocks)):
+            last = min(until // span, (now // block + 1) * size - 1)
+            for k in range(now // span, last + 1):
+                slot = self._levels[level][k % size]
+                hits = [timer for timer in slot if timer.tick <= until]
+                for timer in hits:
+                    self.cancel(timer)
+                out.extend(hits)
+        if until // self._blocks[-1] != now // self._blocks[-1]:
+            hits = [timer for timer in self._overflow if timer.tick <= until]
+            for timer in hits:
+                self.cancel(timer)
+            out.extend(hits)
+        out.sort(key=lambda timer: timer.tick)
+        return out
+
+    def reinsert(self, timer: WheelTimer) -> None:
+        """Puts a popped timer back (the same object, so existing references can still cancel it)."""
+        if timer._slot is None:
+            self._place(timer)
+            self._count += 1
+
+
+class AlertStages:
+    """
+    Which alert stages (seconds before the spawn) apply to a boss and to a target.
+
+    by_boss: {boss_name or "*": [minutes before spawn]}; "*" covers bosses not listed.
+    A target dict may carry its own "alert_stages" [minutes], which then wins for that target.
+    """
+
+    def __init__(self, by_boss=None, default=DEFAULT_ALERT_STAGES):
+        by_boss = dict(by_boss or {})
+        self._default = self._seconds(by_boss.pop("*")) if "*" in by_boss else tuple(default)
+        self._by_boss = {boss: self._seconds(minutes) for boss, minutes in by_boss.items()}
+
+    @staticmethod
+    def _seconds(minutes) -> tuple:
+        stages = sorted({int(round(float(m) * 60)) for m in minutes}, reverse=True)
+        if any(stage < 0 for stage in stages):
+            raise ValueError(f"Alert stages must be >= 0 minutes: {minutes!r}")
+        return tuple(stages)
+
+    def for_boss(self, boss_name: str) -> tuple:
+        return self._by_boss.get(boss_name, self._default)
+
+    def for_target(self, boss_name: str, target: dict) -> tuple:
+        if target.get("alert_stages") is not None:
+            return self._seconds(target["alert_stages"])
+        return self.for_boss(boss_name)
+
+    def scheduled(self, boss_name: str, targets) -> tuple:
+        """Every stage some target wants for this boss, largest first."""
+        stages = set(self.for_boss(boss_name))
+        for target in targets:
+            stages.update(self.for_target(boss_name, target))
+        return tuple(sorted(stages, reverse=True))
+
+
+def stage_label(stage_seconds: int) -> str:
+    if stage_seconds == 0:
+        return "spawning now"
+    if stage_seconds % 60:
+        return f"{stage_seconds}-second"
+    return f"{stage_seconds // 60}-minute"
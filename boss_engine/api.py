@@ -0,0 +1,181 @@
+"""
+Read-only spawn-status HTTP API (a plain WSGI app) over the same data files as the Streamlit
+app, for Discord bots, stream overlays and phone shortcuts that only need the next spawns.
+"""
+from datetime import datetime
+from urllib.parse import parse_qs
+import hashlib
+import json
+import threading
+
+from .common import MANILA, now_manila
+from .events import EventBroadcaster
+from .metrics import METRICS
+from .tenants import DEFAULT_TENANT, TenantHub
+
+API_PREFIX = "/api/v1"
+API_MAX_AGE_SECONDS = 5  # how long a poller may reuse a response before revalidating (-> 304)
+
+
+class _Status:
+    """One tenant's encoded /spawns response and what it was built from."""
+
+    __slots__ = ("stamp", "valid_until", "etag", "body")
+
+    def __init__(self, stamp, valid_until: float, body: bytes):
+        self.stamp = stamp
+        self.valid_until = valid_until
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.body = body
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(MANILA).isoformat()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class SpawnStatusAPI:
+    """
+    WSGI app serving, per tenant, the field and weekly next spawns as JSON.
+
+    A tenant's response is built once per revision of its timers and weekly schedule in the
+    state backend (and again when its earliest spawn passes, since that boss's next spawn
+    moves); every other request is a dict lookup. Responses carry an ETag and a short max-age,
+    so a poller sending If-None-Match gets an empty 304 until something actually changes.
+    The revisions are the backend's, not this process's, so every worker or replica serving
+    the same data answers with the same ETag.
+
+        GET /api/v1/servers               tenants served here
+        GET /api/v1/spawns?server=<slug>  next spawns (default tenant if no server)
+        GET /api/v1/events?server=<slug>  Server-Sent Events: kill, edit, remove, weekly, warning, spawn
+        GET /healthz
+
+    The event stream resumes after the Last-Event-ID header (or ?last_event_id=) that
+    EventSource sends on reconnect.
+    """
+
+    def __init__(self, hub: TenantHub, events: EventBroadcaster = None):
+        self.hub = hub
+        self.events = events
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # one rebuild at a time, however many pollers miss
+        self._status = {}  # slug -> _Status
+        self._servers = json.dumps(
+            [{"slug": slug, "title": cfg.title} for slug, cfg in hub.configs.items()], ensure_ascii=False,
+        ).encode("utf-8")
+
+    def _cached(self, slug: str, stamp):
+        with self._lock:
+            cached = self._status.get(slug)
+        if cached is not None and cached.stamp == stamp and now_manila().timestamp() < cached.valid_until:
+            return cached
+        return None
+
+    def status(self, slug: str) -> _Status:
+        engine = self.hub[slug]
+        snapshot = engine.snapshot()
+        stamp = (snapshot.stamp, engine.weekly.stamp())
+        cached = self._cached(slug, stamp)
+        if cached is not None:
+            return cached
+        with self._build_lock:
+            return self._cached(slug, stamp) or self._build(slug, engine, snapshot, stamp)
+
+    def _build(self, slug: str, engine, snapshot, stamp) -> _Status:
+        now = now_manila()
+        timers = snapshot.timers
+        timers.update_next(now)
+        field = [
+            {
+                "boss": t.name,
+                "interval_minutes": t.interval_minutes,
+                "last_spawn": _iso(t.last_time),
+                "next_spawn": _iso(t.next_time),
+                "ts": int(t.next_time.timestamp()),
+            }
+            for t in timers.sorted_entries()
+        ]
+        weekly = [
+            {"boss": boss, "next_spawn": _iso(spawn_dt), "ts": int(spawn_dt.timestamp())}
+            for boss, spawn_dt in engine.schedule().upcoming(now)
+        ]
+        firsts = [rows[0]["ts"] for rows in (field, weekly) if rows]
+        valid_until = min(firsts) if firsts else float("inf")
+        body = json.dumps(
+            {"server": slug, "version": stamp[0], "weekly_version": stamp[1], "field": field, "weekly": weekly},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        status = _Status(stamp, valid_until, body)
+        with self._lock:
+            self._status[slug] = status
+        return status
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "") or "/"
+        method = environ.get("REQUEST_METHOD", "GET")
+        route = path
+        try:
+            if method not in ("GET", "HEAD"):
+                return self._respond(start_response, method, "405 Method Not Allowed", {"error": "read-only API"},
+                                     extra=[("Allow", "GET, HEAD")])
+            if path == "/healthz":
+                return self._respond(start_response, method, "200 OK", b"ok", content_type="text/plain")
+            if path == f"{API_PREFIX}/servers":
+                return self._respond(start_response, method, "200 OK", self._servers, max_age=300)
+            query = parse_qs(environ.get("QUERY_STRING", ""))
+            if path == f"{API_PREFIX}/events" and self.events is not None:
+                slug = query.get("server", [DEFAULT_TENANT])[0]
+                if slug not in self.hub.engines:
+                    return self._respond(start_response, method, "404 Not Found", {"error": f"unknown server {slug!r}"})
+                last_id = environ.get("HTTP_LAST_EVENT_ID") or query.get("last_event_id", [""])[0]
+                start_response("200 OK", [
+                    ("Access-Control-Allow-Origin", "*"),
+                    ("Content-Type", "text/event-stream; charset=utf-8"),
+                    ("Cache-Control", "no-cache"),
+                    ("X-Accel-Buffering", "no"),  # nginx: do not buffer the stream
+                ])
+                if method == "HEAD":
+                    return [b""]
+                return self.events.subscribe(self.hub[slug].tenant or "", int(last_id) if last_id.isdigit() else None)
+            if path == f"{API_PREFIX}/spawns":
+                slug = query.get("server", [DEFAULT_TENANT])[0]
+                if slug not in self.hub.engines:
+                    return self._respond(start_response, method, "404 Not Found", {"error": f"unknown server {slug!r}"})
+                status = self.status(slug)
+                max_age = API_MAX_AGE_SECONDS
+                remaining = status.valid_until - now_manila().timestamp()
+                if remaining < max_age:
+                    max_age = max(int(remaining), 0)
+                if _etag_matches(environ.get("HTTP_IF_NONE_MATCH", ""), status.etag):
+                    return self._respond(start_response, method, "304 Not Modified", b"",
+                                         etag=status.etag, max_age=max_age)
+                return self._respond(start_response, method, "200 OK", status.body,
+                                     etag=status.etag, max_age=max_age)
+            route = "other"
+            return self._respond(start_response, method, "404 Not Found", {"error": "not found"})
+        finally:
+            METRICS.inc("api_requests_total", route=route)
+
+    @staticmethod
+    def _respond(start_response, method, status, body, content_type="application/json; charset=utf-8",
+                 etag=None, max_age=None, extra=()):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        headers = [("Access-Control-Allow-Origin", "*")]  # overlays fetch from browser sources
+        if etag:
+            headers.append(("ETag", etag))
+        if max_age is not None:
+            headers.append(("Cache-Control", f"public, max-age={max_age}"))
+        headers.extend(extra)
+        if status.startswith("304"):
+            start_response(status, headers)
+            return [b""]
+        headers += [("Content-Type", content_type), ("Content-Length", str(len(body)))]
+        start_response(status, headers)
+        return [b"" if method == "HEAD" else body]
@@ -0,0 +1,40 @@
+"""Time helpers and small storage utilities shared by the engine modules."""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import sqlite3
+
+MANILA = ZoneInfo("Asia/Manila")
+TIME_FMT = "%Y-%m-%d %I:%M %p"
+
+
+def now_manila() -> datetime:
+    return datetime.now(tz=MANILA)
+
+
+def parse_time_str(time_str: str) -> datetime:
+    return datetime.strptime(time_str, TIME_FMT).replace(tzinfo=MANILA)
+
+
+def format_seconds(total_seconds: int) -> str:
+    if total_seconds < 0:
+        return "00:00:00"
+    days, rem = divmod(total_seconds, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, seconds = divmod(rem, 60)
+    if days > 0:
+        return f"{days}d {hours:02}:{minutes:02}:{seconds:02}"
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+
+def format_timedelta(td: timedelta) -> str:
+    return format_seconds(int(td.total_seconds()))
+
+
+@contextmanager
+def closing_commit(db: sqlite3.Connection):
+    try:
+        with db:
+            yield db
+    finally:
+        db.close()
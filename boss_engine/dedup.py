@@ -0,0 +1,83 @@
+"""
+Cross-process "warning already sent" claims (SQLite).
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import sqlite3
+import time
+
+from .common import MANILA, closing_commit
+from .metrics import METRICS
+
+WARN_KEY_GRACE_SECONDS = 3600  # keep a claim this long after the spawn it was for
+WARN_PRUNE_EVERY_SECONDS = 600
+
+
+class WarnStore:
+    """
+    "Warning already sent" claims shared by every process, in SQLite.
+    claim() is a single INSERT OR IGNORE (an atomic test-and-set); each row expires
+    after the spawn time embedded in its _warn_key.
+    """
+
+    def __init__(self, path: Path, legacy_path: Path = None):
+        self.path = path
+        self.legacy_path = legacy_path
+        is_new = not path.exists()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS warn_sent (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS warn_sent_expiry ON warn_sent (expires_at)")
+        self._last_prune = 0.0
+        if is_new:
+            self._import_legacy()
+
+    def _connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=10))
+
+    @staticmethod
+    def _expires_at(key: str) -> float:
+        # key = SOURCE|boss|YYYY-mm-dd HH:MM|target
+        spawn_dt = datetime.strptime(key.split("|")[-2], "%Y-%m-%d %H:%M").replace(tzinfo=MANILA)
+        return spawn_dt.timestamp() + WARN_KEY_GRACE_SECONDS
+
+    def claim(self, key: str) -> bool:
+        """
+        Claim the key BEFORE sending (avoids duplicates across sessions and processes).
+        Returns True if we successfully claimed it (it was not set yet).
+        """
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO warn_sent (key, expires_at) VALUES (?, ?)",
+                (key, self._expires_at(key)),
+            )
+            claimed = cur.rowcount == 1
+        METRICS.inc("warn_claims_total", result="claimed" if claimed else "duplicate")
+
+        if time.time() - self._last_prune > WARN_PRUNE_EVERY_SECONDS:
+            self.prune()
+        return claimed
+
+    def prune(self) -> None:
+        self._last_prune = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM warn_sent WHERE expires_at < ?", (time.time(),))
+
+    def active(self):
+        """[(key, expires_at)] of the claims not yet expired, for migrations."""
+        with self._connect() as db:
+            return db.execute("SELECT key, expires_at FROM warn_sent WHERE expires_at >= ?", (time.time(),)).fetchall()
+
+    def _import_legacy(self) -> None:
+        """One-shot import of the old warn_sent.json so a restart mid-window does not re-send."""
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            rows = [(key, self._expires_at(key)) for key in legacy if key.count("|") >= 3]
+        except Exception:
+            return
+        with self._connect() as db:
+            db.executemany("INSERT OR IGNORE INTO warn_sent (key, expires_at) VALUES (?, ?)", rows)
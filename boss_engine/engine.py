@@ -0,0 +1,286 @@
+"""
+Engine: every store, cache and background worker for one data directory, wired together.
+"""
+from datetime import datetime
+from pathlib import Path
+
+from .alerts import AlertStages
+from .common import now_manila, parse_time_str
+from .events import EventLog
+from .forecast import ForecastExportCache, forecast, to_ics, to_json
+from .metrics import METRICS, TextfileExporter
+from .notifier import WARNING_WINDOW_SECONDS, SpawnNotifier, _warn_event_key, send_spawn_warnings, upcoming_spawns
+from .storage import open_events, open_state
+from .timers import TimerCache, TimerSnapshot, next_spawn_after
+from .webhooks import DispatchHandle, WebhookDispatcher, WebhookOutbox
+from .weekly import WeeklySchedule, WeeklyScheduleCache
+
+OUTBOX_FILE = "webhook_outbox.db"
+EVENTS_FILE = "events.db"
+
+
+class Engine:
+    """
+    Timer state and notifications for one game server, with no UI attached.
+
+    On its own an Engine owns its webhook dispatcher and spawn notifier; a TenantHub
+    instead hands every tenant's Engine the same dispatcher and notifier, and starts them
+    itself. Nothing runs in the background until start().
+    """
+
+    def __init__(
+        self,
+        data_dir: Path = Path("."),
+        targets=(),
+        metrics_file: Path = None,
+        tenant: str = None,
+        dispatcher: WebhookDispatcher = None,
+        notifier: SpawnNotifier = None,
+        default_timers=None,
+        default_weekly=None,
+        alert_stages=None,
+        events: EventLog = None,
+        storage=None,
+    ):
+        """
+        metrics_file: if set, the Prometheus text metrics are rewritten there every few seconds.
+        tenant: namespaces this engine's keys in a shared outbox / notifier (None = standalone).
+        default_timers / default_weekly: rows used until the first save (the built-in roster if None).
+        alert_stages: {boss_name or "*": [minutes before spawn]} (0 = "spawning now"); a target's
+            own "alert_stages" list wins for that target. Default: the 5-minute warning only.
+        events: where kill / edit / warning / spawn events are logged for the SSE stream
+            (a TenantHub shares one; standalone, events.db in data_dir, or the Redis server).
+        storage: where timers, the weekly schedule, history and warn claims live (see
+            open_state): None for SQLite files in data_dir, or a redis:// URL shared by replicas.
+        """
+        data_dir = Path(data_dir)
+        self.data_dir = data_dir
+        self.tenant = tenant
+        self.targets = list(targets)
+        self.alert_stages = AlertStages(alert_stages)
+        self.state = open_state(storage, data_dir, tenant)
+        self.timers = TimerCache(self.state, default_timers)
+        self.weekly = WeeklyScheduleCache(self.state, default_weekly)
+        self.warns = self.state.warns
+        self.history = self.state.history
+        self.events = events or open_events(self.state, data_dir / EVENTS_FILE)
+
+        self._owns_workers = dispatcher is None
+        self.dispatcher = dispatcher or WebhookDispatcher(WebhookOutbox(data_dir / OUTBOX_FILE), self.targets)
+        self.notifier = notifier or SpawnNotifier()
+        self.notifier.watch(
+            self._notifier_key, self.upcoming_spawns, self.send_spawn_warnings,
+            self.state_stamp, self.stages_for, self.publish_spawns,
+        )
+        self.exports = ForecastExportCache()
+        self.metrics = METRICS
+        self.exporter = TextfileExporter(METRICS, metrics_file) if metrics_file else None
+
+    @property
+    def _notifier_key(self) -> str:
+        return self.tenant or ""
+
+    @property
+    def _key_prefix(self) -> str:
+        return f"{self.tenant}|" if self.tenant else ""
+
+    def start(self) -> "Engine":
+        if self._owns_workers:
+            self.dispatcher.start()
+            self.notifier.start()
+        if self.exporter:
+            self.exporter.start()
+        return self
+
+    def stop(self) -> None:
+        if self._owns_workers:
+            self.notifier.stop()
+            self.dispatcher.stop()
+        if self.exporter:
+            self.exporter.stop()
+
+    # --- reads ---
+    def stages_for(self, boss_name: str) -> tuple:
+        """Every alert stage (seconds before the spawn) some target wants for this boss."""
+        return self.alert_stages.scheduled(boss_name, self.targets)
+
+    def state_stamp(self):
+        """Changes whenever the timers or weekly schedule are saved, by any process or replica."""
+        return self.state.timers_stamp(), self.state.weekly_stamp()
+
+    def snapshot(self) -> TimerSnapshot:
+        return self.timers.get()
+
+    def schedule(self) -> WeeklySchedule:
+        return self.weekly.get()
+
+    def load_weekly(self):
+        """The weekly schedule as saved (boss, [day-time slots]) rows, for editing."""
+        return self.weekly.load()
+
+    def upcoming_spawns(self, now: datetime = None):
+        return upcoming_spawns(self.snapshot().timers, self.schedule(), now)
+
+    def forecast(self, horizon_seconds: float, now: datetime = None):
+        """Lazy, sorted (spawn_ts, source, boss_name) stream of every spawn in the horizon."""
+        return forecast(self.snapshot().timers, self.schedule(), now, horizon_seconds)
+
+    def forecast_export(self, fmt: str, horizon_seconds: float, calendar_name: str = "Boss spawns") -> bytes:
+        """The forecast as "ics" or "json" bytes; cached until the timers or weekly schedule change."""
+        if fmt not in ("ics", "json"):
+            raise ValueError(f"Unknown forecast format: {fmt}")
+        stamp = (self.snapshot().version, self.weekly.stamp())
+
+        def build(anchor: datetime) -> bytes:
+            spawns = self.forecast(horizon_seconds, anchor)
+            if fmt == "ics":
+                return to_ics(spawns, now_manila(), calendar_name, self.tenant or "bosstimer")
+            return to_json(spawns, anchor, horizon_seconds)
+
+        return self.exports.get(stamp, fmt, horizon_seconds, build)
+
+    # --- writes ---
+    def set_last_time(self, boss_name: str, last_time: datetime, expected_version: int,
+                      reason: str = "edit", by: str = None):
+        """
+        Compare-and-swap one boss's last spawn; raises TimerConflict. Returns the new row.
+        reason: the event published for it, "kill" (InstaKill) or "edit" (Manage).
+        """
+        row = self.timers.set_last_time(boss_name, last_time, expected_version)
+        # re-queue just this boss's alerts; the notifier's own stamp check then finds nothing moved
+        next_spawn = next_spawn_after(parse_time_str(row[2]), row[1])
+        self.notifier.update(self._notifier_key, "FIELD", boss_name, [(next_spawn, int(row[1]) * 60)])
+        self.publish(reason, {
+            "boss": boss_name,
+            "last_spawn": parse_time_str(row[2]).isoformat(),
+            "next_spawn": next_spawn.isoformat(),
+            "ts": int(next_spawn.timestamp()),
+            "by": by,
+        })
+        return row
+
+    def save_timers(self, edits, by: str = None):
+        """
+        Applies a batch of boss edits (adds, removals, renames, interval and last-spawn changes;
+        see TimerCache.apply_edits) in one compare-and-swap write; raises TimerConflict / ValueError.
+        Returns [(old_row, new_row)] for what changed, each also published as an "edit" (or
+        "remove") event. Only the changed bosses' alerts are re-queued, as for set_last_time().
+        """
+        changes = self.timers.apply_edits(edits)
+        # cancel removed and renamed-away bosses first, so a swap of two names keeps both
+        for old_row, new_row in changes:
+            if old_row is not None and (new_row is None or new_row[0] != old_row[0]):
+                self.notifier.update(self._notifier_key, "FIELD", old_row[0], [])
+        now = now_manila()
+        for old_row, new_row in changes:
+            if new_row is None:
+                self.publish("remove", {"boss": old_row[0], "by": by})
+                continue
+            last_spawn = parse_time_str(new_row[2])
+            next_spawn = next_spawn_after(last_spawn, new_row[1], now)
+            self.notifier.update(self._notifier_key, "FIELD", new_row[0], [(next_spawn, int(new_row[1]) * 60)])
+            self.publish("edit", {
+                "boss": new_row[0],
+                "last_spawn": last_spawn.isoformat(),
+                "next_spawn": next_spawn.isoformat(),
+                "ts": int(next_spawn.timestamp()),
+                "interval_minutes": int(new_row[1]),
+                "renamed_from": old_row[0] if old_row is not None and old_row[0] != new_row[0] else None,
+                "by": by,
+            })
+        return changes
+
+    def save_weekly(self, data, by: str = None) -> WeeklySchedule:
+        """
+        Validates and writes the weekly schedule (ValueError if a slot is malformed), published
+        as a "weekly" event; not an edit history row, which is per field boss (and its drift).
+        """
+        schedule = self.weekly.save(data)
+        self.notifier.reschedule(self._notifier_key)
+        self.publish("weekly", {"bosses": [boss for boss, _ in data], "by": by})
+        return schedule
+
+    def log_edit(self, boss_name: str, old_time: str, new_time: str, edited_by: str) -> None:
+        self.history.append(boss_name, old_time, new_time, edited_by, intervals=self._intervals())
+
+    def log_timer_edits(self, changes, edited_by: str) -> None:
+        """One history row per change save_timers() returned, appended in one transaction."""
+        edits = []
+        for old_row, new_row in changes:
+            if old_row is None:
+                edits.append((new_row[0], "(new boss)", f"{new_row[2]} · every {new_row[1]} min"))
+                continue
+            if new_row is None:
+                edits.append((old_row[0], old_row[2], "(removed)"))
+                continue
+            if new_row[0] != old_row[0]:
+                edits.append((new_row[0], f"(renamed from {old_row[0]})", new_row[0]))
+            if int(new_row[1]) != int(old_row[1]):
+                edits.append((new_row[0], f"every {old_row[1]} min", f"every {new_row[1]} min"))
+            # the grid saves caught-up last spawns; a whole number of intervals later is no edit
+            moved = (parse_time_str(new_row[2]) - parse_time_str(old_row[2])).total_seconds()
+            if moved % (int(old_row[1]) * 60):
+                edits.append((new_row[0], old_row[2], new_row[2]))
+        self.history.append_many(edits, edited_by, intervals=self._intervals())
+
+    # --- stats ---
+    def _intervals(self) -> dict:
+        timers = self.snapshot().timers
+        return dict(zip(timers.names, (timers.interval // 60).tolist()))
+
+    def drift_stats(self):
+        """Per-boss kill drift from the edit history's rollups (see HistoryStore)."""
+        self.history.catch_up(self._intervals())
+        return self.history.drift_stats()
+
+    def editor_stats(self):
+        self.history.catch_up(self._intervals())
+        return self.history.editor_stats()
+
+    # --- events ---
+    def publish(self, event_type: str, data: dict, dedup_key: str = None):
+        """Logs an event for SSE subscribers; a repeated dedup_key is logged once across processes."""
+        return self.events.append(self._notifier_key, event_type, data, dedup_key and self._key_prefix + dedup_key)
+
+    def publish_spawns(self, spawns) -> None:
+        """A "spawn" event per (source, boss_name, spawn_dt) that was just reached."""
+        for source, boss_name, spawn_dt in spawns:
+            self.publish(
+                "spawn",
+                {"boss": boss_name, "source": source.lower(), "spawn": spawn_dt.isoformat(), "ts": int(spawn_dt.timestamp())},
+                "SPAWN|" + _warn_event_key(source, boss_name, spawn_dt),
+            )
+
+    # --- notifications ---
+    def send_spawn_warnings(self, spawns, stage: int = WARNING_WINDOW_SECONDS) -> DispatchHandle:
+        """One grouped alert per target for [(source, boss_name, spawn_dt), ...] at this stage."""
+        if stage > 0:
+            for source, boss_name, spawn_dt in spawns:
+                self.publish(
+                    "warning",
+                    {
+                        "boss": boss_name, "source": source.lower(), "spawn": spawn_dt.isoformat(),
+                        "ts": int(spawn_dt.timestamp()), "stage_seconds": stage,
+                    },
+                    "WARN|" + _warn_event_key(source, boss_name, spawn_dt, stage),
+                )
+        return send_spawn_warnings(
+            self.warns, self.dispatcher, spawns, self.targets, self._key_prefix, stage, self.alert_stages,
+        )
+
+    def send_spawn_warning(self, source: str, boss_name: str, spawn_dt: datetime,
+                           stage: int = WARNING_WINDOW_SECONDS) -> DispatchHandle:
+        return self.send_spawn_warnings([(source, boss_name, spawn_dt)], stage)
+
+    def target_health(self):
+        """Circuit-breaker state of each of this engine's Discord targets."""
+        return self.dispatcher.health(self.targets)
+
+    def broadcast(self, message_builder, targets=None, key: str = None, expires_at: datetime = None) -> DispatchHandle:
+        """Fans out to this engine's targets (or the given ones); key is namespaced per tenant."""
+        return self.dispatcher.broadcast(
+            message_builder,
+            self.targets if targets is None else targets,
+            key=self._key_prefix + key if key else None,
+            expires_at=expires_at,
+        )
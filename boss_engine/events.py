@@ -0,0 +1,172 @@
+"""
+Timer and alert events (boss killed, timer edited, warning stage reached, spawn reached):
+a durable SQLite log written by the app's write path and notifier (storage.RedisEventLog
+when the state is in Redis, so replicas share it), and the broadcaster that streams it to
+Server-Sent Events subscribers in the API process.
+"""
+from collections import deque
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+from .common import closing_commit
+from .metrics import METRICS
+
+EVENT_RETENTION_SECONDS = 86400  # a subscriber can resume from up to a day back
+EVENT_PRUNE_EVERY_SECONDS = 600
+EVENT_POLL_SECONDS = 0.25  # how often the broadcaster looks for new events
+EVENT_RING_SIZE = 2048  # recent encoded events kept in memory for resuming subscribers
+SSE_KEEPALIVE_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+
+class EventLog:
+    """
+    Append-only event log shared by every process, in SQLite. The row id is the SSE event id,
+    so resuming from Last-Event-ID is a range query. A non-empty dedup key makes append() a
+    no-op when another process (or a restart) already logged that event.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    tenant TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    dedup_key TEXT UNIQUE
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS events_created ON events (created_at)")
+        self._last_prune = 0.0
+
+    def _connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=10))
+
+    def append(self, tenant: str, event_type: str, data: dict, dedup_key: str = None):
+        """Returns the new event id, or None if dedup_key was already logged."""
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO events (created_at, tenant, type, data, dedup_key) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), tenant, event_type, json.dumps(data, ensure_ascii=False), dedup_key),
+            )
+            event_id = cur.lastrowid if cur.rowcount == 1 else None
+        if event_id is not None:
+            METRICS.inc("events_total", type=event_type)
+        if time.time() - self._last_prune > EVENT_PRUNE_EVERY_SECONDS:
+            self.prune()
+        return event_id
+
+    def since(self, last_id: int, limit: int = 500):
+        """[(id, tenant, type, data_json)] after last_id, oldest first."""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT id, tenant, type, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, limit),
+            ).fetchall()
+
+    def last_id(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def prune(self) -> None:
+        self._last_prune = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM events WHERE created_at < ?", (time.time() - EVENT_RETENTION_SECONDS,))
+
+
+def sse_frame(event_id: int, event_type: str, data: str) -> bytes:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n".encode("utf-8")
+
+
+class EventBroadcaster:
+    """
+    One thread tails the EventLog and encodes each new event once into an SSE frame, kept in a
+    ring of recent frames; every subscriber just writes those shared bytes. A subscriber that
+    resumes from further back than the ring is first replayed from the log.
+    """
+
+    def __init__(self, log: EventLog, poll_interval: float = EVENT_POLL_SECONDS, ring_size: int = EVENT_RING_SIZE):
+        self.log = log
+        self.poll_interval = poll_interval
+        self.ring_size = ring_size
+        self._ring = deque()  # (id, tenant, frame), oldest first
+        self._last_id = log.last_id()  # new subscribers start from "now"
+        self._floor = self._last_id  # events up to this id are not in the ring
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-broadcaster", daemon=True)
+
+    def start(self) -> "EventBroadcaster":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                rows = self.log.since(self._last_id)
+            except Exception as exc:  # a locked database or a dropped Redis connection: next poll
+                METRICS.inc("event_log_errors_total", error=type(exc).__name__)
+                rows = []
+            if rows:
+                frames = [(event_id, tenant, sse_frame(event_id, event_type, data))
+                          for event_id, tenant, event_type, data in rows]
+                with self._cond:
+                    self._ring.extend(frames)
+                    while len(self._ring) > self.ring_size:
+                        self._floor = self._ring.popleft()[0]
+                    self._last_id = frames[-1][0]
+                    self._cond.notify_all()
+            if len(rows) < 500:
+                self._stop.wait(self.poll_interval)
+
+    def _frames_after(self, cursor: int, tenant: str):
+        """(frames for this tenant after cursor, new cursor), from the ring or, if older, the log."""
+        with self._cond:
+            if cursor >= self._floor:
+                frames = [frame for event_id, t, frame in self._ring if event_id > cursor and t == tenant]
+                return frames, max(cursor, self._last_id)
+        rows = self.log.since(cursor, limit=self.ring_size)
+        if not rows:
+            return [], cursor
+        return [sse_frame(event_id, event_type, data) for event_id, t, event_type, data in rows if t == tenant], rows[-1][0]
+
+    def subscribe(self, tenant: str, last_event_id: int = None):
+        """
+        Generator of SSE bytes for one client: a retry hint, anything after last_event_id
+        (Last-Event-ID on reconnect), then live events, with a comment line as keepalive.
+        """
+        METRICS.inc("sse_subscribers_total")
+        yield f"retry: {SSE_RETRY_MS}\n\n".encode("utf-8")
+        if last_event_id is None:
+            cursor = self._last_id
+        else:  # an id from before the log was reset must not hide the new events
+            cursor = min(last_event_id, self.log.last_id())
+        while not self._stop.is_set():
+            frames, cursor = self._frames_after(cursor, tenant)
+            if frames:
+                yield b"".join(frames)
+            with self._cond:
+                idle = self._last_id <= cursor
+                if idle:
+                    self._cond.wait(SSE_KEEPALIVE_SECONDS)
+                    idle = self._last_id <= cursor
+            if idle:
+                yield b": keepalive\n\n"
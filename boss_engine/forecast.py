@@ -0,0 +1,164 @@
+"""
+Every spawn in a time horizon, field and weekly bosses merged into one sorted stream,
+plus the iCal / JSON exports built from it.
+"""
+from datetime import datetime, timezone
+import heapq
+import json
+import math
+import threading
+
+from .common import MANILA, now_manila
+from .timers import TimerStore
+from .weekly import WeeklySchedule
+
+FORECAST_HORIZONS = {"24h": 24 * 3600, "7d": 7 * 86400}
+EXPORT_ANCHOR_SECONDS = 3600  # exports start at the top of the hour, so they are reused for an hour
+ICS_EVENT_MINUTES = 15
+ICS_ALARM_MINUTES = 5  # same lead time as the Discord warning
+
+
+def _progression(first: int, end_ts: int, step: int, source: str, boss: str):
+    for ts in range(first, end_ts + 1, step):
+        yield ts, source, boss
+
+
+def _weekly_stream(schedule: WeeklySchedule, now: datetime, end_ts: int):
+    for ts, boss in schedule.occurrences(now, end_ts):
+        yield ts, "WEEKLY", boss
+
+
+def forecast(timers: TimerStore, schedule: WeeklySchedule, now: datetime = None, horizon_seconds: float = 86400):
+    """
+    Lazily yields (spawn_ts, source, boss_name) for every spawn in (now, now + horizon],
+    soonest first. now may be in the past (an export anchored to the top of the hour).
+
+    Each field boss is an arithmetic progression through its saved last spawn and each
+    weekly slot repeats every week; the per-boss streams are k-way merged, so taking the
+    first N spawns does not generate the whole horizon.
+    """
+    now = now or now_manila()
+    start_ts = math.ceil(now.timestamp())
+    end_ts = start_ts + int(horizon_seconds)
+
+    streams = []
+    for i in range(len(timers)):
+        nxt, step = int(timers.next[i]), int(timers.interval[i])
+        # the progression's first spawn after now in closed form: forward from a timer not yet
+        # caught up, back from one a shared store already caught up further; never before the
+        # one after the saved last spawn
+        first = max(nxt - (nxt - start_ts - 1) // step * step, int(timers.saved_last[i]) + step)
+        if first <= end_ts:
+            streams.append(_progression(first, end_ts, step, "FIELD", timers.names[i]))
+    streams.append(_weekly_stream(schedule, now, end_ts))
+    return heapq.merge(*streams)
+
+
+def forecast_rows(spawns):
+    """(spawn_ts, source, boss) -> dicts for tables and the JSON export."""
+    return [
+        {
+            "boss": boss,
+            "source": source.lower(),
+            "spawn": datetime.fromtimestamp(ts, tz=MANILA).isoformat(),
+            "ts": ts,
+        }
+        for ts, source, boss in spawns
+    ]
+
+
+def to_json(spawns, generated_at: datetime, horizon_seconds: float) -> bytes:
+    return json.dumps(
+        {
+            "generated_at": generated_at.isoformat(),
+            "horizon_seconds": int(horizon_seconds),
+            "spawns": forecast_rows(spawns),
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def _ics_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line: str) -> str:
+    # RFC 5545: lines longer than 75 octets continue on the next line after a space
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts, chunk = [], b""
+    for ch in line:
+        enc = ch.encode("utf-8")
+        if len(chunk) + len(enc) > (75 if not parts else 74):
+            parts.append(chunk.decode("utf-8"))
+            chunk = b""
+        chunk += enc
+    parts.append(chunk.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def _ics_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def to_ics(spawns, generated_at: datetime, calendar_name: str, uid_prefix: str = "bosstimer") -> bytes:
+    """One VEVENT per spawn, with a display alarm ICS_ALARM_MINUTES before it."""
+    stamp = _ics_time(generated_at.timestamp())
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//bosstimer//forecast//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_text(calendar_name)}",
+    ]
+    for ts, source, boss in spawns:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid_prefix}-{source.lower()}-{_ics_text(boss).replace(' ', '_')}-{ts}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_ics_time(ts)}",
+            f"DTEND:{_ics_time(ts + ICS_EVENT_MINUTES * 60)}",
+            f"SUMMARY:{_ics_text(boss)} spawns",
+            f"CATEGORIES:{source.title()}",
+            "BEGIN:VALARM",
+            "ACTION:DISPLAY",
+            f"DESCRIPTION:{_ics_text(boss)} spawns in {ICS_ALARM_MINUTES} minutes",
+            f"TRIGGER:-PT{ICS_ALARM_MINUTES}M",
+            "END:VALARM",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_ics_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+class ForecastExportCache:
+    """
+    Built .ics / .json exports, reused until the timers or the weekly schedule change.
+
+    Exports start at the top of the current hour (so an export is also rebuilt once an
+    hour as the horizon rolls forward); an event in the current hour that already passed
+    is harmless in a calendar.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._max_entries = max_entries
+
+    def get(self, stamp, fmt: str, horizon_seconds: float, build):
+        """
+        stamp: identifies the data (e.g. timer snapshot version + weekly mtime).
+        build: function(anchor_dt) -> bytes, only called on a miss.
+        """
+        anchor_ts = int(now_manila().timestamp()) // EXPORT_ANCHOR_SECONDS * EXPORT_ANCHOR_SECONDS
+        key = (stamp, fmt, int(horizon_seconds), anchor_ts)
+        with self._lock:
+            data = self._entries.get(key)
+        if data is None:
+            data = build(datetime.fromtimestamp(anchor_ts, tz=MANILA))
+            with self._lock:
+                if len(self._entries) >= self._max_entries:
+                    self._entries.clear()
+                self._entries[key] = data
+        return data
@@ -0,0 +1,285 @@
+"""
+Append-only edit history of timer changes (SQLite), with kill-drift and editor rollups
+kept up to date on every append.
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import math
+import sqlite3
+
+from .common import MANILA, closing_commit, now_manila, parse_time_str
+
+HISTORY_COLUMNS = ["boss", "old_time", "new_time", "edited_at", "edited_by"]
+DRIFT_COLUMNS = ["boss", "kills", "mean_drift", "p50_drift", "p90_drift", "late_rate"]
+EDITOR_COLUMNS = ["edited_by", "edits", "kills", "mean_drift", "first_edit", "last_edit"]
+LATE_KILL_MINUTES = 10  # a kill logged more than this after the predicted spawn counts as late
+ROLLUP_VERSION = 2  # bump when kill_drift() changes: the rollups are then rebuilt from the history
+
+
+def kill_drift(old_time: str, new_time: str, interval_minutes: int):
+    """
+    Minutes between a logged spawn (new_time) and the one the timer predicted from the
+    previous one (old_time + the nearest whole number of intervals, possibly none):
+    positive = logged late. InstaKill logs the caught-up last spawn as old_time, i.e. the
+    predicted spawn itself when the kill comes after it (0 intervals) and the one before
+    when it comes early (1 interval).
+    None when the edit is not a kill of a known field boss (unparsable times, an unknown
+    interval, or a correction that moves the timer backwards).
+    """
+    if not interval_minutes or interval_minutes <= 0:
+        return None
+    try:
+        elapsed = (parse_time_str(new_time) - parse_time_str(old_time)).total_seconds() // 60
+    except (TypeError, ValueError):
+        return None
+    if elapsed < 0:
+        return None
+    cycles = round(elapsed / interval_minutes)
+    return int(elapsed - cycles * interval_minutes)
+
+
+def _percentile(buckets, total: int, q: float) -> int:
+    """q-th percentile of a [(drift, count)] histogram sorted by drift."""
+    rank = max(1, math.ceil(total * q))  # nearest rank
+    seen = 0
+    for drift, count in buckets:
+        seen += count
+        if seen >= rank:
+            return drift
+    return buckets[-1][0]
+
+
+def _drift_stats(by_boss):
+    """DRIFT_COLUMNS rows from {boss: [(drift, kills)] sorted by drift}, most kills first."""
+    stats = []
+    for boss, buckets in by_boss.items():
+        total = sum(kills for _, kills in buckets)
+        late = sum(kills for drift, kills in buckets if drift > LATE_KILL_MINUTES)
+        stats.append(dict(zip(DRIFT_COLUMNS, (
+            boss, total, sum(drift * kills for drift, kills in buckets) / total,
+            _percentile(buckets, total, 0.5), _percentile(buckets, total, 0.9), late / total,
+        ))))
+    return sorted(stats, key=lambda row: (-row["kills"], row["boss"]))
+
+
+def _editor_stats(rows):
+    """EDITOR_COLUMNS rows from [(edited_by, edits, kills, drift_sum, first_at, last_at)], most active first."""
+    stats = [
+        dict(zip(EDITOR_COLUMNS, (
+            by, edits, kills, drift_sum / kills if kills else None,
+            datetime.fromtimestamp(first_at, tz=MANILA), datetime.fromtimestamp(last_at, tz=MANILA),
+        )))
+        for by, edits, kills, drift_sum, first_at, last_at in rows
+    ]
+    return sorted(stats, key=lambda row: (-row["edits"], row["edited_by"]))
+
+
+class HistoryStore:
+    """
+    Append-only edit history in SQLite: each edit is one INSERT, and the History page
+    pages/filters with indexed queries instead of loading the whole log.
+
+    Drift and editor statistics are rollup tables advanced in the same transaction as each
+    append, from a "rolled up to" history id: a drift histogram per boss (drift is whole
+    minutes, so percentiles from it are exact) and counters per editor. The Stats page reads
+    only those, so it costs the same with years of history. Rows written before the rollups
+    existed (or imported), or rolled up by an older ROLLUP_VERSION, are folded in once by
+    catch_up().
+    """
+
+    def __init__(self, path: Path, legacy_path: Path = None):
+        self.path = path
+        self.legacy_path = legacy_path
+        is_new = not path.exists()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    boss TEXT NOT NULL,
+                    old_time TEXT,
+                    new_time TEXT,
+                    edited_at REAL NOT NULL,
+                    edited_by TEXT NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS history_time ON history (edited_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS history_boss ON history (boss, edited_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS history_editor ON history (edited_by, edited_at)")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS drift_buckets (
+                    boss TEXT NOT NULL,
+                    drift INTEGER NOT NULL,
+                    kills INTEGER NOT NULL,
+                    PRIMARY KEY (boss, drift)
+                )
+                """
+            )
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS editor_stats (
+                    edited_by TEXT PRIMARY KEY,
+                    edits INTEGER NOT NULL,
+                    kills INTEGER NOT NULL,
+                    drift_sum INTEGER NOT NULL,
+                    first_at REAL NOT NULL,
+                    last_at REAL NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS rollup_state (id INTEGER PRIMARY KEY CHECK (id = 0), rolled_up_to INTEGER NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO rollup_state (id, rolled_up_to) VALUES (0, 0)")
+            if db.execute("PRAGMA user_version").fetchone()[0] < ROLLUP_VERSION:
+                # rolled up by an older kill_drift(): start over, catch_up() refolds every row
+                db.execute("DELETE FROM drift_buckets")
+                db.execute("DELETE FROM editor_stats")
+                db.execute("UPDATE rollup_state SET rolled_up_to = 0")
+                db.execute(f"PRAGMA user_version = {ROLLUP_VERSION}")
+        if is_new:
+            self._import_legacy()
+
+    def _connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=10))
+
+    def append(self, boss: str, old_time: str, new_time: str, edited_by: str, edited_at: datetime = None,
+               intervals: dict = None) -> None:
+        """intervals: {boss_name: interval_minutes} of the field bosses, to roll up kill drift."""
+        self.append_many([(boss, old_time, new_time)], edited_by, edited_at, intervals)
+
+    def append_many(self, edits, edited_by: str, edited_at: datetime = None, intervals: dict = None) -> None:
+        """[(boss, old_time, new_time)] by one editor, in one transaction (a batched Manage save)."""
+        edited_at = (edited_at or now_manila()).timestamp()
+        with self._connect() as db:
+            db.executemany(
+                "INSERT INTO history (boss, old_time, new_time, edited_at, edited_by) VALUES (?, ?, ?, ?, ?)",
+                [(boss, old_time, new_time, edited_at, edited_by) for boss, old_time, new_time in edits],
+            )
+            # the insert holds the write lock, so no other writer can roll the same rows up
+            self._roll_up(db, intervals or {})
+
+    def catch_up(self, intervals: dict) -> int:
+        """Folds history rows not yet in the rollups into them; returns how many there were."""
+        with self._connect() as db:
+            if db.execute("SELECT rolled_up_to < (SELECT COALESCE(MAX(id), 0) FROM history) FROM rollup_state").fetchone()[0]:
+                db.execute("BEGIN IMMEDIATE")
+                return self._roll_up(db, intervals)
+        return 0
+
+    @staticmethod
+    def _roll_up(db: sqlite3.Connection, intervals: dict) -> int:
+        rolled_up_to = db.execute("SELECT rolled_up_to FROM rollup_state").fetchone()[0]
+        rows = db.execute(
+            "SELECT id, boss, old_time, new_time, edited_at, edited_by FROM history WHERE id > ? ORDER BY id",
+            (rolled_up_to,),
+        ).fetchall()
+        if not rows:
+            return 0
+        drifts, editors = {}, {}
+        for _, boss, old_time, new_time, edited_at, edited_by in rows:
+            drift = kill_drift(old_time, new_time, intervals.get(boss))
+            edits, kills, drift_sum, first_at, last_at = editors.get(edited_by, (0, 0, 0, edited_at, edited_at))
+            if drift is not None:
+                drifts[boss, drift] = drifts.get((boss, drift), 0) + 1
+                kills, drift_sum = kills + 1, drift_sum + drift
+            editors[edited_by] = (edits + 1, kills, drift_sum, min(first_at, edited_at), max(last_at, edited_at))
+        db.executemany(
+            "INSERT INTO drift_buckets (boss, drift, kills) VALUES (?, ?, ?) "
+            "ON CONFLICT (boss, drift) DO UPDATE SET kills = kills + excluded.kills",
+            [(boss, drift, kills) for (boss, drift), kills in drifts.items()],
+        )
+        db.executemany(
+            "INSERT INTO editor_stats (edited_by, edits, kills, drift_sum, first_at, last_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (edited_by) DO UPDATE SET edits = edits + excluded.edits, kills = kills + excluded.kills, "
+            "drift_sum = drift_sum + excluded.drift_sum, first_at = MIN(first_at, excluded.first_at), "
+            "last_at = MAX(last_at, excluded.last_at)",
+            [(by, *stats) for by, stats in editors.items()],
+        )
+        db.execute("UPDATE rollup_state SET rolled_up_to = ?", (rows[-1][0],))
+        return len(rows)
+
+    def drift_stats(self):
+        """Per-boss kill drift in minutes (mean, p50, p90) and late-kill rate, most kills first."""
+        with self._connect() as db:
+            rows = db.execute("SELECT boss, drift, kills FROM drift_buckets ORDER BY boss, drift").fetchall()
+        by_boss = {}
+        for boss, drift, kills in rows:
+            by_boss.setdefault(boss, []).append((drift, kills))
+        return _drift_stats(by_boss)
+
+    def editor_stats(self):
+        """Per-editor edits, kills logged and their mean drift, most active first."""
+        with self._connect() as db:
+            rows = db.execute("SELECT edited_by, edits, kills, drift_sum, first_at, last_at FROM editor_stats").fetchall()
+        return _editor_stats(rows)
+
+    @staticmethod
+    def _where(boss: str = None, editor: str = None):
+        clauses, params = [], []
+        if boss:
+            clauses.append("boss = ?")
+            params.append(boss)
+        if editor:
+            clauses.append("edited_by = ?")
+            params.append(editor)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, boss: str = None, editor: str = None) -> int:
+        where, params = self._where(boss, editor)
+        with self._connect() as db:
+            return db.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def query(self, boss: str = None, editor: str = None, limit: int = 100, offset: int = 0):
+        """Newest first; edited_at comes back as a Manila datetime."""
+        where, params = self._where(boss, editor)
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT boss, old_time, new_time, edited_at, edited_by FROM history{where} "
+                "ORDER BY edited_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [
+            dict(zip(HISTORY_COLUMNS, (boss, old, new, datetime.fromtimestamp(ts, tz=MANILA), by)))
+            for boss, old, new, ts, by in rows
+        ]
+
+    def distinct(self, column: str):
+        """Distinct bosses or editors (both indexed), for the History page filters."""
+        if column not in ("boss", "edited_by"):
+            raise ValueError(f"Unknown history column: {column}")
+        with self._connect() as db:
+            return [row[0] for row in db.execute(f"SELECT DISTINCT {column} FROM history ORDER BY {column}")]
+
+    def rows(self):
+        """Every entry oldest first as (boss, old_time, new_time, edited_at timestamp, edited_by), for migrations."""
+        with self._connect() as db:
+            yield from db.execute("SELECT boss, old_time, new_time, edited_at, edited_by FROM history ORDER BY id")
+
+    def _import_legacy(self) -> None:
+        """One-shot import of the old boss_history.json."""
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception:
+            return
+
+        rows = []
+        for entry in legacy if isinstance(legacy, list) else []:
+            try:
+                edited_at = parse_time_str(entry["edited_at"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            rows.append((
+                entry.get("boss", ""), entry.get("old_time"), entry.get("new_time"),
+                edited_at, entry.get("edited_by", "Unknown"),
+            ))
+        with self._connect() as db:
+            db.executemany(
+                "INSERT INTO history (boss, old_time, new_time, edited_at, edited_by) VALUES (?, ?, ?, ?, ?)",
+                sorted(rows, key=lambda row: row[3]),
+            )
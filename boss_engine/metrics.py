@@ -0,0 +1,193 @@
+"""
+Process-wide counters and latency histograms, exported in the Prometheus text format.
+
+Everything records into METRICS (one registry per process, like the engine itself), so the
+stores and the webhook sender can count without being handed a registry.
+"""
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+import bisect
+import os
+import threading
+import time
+
+METRIC_PREFIX = "bosstimer_"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 1024  # per histogram, for the p50/p99 shown on the Diagnostics page
+EXPORT_EVERY_SECONDS = 15
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative Prometheus buckets plus a ring of recent samples for quick percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q: float):
+        """q-quantile of the recent samples, or None before the first observation."""
+        samples = sorted(self.recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, label_key) -> float
+        self._histograms = {}  # (name, label_key) -> Histogram
+        self._help = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes the block's wall time in seconds (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counters(self):
+        """[(name, labels, value)] sorted by name."""
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [(name, dict(key), value) for (name, key), value in items]
+
+    def histograms(self):
+        """[(name, labels, count, sum, p50, p99)] sorted by name."""
+        with self._lock:
+            items = sorted(self._histograms.items(), key=lambda item: item[0])
+            return [
+                (name, dict(key), h.count, h.sum, h.quantile(0.5), h.quantile(0.99))
+                for (name, key), h in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((k, (list(h.counts), h.sum, h.count, h.buckets)) for k, h in self._histograms.items()),
+                key=lambda item: item[0],
+            )
+
+        seen = set()
+        for (name, key), value in counters:
+            full = METRIC_PREFIX + name
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+            lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+        for (name, key), (counts, total, count, buckets) in histograms:
+            full = METRIC_PREFIX + name
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+            cumulative = 0
+            for bound, n in zip(buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{full}_bucket{_format_labels(key, le_label)} {cumulative}")
+            lines.append(f"{full}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"{full}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        """Atomic write, for node_exporter's textfile collector or any file scraper."""
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class TextfileExporter:
+    """Background thread that rewrites the metrics text file every few seconds."""
+
+    def __init__(self, metrics: Metrics, path: Path, interval: float = EXPORT_EVERY_SECONDS):
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    def start(self) -> "TextfileExporter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.metrics.write_textfile(self.path)
+            except OSError:
+                pass
+            self._stop.wait(self.interval)
+
+
+METRICS = Metrics()
+METRICS.describe("rerun_phase_seconds", "Wall time of each phase of a Streamlit rerun.")
+METRICS.describe("webhook_requests_total", "Discord webhook POSTs by HTTP status (error = no response).")
+METRICS.describe("webhook_request_seconds", "Discord webhook POST latency.")
+METRICS.describe("webhook_circuit_opened_total", "Times a webhook's circuit breaker opened (target considered down).")
+METRICS.describe("webhook_dispatcher_errors_total", "Errors in the webhook outbox loop, by exception type (the loop keeps going).")
+METRICS.describe("api_requests_total", "Spawn-status API requests by route.")
+METRICS.describe("events_total", "Events logged for the SSE stream, by type.")
+METRICS.describe("sse_subscribers_total", "SSE connections opened (including reconnects).")
+METRICS.describe("event_log_errors_total", "Failed reads of the event log by the SSE broadcaster, by exception type.")
+METRICS.describe("json_reads_total", "Old JSON data file reads (the one-shot import into the state backend).")
+METRICS.describe("state_reads_total", "Timer / weekly schedule loads from the state backend (stamp checks excluded).")
+METRICS.describe("state_writes_total", "Timer / weekly schedule writes to the state backend.")
+METRICS.describe("warn_claims_total", "Warning dedup claims; result=duplicate means already sent.")
+METRICS.describe("spawn_warning_seconds", "Time to claim and enqueue one spawn warning.")
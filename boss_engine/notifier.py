@@ -0,0 +1,378 @@
+"""
+Staged spawn alerts (5-minute warning by default): de-duplicated fan-out and the background
+thread that fires them.
+"""
+from datetime import datetime, timedelta
+import hashlib
+import math
+import threading
+import time
+
+import numpy as np
+
+from . import common
+from .alerts import DEFAULT_ALERT_STAGES, AlertStages, TimingWheel, stage_label
+from .common import format_timedelta, now_manila
+from .dedup import WarnStore
+from .metrics import METRICS
+from .timers import TimerStore
+from .webhooks import DispatchHandle, WebhookDispatcher
+from .weekly import WEEK_SECONDS, WeeklySchedule
+
+WARNING_WINDOW_SECONDS = 5 * 60  # 5 minutes
+WARNING_COALESCE_SECONDS = 3 * 60  # spawns this close to a due warning go out in the same message
+SPAWNED_GRACE_SECONDS = 60  # a "spawning now" alert later than this (e.g. after downtime) is dropped
+NOTIFIER_RESCAN_SECONDS = 30  # also picks up timer/schedule edits made by other processes
+
+
+# ------------------- Staged warning logic (NO DUPLICATES PER DISCORD) -------------------
+def _warn_event_key(source: str, boss_name: str, spawn_dt: datetime, stage: int = WARNING_WINDOW_SECONDS) -> str:
+    # the 5-minute stage keeps the original key format, so existing claims still match
+    tag = source if stage == WARNING_WINDOW_SECONDS else f"{source}@{stage}"
+    return f"{tag}|{boss_name}|{spawn_dt.strftime('%Y-%m-%d %H:%M')}"
+
+
+def _warn_key(source: str, boss_name: str, spawn_dt: datetime, target_name: str,
+              stage: int = WARNING_WINDOW_SECONDS) -> str:
+    # per-target key so discord_1 and discord_2 are tracked separately
+    return f"{_warn_event_key(source, boss_name, spawn_dt, stage)}|{target_name}"
+
+
+def _stage_header(stage: int) -> str:
+    return "🔔 Spawning now!" if stage == 0 else f"⏳ {stage_label(stage)} warning!"
+
+
+def _warning_message(boss_name: str, spawn_dt: datetime, target: dict, stage: int = WARNING_WINDOW_SECONDS) -> str:
+    role_id = target.get("role_id", "")
+    ping = f"<@&{role_id}>" if role_id and "PASTE_ROLE_ID" not in role_id else ""
+    if stage == 0:
+        return (
+            f"{_stage_header(stage)}\n"
+            f"**{boss_name}** spawns now (**{spawn_dt.strftime('%I:%M %p')}** Manila Time)\n"
+            f"{ping}"
+        )
+    return (
+        f"{_stage_header(stage)}\n"
+        f"**{boss_name}** spawns at **{spawn_dt.strftime('%I:%M %p')}** (Manila Time)\n"
+        f"Time left: **{format_timedelta(spawn_dt - now_manila())}**\n"
+        f"{ping}"
+    )
+
+
+def _grouped_warning_message(spawns, target: dict, stage: int = WARNING_WINDOW_SECONDS) -> str:
+    """One message (and one ping) for several (source, boss_name, spawn_dt), soonest first."""
+    if len(spawns) == 1:
+        _, boss_name, spawn_dt = spawns[0]
+        return _warning_message(boss_name, spawn_dt, target, stage)
+
+    role_id = target.get("role_id", "")
+    ping = f"<@&{role_id}>" if role_id and "PASTE_ROLE_ID" not in role_id else ""
+    now = now_manila()
+    if stage == 0:
+        lines = [f"**{boss_name}** at **{spawn_dt.strftime('%I:%M %p')}**" for _, boss_name, spawn_dt in spawns]
+    else:
+        lines = [
+            f"**{boss_name}** spawns at **{spawn_dt.strftime('%I:%M %p')}** (in {format_timedelta(spawn_dt - now)})"
+            for _, boss_name, spawn_dt in spawns
+        ]
+    return f"{_stage_header(stage)}\n" + "\n".join(lines) + "\n(Manila Time)\n" + ping
+
+
+def _group_key(spawns, stage: int = WARNING_WINDOW_SECONDS) -> str:
+    """Outbox key of one warning message; a single spawn keeps its plain event key."""
+    if len(spawns) == 1:
+        return _warn_event_key(*spawns[0], stage)
+    events = sorted(_warn_event_key(*spawn, stage) for spawn in spawns)
+    digest = hashlib.sha1("\n".join(events).encode("utf-8")).hexdigest()[:16]
+    return f"GROUP|{spawns[0][2].strftime('%Y-%m-%d %H:%M')}|{digest}"
+
+
+def send_spawn_warnings(
+    warns: WarnStore, dispatcher: WebhookDispatcher, spawns, targets=None, key_prefix: str = "",
+    stage: int = WARNING_WINDOW_SECONDS, stages: AlertStages = None,
+) -> DispatchHandle:
+    """
+    Warns about several (source, boss_name, spawn_dt) at once: one message per target listing
+    every boss that target has not been warned about yet (claims stay per boss, target and stage).
+
+    targets: defaults to the dispatcher's targets.
+    key_prefix: namespaces the outbox key when several tenants share one dispatcher.
+    stage: seconds before the spawn this alert is for (0 = "spawning now").
+    stages: if given, a target only gets the bosses it has this stage configured for.
+    """
+    spawns = sorted(spawns, key=lambda spawn: spawn[2])
+    keys = {}
+    for target in (dispatcher.targets if targets is None else targets):
+        target_name = target.get("name", "unknown")
+        wanted = spawns if stages is None else [
+            spawn for spawn in spawns if stage in stages.for_target(spawn[1], target)
+        ]
+        # skip bosses that were already sent to this target
+        claimed = [
+            spawn for spawn in wanted
+            if warns.claim(_warn_key(spawn[0], spawn[1], spawn[2], target_name, stage))
+        ]
+        if not claimed:
+            continue
+        expires_at = claimed[-1][2]  # a warning delivered after the (last) spawn is just noise
+        if stage == 0:
+            expires_at += timedelta(seconds=SPAWNED_GRACE_SECONDS)
+        handle = dispatcher.broadcast(
+            lambda target, claimed=claimed: _grouped_warning_message(claimed, target, stage),
+            [target],
+            key=key_prefix + _group_key(claimed, stage),
+            expires_at=expires_at,
+        )
+        keys.update(handle.keys)
+    return DispatchHandle(dispatcher.outbox, keys)
+
+
+def send_spawn_warning(
+    warns: WarnStore, dispatcher: WebhookDispatcher, source: str, boss_name: str, spawn_dt: datetime,
+    targets=None, key_prefix: str = "", stage: int = WARNING_WINDOW_SECONDS,
+) -> DispatchHandle:
+    return send_spawn_warnings(warns, dispatcher, [(source, boss_name, spawn_dt)], targets, key_prefix, stage)
+
+
+# ------------------- Spawn scans -------------------
+def upcoming_spawns(timers: TimerStore, schedule: WeeklySchedule, now: datetime = None):
+    """
+    Yields (source, boss_name, next_spawn_dt, period_seconds) for every field and weekly boss.
+    """
+    now = now or now_manila()
+    timers.update_next(now)
+    for t in timers:
+        yield "FIELD", t.name, t.next_time, t.interval_seconds
+
+    for boss, spawn_dt in schedule.upcoming(now):
+        yield "WEEKLY", boss, spawn_dt, WEEK_SECONDS
+
+
+def spawns_in_window(timers: TimerStore, schedule: WeeklySchedule, now: datetime = None,
+                     seconds: float = WARNING_WINDOW_SECONDS):
+    """
+    (source, boss_name, spawn_dt) for every spawn in (now, now + seconds], soonest first.
+    The field timers are scanned with one array mask instead of a loop over TimerEntry views.
+    """
+    now = now or now_manila()
+    timers.update_next(now)
+    now_ts = math.ceil(now.timestamp())
+    hits = np.flatnonzero((timers.next > now_ts) & (timers.next <= now_ts + seconds))
+    out = [
+        ("FIELD", timers.names[i], datetime.fromtimestamp(int(timers.next[i]), tz=common.MANILA))
+        for i in hits[np.argsort(timers.next[hits], kind="stable")]
+    ]
+    out.extend(("WEEKLY", boss, spawn_dt) for boss, spawn_dt in schedule.spawns_within(now, seconds))
+    out.sort(key=lambda spawn: spawn[2])
+    return out
+
+
+# ------------------- Background spawn notifier -------------------
+def _default_stages(boss_name: str) -> tuple:
+    return DEFAULT_ALERT_STAGES
+
+
+def _coalesce_seconds(stage: int) -> int:
+    # WARNING_COALESCE_SECONDS for the 5-minute warning, scaled down for shorter stages
+    # (so a 1-minute warning is never sent minutes early)
+    return min(WARNING_COALESCE_SECONDS, stage * WARNING_COALESCE_SECONDS // WARNING_WINDOW_SECONDS)
+
+
+class SpawnNotifier:
+    """
+    Single long-lived thread (one per server process) that sends the staged spawn alerts.
+
+    Every alert (a spawn minus one of its boss's stages, e.g. 15, 5 and 1 minutes before, or
+    0 for "spawning now") is an entry in a TimingWheel, so queueing or cancelling one is O(1)
+    and a wake-up only touches the alerts that are due. Each spawn also has an entry at the
+    spawn itself, which queues that boss's following spawn.
+
+    Each source (one per tenant) is registered with watch(): its spawn feed, its alert sender,
+    a stamp of the state it is built from and its stages per boss. An edit made in this
+    process re-queues just that boss via update(); when a source's state changes otherwise
+    (reschedule() or the periodic stamp check, which also sees other replicas' writes), its
+    spawns are re-read and only the ones that moved are re-queued.
+    When an alert is due, the same source's alerts for the same stage due shortly after
+    (WARNING_COALESCE_SECONDS for the 5-minute stage, proportionally less for shorter ones)
+    are sent with it, as one message.
+    """
+
+    def __init__(self):
+        self._sources = {}  # key -> (spawns, warn, stamp, stages, spawned)
+        self._stamps = {}
+        self._dirty = set()
+        self._wheel = TimingWheel(time.time())
+        self._alerts = {}  # key -> {(source, boss): {phase: (spawn_ts, period, [WheelTimer])}}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spawn-notifier", daemon=True)
+
+    def watch(self, key: str, spawns, warn, stamp=None, stages=None, spawned=None) -> None:
+        """
+        spawns: callable returning upcoming_spawns()-style tuples.
+        warn: callable([(source, boss_name, spawn_dt), ...], stage) that sends one grouped alert.
+        stamp: optional callable whose value changes whenever the spawns may have (any process's write).
+        stages: callable(boss_name) -> stages in seconds before the spawn (default: 5 minutes).
+        spawned: optional callable([(source, boss_name, spawn_dt), ...]) told when spawns are reached.
+        """
+        with self._lock:
+            self._sources[key] = (spawns, warn, stamp, stages or _default_stages, spawned)
+        self.reschedule(key)
+
+    def start(self) -> "SpawnNotifier":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def reschedule(self, key: str = None) -> None:
+        """Call after writing timers or a weekly schedule so that source is re-read right away."""
+        with self._lock:
+            self._dirty.update(self._sources if key is None else (key,))
+        self._wake.set()
+
+    def update(self, key: str, source: str, boss_name: str, spawns) -> None:
+        """
+        Replaces one boss's queued alerts with [(next_spawn_dt, period_seconds)], e.g. right
+        after InstaKill or a Manage edit; costs O(its stages), not a re-read of the source.
+        """
+        now_ts = time.time()
+        with self._lock:
+            if key not in self._sources:
+                return
+            for entry in self._alerts.get(key, {}).pop((source, boss_name), {}).values():
+                self._cancel(entry)
+            for spawn_dt, period in spawns:
+                self._queue(key, source, boss_name, int(spawn_dt.timestamp()), int(period), now_ts)
+        self._wake.set()
+
+    def pending(self) -> int:
+        """Alerts currently queued (including each spawn's own entry)."""
+        with self._lock:
+            return len(self._wheel)
+
+    # --- wheel bookkeeping (callers hold self._lock) ---
+    def _cancel(self, entry) -> None:
+        for timer in entry[2]:
+            self._wheel.cancel(timer)
+
+    def _queue(self, key: str, source: str, boss: str, spawn_ts: int, period: int, now_ts: float) -> None:
+        stages = [stage for stage in self._sources[key][3](boss) if stage > 0]
+        ahead = [stage for stage in stages if spawn_ts - stage > now_ts]
+        missed = [stage for stage in stages if spawn_ts - stage <= now_ts]
+        if missed:  # joining late (startup, edit): only the most recent missed stage still goes out
+            ahead.append(min(missed))
+        timers = [self._wheel.add(spawn_ts - stage, (key, source, boss, spawn_ts, period, stage)) for stage in ahead]
+        timers.append(self._wheel.add(spawn_ts, (key, source, boss, spawn_ts, period, 0)))
+        self._alerts.setdefault(key, {}).setdefault((source, boss), {})[spawn_ts % period] = (spawn_ts, period, timers)
+
+    # --- background thread ---
+    def _changed_sources(self) -> set:
+        with self._lock:
+            changed, self._dirty = self._dirty, set()
+            sources = list(self._sources.items())
+        for key, (_, _, stamp, _, _) in sources:
+            value = stamp() if stamp else None
+            if key not in self._stamps or value != self._stamps[key]:
+                self._stamps[key] = value
+                changed.add(key)
+        return changed
+
+    def _refresh(self, keys: set) -> None:
+        """Re-reads these sources and re-queues only spawns that are new or moved."""
+        now_ts = time.time()
+        for key in keys:
+            fresh = {}
+            for source, boss, spawn_dt, period in self._sources[key][0]():
+                spawn_ts = int(spawn_dt.timestamp())
+                # a spawn's phase within its period identifies it across catch-ups
+                fresh.setdefault((source, boss), {})[spawn_ts % period] = (spawn_ts, period)
+
+            with self._lock:
+                queued = self._alerts.setdefault(key, {})
+                for boss_key in [k for k in queued if k not in fresh]:
+                    for entry in queued.pop(boss_key).values():
+                        self._cancel(entry)
+                for (source, boss), phases in fresh.items():
+                    current = queued.get((source, boss), {})
+                    for phase in [p for p in current if p not in phases or current[p][1] != phases[p][1]]:
+                        self._cancel(current.pop(phase))
+                    for phase, (spawn_ts, period) in phases.items():
+                        if phase not in current:
+                            self._queue(key, source, boss, spawn_ts, period, now_ts)
+
+    def _fire_due(self, now_ts: float) -> None:
+        with self._lock:
+            due = self._wheel.advance(now_ts)
+            if not due:
+                return
+
+            # alerts due shortly after, for the same source and stage, go out with these
+            groups = {(timer.payload[0], timer.payload[5]) for timer in due if timer.payload[5] > 0}
+            if groups:
+                window = max(_coalesce_seconds(stage) for _, stage in groups)
+                for timer in self._wheel.pop_until(now_ts + window):
+                    key, stage = timer.payload[0], timer.payload[5]
+                    if (key, stage) in groups and timer.tick <= now_ts + _coalesce_seconds(stage):
+                        due.append(timer)
+                    else:
+                        self._wheel.reinsert(timer)
+
+            batches, reached = {}, {}
+            for timer in due:
+                key, source, boss, spawn_ts, period, stage = timer.payload
+                if key not in self._sources:
+                    continue
+                spawn_dt = datetime.fromtimestamp(spawn_ts, tz=common.MANILA)
+                if stage > 0:
+                    if spawn_ts > now_ts:
+                        batches.setdefault((key, stage), []).append((source, boss, spawn_dt))
+                    continue
+
+                # the spawn itself: "spawning now" if configured, then queue the following spawn
+                if now_ts - spawn_ts <= SPAWNED_GRACE_SECONDS:
+                    reached.setdefault(key, []).append((source, boss, spawn_dt))
+                    if 0 in self._sources[key][3](boss):
+                        batches.setdefault((key, 0), []).append((source, boss, spawn_dt))
+                phases = self._alerts.get(key, {}).get((source, boss), {})
+                entry = phases.get(spawn_ts % period)
+                if entry is not None and entry[0] == spawn_ts:
+                    next_ts = spawn_ts + period * (int(now_ts - spawn_ts) // period + 1)
+                    self._queue(key, source, boss, next_ts, period, now_ts)
+
+            warn = {key: self._sources[key][1] for key, _ in batches}
+            spawned = {key: self._sources[key][4] for key in reached if self._sources[key][4]}
+
+        for key, spawns in reached.items():
+            if key in spawned:
+                try:
+                    spawned[key](spawns)
+                except Exception:
+                    pass
+        for (key, stage), spawns in batches.items():
+            try:
+                with METRICS.timer("spawn_warning_seconds"):
+                    warn[key](spawns, stage)
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                changed = self._changed_sources()
+                if changed:
+                    self._refresh(changed)
+                self._fire_due(time.time())
+            except Exception:
+                pass
+
+            timeout = NOTIFIER_RESCAN_SECONDS
+            with self._lock:
+                next_tick = self._wheel.next_tick()
+            if next_tick is not None:
+                timeout = min(timeout, max(next_tick - time.time(), 0))
+            self._wake.wait(timeout)
+            self._wake.clear()
@@ -0,0 +1,611 @@
+"""
+State backends: where one data directory's field timers, weekly schedule, edit history and
+"warning already sent" claims live.
+
+SQLiteState (the default) keeps them in SQLite databases in WAL mode in the data directory:
+one host, any number of reading processes. RedisState keeps them in a Redis-protocol server
+(Redis, Valkey, KeyDB, or a local stand-in for tests) under one key prefix per tenant, so
+several app replicas behind a load balancer share them. Both have the same methods:
+
+    timers_stamp() / load_timers(default) / update_timer(...) / apply_timer_edits(...) / save_timers(rows)
+    weekly_stamp() / load_weekly(default) / save_weekly(data)
+    history (the HistoryStore API)        warns (the WarnStore API)
+
+A stamp is a revision counter every write bumps, so "has anything changed" is one indexed
+read (or one GET) per rerun. Each backend imports the data directory's older files once,
+the first time it opens an empty store; the files are left in place but no longer read.
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from .common import MANILA, closing_commit, now_manila
+from .dedup import WarnStore
+from .events import EVENT_PRUNE_EVERY_SECONDS, EVENT_RETENTION_SECONDS, EventLog
+from .history import HISTORY_COLUMNS, HistoryStore, _drift_stats, _editor_stats, kill_drift
+from .metrics import METRICS
+from .timers import TimerConflict, _edit_rows, _row_version, _set_last_time_row, default_boss_data, load_boss_data
+from .weekly import load_weekly_data, weekly_boss_data
+
+STATE_FILE = "state.db"
+DATA_FILE = "boss_timers.json"
+WEEKLY_FILE = "weekly_bosses.json"
+HISTORY_FILE = "boss_history.db"
+LEGACY_HISTORY_FILE = "boss_history.json"
+WARN_FILE = "warn_sent.db"
+LEGACY_WARN_FILE = "warn_sent.json"
+REDIS_PREFIX = "bosstimer"
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+MIGRATION_BATCH = 1000  # history rows per Redis round trip when migrating
+MIGRATION_LOCK_SECONDS = 300  # a replica that dies mid-migration holds the lock this long at most
+MIGRATION_POLL_SECONDS = 0.5  # how often the other replicas check whether it is done
+
+_TIMERS = "timers"
+_WEEKLY = "weekly"
+
+
+def _defaults(default, builtin):
+    return list(builtin if default is None else default)
+
+
+def open_state(storage=None, data_dir: Path = Path("."), namespace: str = None):
+    """
+    The state backend for a data directory. storage: None or "sqlite" (SQLiteState), a
+    redis:// / rediss:// / unix:// URL or a redis client made with decode_responses=True
+    (RedisState, keys under "bosstimer:<namespace>:"), or an already open backend.
+    """
+    if storage is None or storage == "sqlite":
+        return SQLiteState(data_dir)
+    prefix = f"{REDIS_PREFIX}:{namespace or 'default'}:"
+    if isinstance(storage, str):
+        if storage.startswith(REDIS_SCHEMES):
+            return RedisState.from_url(storage, prefix, data_dir)
+        raise ValueError(f"Unknown storage: {storage!r} (expected 'sqlite' or a redis:// URL)")
+    if hasattr(storage, "pipeline"):  # a redis client (or a stand-in such as fakeredis)
+        return RedisState(storage, prefix, data_dir)
+    return storage
+
+
+def open_events(storage=None, path: Path = Path("events.db")):
+    """
+    The event log for SSE: EventLog at path for SQLite (storage as for open_state, or an open
+    SQLiteState), else a RedisEventLog on the same server, so every replica's API streams
+    every replica's events. One log serves all tenants (each event names its tenant).
+    """
+    if storage is None or storage == "sqlite" or isinstance(storage, SQLiteState):
+        return EventLog(path)
+    if isinstance(storage, RedisState):
+        return RedisEventLog(storage.redis)
+    if isinstance(storage, str):
+        if storage.startswith(REDIS_SCHEMES):
+            import redis
+
+            return RedisEventLog(redis.Redis.from_url(storage, decode_responses=True))
+        raise ValueError(f"Unknown storage: {storage!r} (expected 'sqlite' or a redis:// URL)")
+    if hasattr(storage, "pipeline"):
+        return RedisEventLog(storage)
+    return EventLog(path)
+
+
+# ------------------- SQLite (default) -------------------
+class SQLiteState:
+    """
+    Timers and the weekly schedule in state.db, next to the history and warn stores' own
+    databases. One row per boss, so a kill is a one-row compare-and-swap UPDATE rather than
+    a rewrite of every boss; WAL mode, so readers never wait for it.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, data_dir: Path):
+        data_dir = Path(data_dir)
+        self.path = data_dir / STATE_FILE
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS timers (
+                    name TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    interval_minutes INTEGER NOT NULL,
+                    last_time TEXT NOT NULL,
+                    version INTEGER NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, body TEXT NOT NULL)")
+            # rev 0 (no row) = never saved: readers get the defaults
+            db.execute("CREATE TABLE IF NOT EXISTS revisions (kind TEXT PRIMARY KEY, rev INTEGER NOT NULL)")
+        self.history = HistoryStore(data_dir / HISTORY_FILE, data_dir / LEGACY_HISTORY_FILE)
+        self.warns = WarnStore(data_dir / WARN_FILE, data_dir / LEGACY_WARN_FILE)
+        self._import_json(data_dir)
+
+    def _connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=10))
+
+    def _reader(self) -> sqlite3.Connection:
+        # stamps are read on every rerun; a connection per thread saves the connect
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10)
+        return db
+
+    @staticmethod
+    def _rev(db: sqlite3.Connection, kind: str) -> int:
+        row = db.execute("SELECT rev FROM revisions WHERE kind = ?", (kind,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _bump(db: sqlite3.Connection, kind: str) -> None:
+        db.execute(
+            "INSERT INTO revisions (kind, rev) VALUES (?, 1) ON CONFLICT (kind) DO UPDATE SET rev = rev + 1", (kind,),
+        )
+        METRICS.inc("state_writes_total", backend="sqlite", kind=kind)
+
+    def _import_json(self, data_dir: Path) -> None:
+        """One-shot import of boss_timers.json / weekly_bosses.json into a store never saved to."""
+        imports = [
+            (kind, path) for kind, path in ((_TIMERS, data_dir / DATA_FILE), (_WEEKLY, data_dir / WEEKLY_FILE))
+            if path.exists() and not self._rev(self._reader(), kind)
+        ]
+        if not imports:
+            return
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")  # two processes opening a fresh directory import once
+            for kind, path in imports:
+                if self._rev(db, kind):
+                    continue
+                if kind == _TIMERS:
+                    self._write_timers(db, load_boss_data(path))
+                else:
+                    self._write_weekly(db, load_weekly_data(path))
+
+    # --- field timers ---
+    def timers_stamp(self) -> int:
+        return self._rev(self._reader(), _TIMERS)
+
+    def _rows(self, db: sqlite3.Connection, default):
+        # the rev is read first: rows newer than it only cost the caller one extra reload
+        if not self._rev(db, _TIMERS):
+            return _defaults(default, default_boss_data)
+        return db.execute("SELECT name, interval_minutes, last_time, version FROM timers ORDER BY position").fetchall()
+
+    def load_timers(self, default=None):
+        """(name, interval_minutes, last_time_str, version) rows, or default before the first save."""
+        METRICS.inc("state_reads_total", backend="sqlite", kind=_TIMERS)
+        return self._rows(self._reader(), default)
+
+    def _write_timers(self, db: sqlite3.Connection, rows) -> None:
+        db.execute("DELETE FROM timers")
+        db.executemany(
+            "INSERT INTO timers (name, position, interval_minutes, last_time, version) VALUES (?, ?, ?, ?, ?)",
+            [(row[0], i, int(row[1]), row[2], _row_version(row)) for i, row in enumerate(rows)],
+        )
+        self._bump(db, _TIMERS)
+
+    def save_timers(self, rows) -> None:
+        """Replaces every row (imports, restores)."""
+        with self._connect() as db:
+            self._write_timers(db, rows)
+
+    def update_timer(self, boss_name: str, expected_version: int, last_time_str: str, default=None):
+        """
+        Compare-and-swap one boss's last spawn (see TimerCache.set_last_time): one row UPDATE.
+        Raises TimerConflict / KeyError. Returns the new row.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            if not self._rev(db, _TIMERS):  # still the defaults: the first save writes them all
+                rows, new_row = _set_last_time_row(_defaults(default, default_boss_data), boss_name,
+                                                   expected_version, last_time_str)
+                self._write_timers(db, rows)
+                return new_row
+            row = db.execute(
+                "SELECT name, interval_minutes, last_time, version FROM timers WHERE name = ?", (boss_name,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(boss_name)
+            if row[3] != expected_version:
+                raise TimerConflict(boss_name, row)
+            db.execute(
+                "UPDATE timers SET last_time = ?, version = ? WHERE name = ?",
+                (last_time_str, expected_version + 1, boss_name),
+            )
+            self._bump(db, _TIMERS)
+        return (boss_name, row[1], last_time_str, expected_version + 1)
+
+    def apply_timer_edits(self, edits, default=None):
+        """Batched compare-and-swap (see TimerCache.apply_edits) in one transaction; returns the changes."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            rows, changes = _edit_rows(self._rows(db, default), edits, self._rev(db, _TIMERS))
+            if changes:
+                self._write_timers(db, rows)
+        return changes
+
+    # --- weekly schedule ---
+    def weekly_stamp(self) -> int:
+        return self._rev(self._reader(), _WEEKLY)
+
+    def load_weekly(self, default=None):
+        METRICS.inc("state_reads_total", backend="sqlite", kind=_WEEKLY)
+        db = self._reader()
+        if not self._rev(db, _WEEKLY):
+            return _defaults(default, weekly_boss_data)
+        return json.loads(db.execute("SELECT body FROM documents WHERE name = ?", (_WEEKLY,)).fetchone()[0])
+
+    def _write_weekly(self, db: sqlite3.Connection, data) -> None:
+        db.execute(
+            "INSERT INTO documents (name, body) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET body = excluded.body",
+            (_WEEKLY, json.dumps(data)),
+        )
+        self._bump(db, _WEEKLY)
+
+    def save_weekly(self, data) -> None:
+        with self._connect() as db:
+            self._write_weekly(db, data)
+
+
+# ------------------- Redis protocol (multi-replica) -------------------
+class RedisWarnStore:
+    """WarnStore over Redis: claim() is one SET NX with the same expiry, so the server prunes."""
+
+    def __init__(self, client, prefix: str):
+        self.redis = client
+        self.prefix = prefix + "warn:"
+
+    def claim(self, key: str) -> bool:
+        ttl = max(1, int(WarnStore._expires_at(key) - time.time()))
+        claimed = bool(self.redis.set(self.prefix + key, 1, nx=True, ex=ttl))
+        METRICS.inc("warn_claims_total", result="claimed" if claimed else "duplicate")
+        return claimed
+
+    def prune(self) -> None:
+        pass  # claims expire on their own
+
+    def _import(self, claims) -> None:
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for key, expires_at in claims:
+            if expires_at > now:
+                pipe.set(self.prefix + key, 1, nx=True, ex=max(1, int(expires_at - now)))
+        pipe.execute()
+
+
+class RedisHistoryStore:
+    """
+    HistoryStore over Redis. Each entry is a field of one hash, indexed by sorted sets (all,
+    per boss, per editor, per boss and editor) scored by edit time, so pages and counts are
+    ZREVRANGE / ZCARD. The drift histogram and editor counters are HINCRBYs in the same
+    MULTI as the entry, so there is nothing to catch up.
+    """
+
+    def __init__(self, client, prefix: str):
+        self.redis = client
+        self.prefix = prefix + "history:"
+
+    def _index(self, boss: str = None, editor: str = None) -> str:
+        if boss and editor:
+            return self.prefix + "by:" + json.dumps([boss, editor])
+        if boss:
+            return self.prefix + "boss:" + boss
+        if editor:
+            return self.prefix + "editor:" + editor
+        return self.prefix + "all"
+
+    def append(self, boss: str, old_time: str, new_time: str, edited_by: str, edited_at: datetime = None,
+               intervals: dict = None) -> None:
+        self.append_many([(boss, old_time, new_time)], edited_by, edited_at, intervals)
+
+    def append_many(self, edits, edited_by: str, edited_at: datetime = None, intervals: dict = None) -> None:
+        edited_at = (edited_at or now_manila()).timestamp()
+        self._append_rows([(boss, old, new, edited_at, edited_by) for boss, old, new in edits], intervals or {})
+
+    def _clear(self) -> None:
+        keys = list(self.redis.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.redis.delete(*keys)
+
+    def _append_rows(self, rows, intervals: dict) -> None:
+        """[(boss, old_time, new_time, edited_at timestamp, edited_by)], oldest first."""
+        if not rows:
+            return
+        last_id = self.redis.incrby(self.prefix + "seq", len(rows))
+        pipe = self.redis.pipeline()
+        for entry_id, (boss, old, new, ts, by) in enumerate(rows, last_id - len(rows) + 1):
+            member = f"{entry_id:012d}"  # equal scores then sort newest id first, as in SQLite
+            pipe.hset(self.prefix + "rows", member, json.dumps([boss, old, new, ts, by]))
+            for index in (self._index(), self._index(boss), self._index(editor=by), self._index(boss, by)):
+                pipe.zadd(index, {member: ts})
+            pipe.sadd(self.prefix + "bosses", boss)
+            pipe.sadd(self.prefix + "editors", by)
+            stats = self.prefix + "editor_stats:" + by
+            pipe.hincrby(stats, "edits", 1)
+            pipe.hsetnx(stats, "first_at", ts)
+            pipe.hset(stats, "last_at", ts)
+            drift = kill_drift(old, new, intervals.get(boss))
+            if drift is not None:
+                pipe.hincrby(self.prefix + "drift:" + boss, drift, 1)
+                pipe.sadd(self.prefix + "drift_bosses", boss)
+                pipe.hincrby(stats, "kills", 1)
+                pipe.hincrby(stats, "drift_sum", drift)
+        pipe.execute()
+
+    def catch_up(self, intervals: dict) -> int:
+        return 0  # rolled up by every append
+
+    def count(self, boss: str = None, editor: str = None) -> int:
+        return self.redis.zcard(self._index(boss, editor))
+
+    def query(self, boss: str = None, editor: str = None, limit: int = 100, offset: int = 0):
+        """Newest first; edited_at comes back as a Manila datetime."""
+        members = self.redis.zrevrange(self._index(boss, editor), offset, offset + limit - 1)
+        if not members:
+            return []
+        return [
+            dict(zip(HISTORY_COLUMNS, (boss, old, new, datetime.fromtimestamp(ts, tz=MANILA), by)))
+            for boss, old, new, ts, by in map(json.loads, self.redis.hmget(self.prefix + "rows", members))
+        ]
+
+    def distinct(self, column: str):
+        if column not in ("boss", "edited_by"):
+            raise ValueError(f"Unknown history column: {column}")
+        return sorted(self.redis.smembers(self.prefix + ("bosses" if column == "boss" else "editors")))
+
+    def drift_stats(self):
+        bosses = sorted(self.redis.smembers(self.prefix + "drift_bosses"))
+        pipe = self.redis.pipeline(transaction=False)
+        for boss in bosses:
+            pipe.hgetall(self.prefix + "drift:" + boss)
+        return _drift_stats({
+            boss: sorted((int(drift), int(kills)) for drift, kills in buckets.items())
+            for boss, buckets in zip(bosses, pipe.execute())
+        })
+
+    def editor_stats(self):
+        editors = sorted(self.redis.smembers(self.prefix + "editors"))
+        pipe = self.redis.pipeline(transaction=False)
+        for by in editors:
+            pipe.hgetall(self.prefix + "editor_stats:" + by)
+        return _editor_stats([
+            (by, int(s["edits"]), int(s.get("kills", 0)), int(s.get("drift_sum", 0)),
+             float(s["first_at"]), float(s["last_at"]))
+            for by, s in zip(editors, pipe.execute())
+        ])
+
+
+class RedisEventLog:
+    """
+    EventLog over Redis. Ids come from one counter and each event is a member of a sorted
+    set scored by its id, assigned and added in the same MULTI, so no reader sees event n+1
+    before event n and resuming is a ZRANGEBYSCORE. Dedup keys are SET NX with the retention.
+    """
+
+    def __init__(self, client, prefix: str = f"{REDIS_PREFIX}:events:"):
+        self.redis = client
+        self.prefix = prefix
+        self._seq = prefix + "seq"
+        self._log = prefix + "log"
+        self._last_prune = 0.0
+
+    def append(self, tenant: str, event_type: str, data: dict, dedup_key: str = None):
+        """Returns the new event id, or None if dedup_key was already logged."""
+        if dedup_key and not self.redis.set(self.prefix + "dedup:" + dedup_key, 1, nx=True,
+                                            ex=EVENT_RETENTION_SECONDS):
+            return None
+        body = json.dumps(data, ensure_ascii=False)
+
+        def add(pipe):
+            event_id = int(pipe.get(self._seq) or 0) + 1
+            pipe.multi()
+            pipe.set(self._seq, event_id)
+            pipe.zadd(self._log, {json.dumps([event_id, time.time(), tenant, event_type, body]): event_id})
+            return event_id
+
+        event_id = self.redis.transaction(add, self._seq, value_from_callable=True)
+        METRICS.inc("events_total", type=event_type)
+        if time.time() - self._last_prune > EVENT_PRUNE_EVERY_SECONDS:
+            self.prune()
+        return event_id
+
+    def since(self, last_id: int, limit: int = 500):
+        """[(id, tenant, type, data_json)] after last_id, oldest first."""
+        members = self.redis.zrangebyscore(self._log, f"({int(last_id)}", "+inf", start=0, num=limit)
+        return [(event_id, tenant, event_type, data)
+                for event_id, _, tenant, event_type, data in map(json.loads, members)]
+
+    def last_id(self) -> int:
+        return int(self.redis.get(self._seq) or 0)
+
+    def prune(self) -> None:
+        self._last_prune = time.time()
+        cutoff = time.time() - EVENT_RETENTION_SECONDS
+        while True:
+            oldest = [json.loads(member) for member in self.redis.zrange(self._log, 0, MIGRATION_BATCH - 1)]
+            expired = [event[0] for event in oldest if event[1] < cutoff]
+            if not expired:
+                return
+            self.redis.zremrangebyscore(self._log, "-inf", max(expired))
+            if len(expired) < len(oldest):
+                return
+
+
+class RedisState:
+    """
+    Timers, weekly schedule, history and warn claims in a Redis-protocol server under prefix,
+    shared by every replica. Timers are one hash (boss -> [position, interval, last spawn,
+    version]) plus a revision counter; a kill WATCHes both and rewrites one field in a MULTI,
+    retried if another write lands first. The weekly schedule is one JSON string.
+
+    client must decode responses to str (redis.Redis(..., decode_responses=True)).
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, prefix: str = f"{REDIS_PREFIX}:default:", data_dir: Path = None):
+        """data_dir: migrated here once (see _migrate), by the first replica to start."""
+        self.redis = client
+        self.prefix = prefix
+        self.history = RedisHistoryStore(client, prefix)
+        self.warns = RedisWarnStore(client, prefix)
+        self._timers = prefix + _TIMERS
+        self._weekly = prefix + _WEEKLY
+        self._revs = {kind: prefix + "rev:" + kind for kind in (_TIMERS, _WEEKLY)}
+        if data_dir is not None:
+            self._migrate(Path(data_dir))
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = f"{REDIS_PREFIX}:default:", data_dir: Path = None) -> "RedisState":
+        import redis  # only a Redis deployment needs the package (requirements-redis.txt)
+
+        return cls(redis.Redis.from_url(url, decode_responses=True), prefix, data_dir)
+
+    def _migrate(self, data_dir: Path) -> None:
+        """
+        Runs _import_local once per prefix. The replica holding the "migrating" lock imports
+        and only then sets "migrated"; the others wait for that flag rather than serve the
+        default timers meanwhile. If the import fails (or its replica dies and the lock
+        expires) the flag stays unset, so the next replica to get the lock starts it over.
+        """
+        done, lock = self.prefix + "migrated", self.prefix + "migrating"
+        token = uuid.uuid4().hex
+        while not self.redis.exists(done):
+            if not self.redis.set(lock, token, nx=True, ex=MIGRATION_LOCK_SECONDS):
+                time.sleep(MIGRATION_POLL_SECONDS)
+                continue
+            try:
+                if not self.redis.exists(done):
+                    self._import_local(data_dir)
+                    self.redis.set(done, int(time.time()))
+            finally:
+                self._release(lock, token)
+
+    def _release(self, lock: str, token: str) -> None:
+        def release(pipe):
+            if pipe.get(lock) == token:  # not if it expired and another replica took it
+                pipe.multi()
+                pipe.delete(lock)
+
+        self.redis.transaction(release, lock)
+
+    def _import_local(self, data_dir: Path) -> None:
+        """
+        Migration of a data directory's state, through SQLiteState (which first imports the
+        JSON files): timers, weekly schedule, history with its rollups, and the warn claims
+        still live. Safe to run again after a failed attempt: the history a partial run
+        wrote is dropped first, and the rest is overwritten.
+        """
+        names = (STATE_FILE, DATA_FILE, WEEKLY_FILE, HISTORY_FILE, LEGACY_HISTORY_FILE, WARN_FILE, LEGACY_WARN_FILE)
+        if not any((data_dir / name).exists() for name in names):
+            return
+        local = SQLiteState(data_dir)
+        self.history._clear()
+        if local.timers_stamp():
+            self.save_timers(local.load_timers())
+        if local.weekly_stamp():
+            self.save_weekly(local.load_weekly())
+        intervals = {row[0]: int(row[1]) for row in self.load_timers()}
+        batch = []
+        for row in local.history.rows():
+            batch.append(row)
+            if len(batch) == MIGRATION_BATCH:
+                self.history._append_rows(batch, intervals)
+                batch = []
+        self.history._append_rows(batch, intervals)
+        self.warns._import(local.warns.active())
+
+    # --- field timers ---
+    def timers_stamp(self) -> int:
+        return int(self.redis.get(self._revs[_TIMERS]) or 0)
+
+    def _rows(self, rev, fields: dict, default):
+        if not int(rev or 0):
+            return _defaults(default, default_boss_data)
+        records = sorted((json.loads(record), name) for name, record in fields.items())
+        return [(name, interval, last_time, version) for (_, interval, last_time, version), name in records]
+
+    def load_timers(self, default=None):
+        METRICS.inc("state_reads_total", backend="redis", kind=_TIMERS)
+        pipe = self.redis.pipeline()
+        pipe.get(self._revs[_TIMERS])
+        pipe.hgetall(self._timers)
+        return self._rows(*pipe.execute(), default)
+
+    def _write_timers(self, pipe, rows) -> None:
+        pipe.delete(self._timers)
+        if rows:
+            pipe.hset(self._timers, mapping={
+                row[0]: json.dumps([i, int(row[1]), row[2], _row_version(row)]) for i, row in enumerate(rows)
+            })
+        pipe.incr(self._revs[_TIMERS])
+
+    def save_timers(self, rows) -> None:
+        pipe = self.redis.pipeline()
+        self._write_timers(pipe, rows)
+        pipe.execute()
+        METRICS.inc("state_writes_total", backend="redis", kind=_TIMERS)
+
+    def update_timer(self, boss_name: str, expected_version: int, last_time_str: str, default=None):
+        """Compare-and-swap one boss's last spawn: one hash field. Raises TimerConflict / KeyError."""
+
+        # the callables below re-run whenever a WATCHed key changes, so writes are counted after the commit
+        def swap(pipe):
+            if not int(pipe.get(self._revs[_TIMERS]) or 0):  # still the defaults
+                rows, new_row = _set_last_time_row(_defaults(default, default_boss_data), boss_name,
+                                                   expected_version, last_time_str)
+                pipe.multi()
+                self._write_timers(pipe, rows)
+                return new_row
+            record = pipe.hget(self._timers, boss_name)
+            if record is None:
+                raise KeyError(boss_name)
+            position, interval, last_time, version = json.loads(record)
+            if version != expected_version:
+                raise TimerConflict(boss_name, (boss_name, interval, last_time, version))
+            pipe.multi()
+            pipe.hset(self._timers, boss_name, json.dumps([position, interval, last_time_str, version + 1]))
+            pipe.incr(self._revs[_TIMERS])
+            return (boss_name, interval, last_time_str, version + 1)
+
+        new_row = self.redis.transaction(swap, self._timers, self._revs[_TIMERS], value_from_callable=True)
+        METRICS.inc("state_writes_total", backend="redis", kind=_TIMERS)
+        return new_row
+
+    def apply_timer_edits(self, edits, default=None):
+        """Batched compare-and-swap (see TimerCache.apply_edits) in one MULTI; returns the changes."""
+
+        def edit(pipe):
+            rev = pipe.get(self._revs[_TIMERS])
+            rows, changes = _edit_rows(self._rows(rev, pipe.hgetall(self._timers), default), edits, int(rev or 0))
+            pipe.multi()
+            if changes:
+                self._write_timers(pipe, rows)
+            return changes
+
+        changes = self.redis.transaction(edit, self._timers, self._revs[_TIMERS], value_from_callable=True)
+        if changes:
+            METRICS.inc("state_writes_total", backend="redis", kind=_TIMERS)
+        return changes
+
+    # --- weekly schedule ---
+    def weekly_stamp(self) -> int:
+        return int(self.redis.get(self._revs[_WEEKLY]) or 0)
+
+    def load_weekly(self, default=None):
+        METRICS.inc("state_reads_total", backend="redis", kind=_WEEKLY)
+        rev, body = self.redis.mget(self._revs[_WEEKLY], self._weekly)
+        if not int(rev or 0):
+            return _defaults(default, weekly_boss_data)
+        return json.loads(body)
+
+    def save_weekly(self, data) -> None:
+        pipe = self.redis.pipeline()
+        pipe.set(self._weekly, json.dumps(data))
+        pipe.incr(self._revs[_WEEKLY])
+        pipe.execute()
+        METRICS.inc("state_writes_total", backend="redis", kind=_WEEKLY)
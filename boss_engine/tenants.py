@@ -0,0 +1,202 @@
+"""
+Several game servers ("tenants") served from one process.
+
+Each tenant gets its own Engine (timers, weekly schedule, history, warning dedup, webhook
+targets) in its own data directory; all of them share one spawn notifier thread and one
+webhook dispatcher/outbox, so adding a server adds data, not threads.
+"""
+from pathlib import Path
+
+from .engine import EVENTS_FILE, OUTBOX_FILE, Engine
+from .metrics import METRICS, TextfileExporter
+from .notifier import SpawnNotifier
+from .storage import open_events
+from .webhooks import WebhookDispatcher, WebhookOutbox
+
+DEFAULT_TENANT = "default"
+DEFAULT_TENANT_TITLE = "Lord9 Santiago 2"
+TENANTS_DIR = "tenants"
+ROW_WIDTH = 7
+
+# Manage page order / InstaKill button rows for the built-in roster
+DEFAULT_MANAGE_ORDER = [
+    "Venatus",
+    "Viorent",
+    "Lady Dalia",
+    "Ego",
+    "Livera",
+    "Araneo",
+    "Undomiel",
+    "General Aquleus",
+    "Amentis",
+    "Baron Braudmore",
+    "Gareth",
+    "Shuliar",
+    "Larba",
+    "Catena",
+    "Titore",
+    "Wanitas",
+    "Metus",
+    "Duplican",
+    "Asta",
+    "Ordo",
+    "Secreta",
+    "Supore",
+]
+
+DEFAULT_ROW_LAYOUT = [
+    ["Venatus", "Viorent", "Lady Dalia", "Ego", "Livera", "Araneo", "Undomiel"],
+    ["General Aquleus", "Amentis", "Baron Braudmore", "Gareth", "Shuliar", "Larba", "Catena"],
+    ["Titore", "Wanitas", "Metus", "Duplican", "Asta", "Ordo", "Secreta", "Supore"],
+]
+
+
+class TenantConfig:
+    """One game server's settings (from the TENANTS secrets table, or the single default)."""
+
+    __slots__ = (
+        "slug", "title", "data_dir", "targets", "admin_password",
+        "manage_order", "row_layout", "default_timers", "default_weekly", "alert_stages",
+    )
+
+    def __init__(
+        self,
+        slug: str,
+        title: str = None,
+        data_dir: str = None,
+        targets=(),
+        admin_password: str = None,
+        manage_order=None,
+        row_layout=None,
+        default_timers=None,
+        default_weekly=None,
+        alert_stages=None,
+    ):
+        self.slug = slug
+        self.title = title or slug
+        self.data_dir = data_dir
+        self.targets = [dict(t) for t in targets]
+        self.admin_password = admin_password
+        self.manage_order = list(manage_order) if manage_order is not None else DEFAULT_MANAGE_ORDER
+        self.row_layout = [list(row) for row in row_layout] if row_layout is not None else DEFAULT_ROW_LAYOUT
+        self.default_timers = default_timers
+        self.default_weekly = default_weekly
+        self.alert_stages = dict(alert_stages) if alert_stages is not None else None
+
+    @classmethod
+    def from_dict(cls, slug: str, d: dict) -> "TenantConfig":
+        """
+        Keys: title, data_dir, discord_targets, admin_password, manage_order, row_layout,
+        timers and weekly (the rows to start from before the first save), and alert_stages
+        ({boss or "*": [minutes before spawn]}; see Engine).
+        """
+        return cls(
+            slug,
+            title=d.get("title"),
+            data_dir=d.get("data_dir"),
+            targets=d.get("discord_targets", ()),
+            admin_password=d.get("admin_password"),
+            manage_order=d.get("manage_order"),
+            row_layout=d.get("row_layout"),
+            default_timers=d.get("timers"),
+            default_weekly=d.get("weekly"),
+            alert_stages=d.get("alert_stages"),
+        )
+
+
+def tenant_configs(secrets: dict, targets=()):
+    """
+    TenantConfigs from the [TENANTS.<slug>] tables of the app's secrets, or else the single
+    DEFAULT_TENANT with these targets (and the top-level ALERT_STAGES).
+    """
+    return [
+        TenantConfig.from_dict(slug, dict(cfg)) for slug, cfg in dict(secrets.get("TENANTS", {})).items()
+    ] or [
+        TenantConfig(
+            DEFAULT_TENANT, title=DEFAULT_TENANT_TITLE, targets=targets,
+            alert_stages=secrets.get("ALERT_STAGES"),
+        )
+    ]
+
+
+def manage_order(names, order):
+    """names sorted by the tenant's manage order; bosses it does not list go last, as they are."""
+    order_index = {name: i for i, name in enumerate(order)}
+    return sorted(names, key=lambda name: order_index.get(name, len(order_index)))
+
+
+def row_layout(names, layout, width: int = ROW_WIDTH):
+    """
+    The tenant's button rows restricted to existing bosses, plus rows of `width` for any
+    boss the layout does not place (e.g. one added after the layout was written).
+    """
+    existing = set(names)
+    rows = [[name for name in row if name in existing] for row in layout]
+    placed = {name for row in rows for name in row}
+    rest = [name for name in names if name not in placed]
+    rows.extend(rest[i:i + width] for i in range(0, len(rest), width))
+    return [row for row in rows if row]
+
+
+class TenantHub:
+    """
+    One Engine per tenant plus the workers they share. Engines are looked up by slug.
+
+    The implicit single tenant (DEFAULT_TENANT) keeps using the root data directory and
+    un-prefixed keys, so an existing single-server deployment keeps its data (its JSON
+    files are imported into the state backend once).
+    """
+
+    def __init__(self, configs, root: Path = Path("."), metrics_file: Path = None, storage=None):
+        """storage: every tenant's state backend (see open_state; a Redis URL keys each tenant apart)."""
+        self.root = Path(root)
+        self.configs = {cfg.slug: cfg for cfg in configs}
+        self.dispatcher = WebhookDispatcher(WebhookOutbox(self.root / OUTBOX_FILE))
+        self.notifier = SpawnNotifier()
+        self.events = open_events(storage, self.root / EVENTS_FILE)
+        self.exporter = TextfileExporter(METRICS, metrics_file) if metrics_file else None
+        self.engines = {}
+        for cfg in self.configs.values():
+            data_dir = self.data_dir(cfg)
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self.engines[cfg.slug] = Engine(
+                data_dir,
+                cfg.targets,
+                tenant=None if cfg.slug == DEFAULT_TENANT else cfg.slug,
+                dispatcher=self.dispatcher,
+                notifier=self.notifier,
+                default_timers=cfg.default_timers,
+                default_weekly=cfg.default_weekly,
+                alert_stages=cfg.alert_stages,
+                events=self.events,
+                storage=storage,
+            )
+
+    def data_dir(self, cfg: TenantConfig) -> Path:
+        if cfg.data_dir:
+            return self.root / cfg.data_dir
+        if cfg.slug == DEFAULT_TENANT:
+            return self.root
+        return self.root / TENANTS_DIR / cfg.slug
+
+    def __getitem__(self, slug: str) -> Engine:
+        return self.engines[slug]
+
+    def __len__(self):
+        return len(self.engines)
+
+    def slugs(self):
+        return list(self.engines)
+
+    def start(self) -> "TenantHub":
+        self.dispatcher.start()
+        self.notifier.start()
+        if self.exporter:
+            self.exporter.start()
+        return self
+
+    def stop(self) -> None:
+        self.notifier.stop()
+        self.dispatcher.stop()
+        if self.exporter:
+            self.exporter.stop()
@@ -0,0 +1,316 @@
+"""
+Field boss timers: row edits with per-boss compare-and-swap, the reader of the original
+boss_timers.json (for the storage import), the array-backed TimerStore and the
+process-wide TimerSnapshot cache over a storage backend.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import math
+import threading
+
+import numpy as np
+
+from .common import MANILA, TIME_FMT, now_manila, parse_time_str
+from .metrics import METRICS
+
+default_boss_data = [
+    ("Venatus", 600, "2026-08-04 04:35 AM"),
+    ("Viorent", 600, "2026-08-04 04:35 AM"),
+    ("Lady Dalia", 1080, "2026-08-04 12:54 AM"),
+    ("Ego", 1260, "2026-08-04 06:35 AM"),
+    ("Livera", 1440, "2026-08-03 12:37 PM"),
+    ("Araneo", 1440, "2026-08-03 12:40 PM"),
+    ("Undomiel", 1440, "2026-08-03 12:42 PM"),
+    ("General Aquleus", 1740, "2026-08-03 05:51 PM"),
+    ("Amentis", 1740, "2026-08-03 05:55 PM"),
+    ("Baron Braudmore", 1920, "2026-08-03 08:38 PM"),
+    ("Gareth", 1920, "2026-08-03 08:44 PM"),
+    ("Catena", 2100, "2026-08-03 11:36 PM"),
+    ("Larba", 2100, "2026-08-03 11:40 PM"),
+    ("Shuliar", 2100, "2026-08-03 11:43 PM"),
+    ("Titore", 2220, "2026-08-04 01:49 AM"),
+    ("Wanitas", 2880, "2026-08-02 12:45 PM"),
+    ("Metus", 2880, "2026-08-02 12:46 PM"),
+    ("Duplican", 2880, "2026-08-02 12:48 PM"),
+    ("Asta", 3720, "2026-08-02 12:39 PM"),
+    ("Ordo", 3720, "2026-08-02 12:41 PM"),
+    ("Secreta", 3720, "2026-08-02 12:43 PM"),
+    ("Supore", 3720, "2026-08-02 12:44 PM"),
+]
+
+
+# ------------------- JSON Import -------------------
+def load_boss_data(path: Path, default=None):
+    """
+    The rows saved in an old boss_timers.json, or a copy of default (default_boss_data if
+    None) if there is none. Only the storage backends' one-shot import reads the file.
+    """
+    default = default_boss_data if default is None else default
+    if path.exists():
+        METRICS.inc("json_reads_total", file=path.name)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else list(default)
+    return list(default)
+
+
+class TimerConflict(Exception):
+    """The boss record changed (another admin's save) since the caller read it."""
+
+    def __init__(self, boss_name: str, current_row):
+        super().__init__(f"{boss_name} was changed by someone else")
+        self.boss_name = boss_name
+        self.current_row = current_row
+
+
+def _row_version(row) -> int:
+    return int(row[3]) if len(row) > 3 else 0
+
+
+def _set_last_time_row(rows, boss_name: str, expected_version: int, last_time_str: str):
+    """
+    (rows with boss_name's last spawn replaced, the new row). Raises TimerConflict if that
+    row's version is no longer expected_version, KeyError if there is no such boss.
+    """
+    for i, row in enumerate(rows):
+        if row[0] != boss_name:
+            continue
+        if _row_version(row) != expected_version:
+            raise TimerConflict(boss_name, row)
+        rows = list(rows)
+        rows[i] = new_row = (row[0], row[1], last_time_str, expected_version + 1)
+        return rows, new_row
+    raise KeyError(boss_name)
+
+
+def _edit_rows(rows, edits, revision: int = 0):
+    """
+    (rows after the edits, [(old_row, new_row)] that changed); see TimerCache.apply_edits.
+    revision: the store's timers revision, which every write bumps. A row's version only
+    grows with those writes, so a new row starting above it and above every current version
+    never repeats a version a removed boss of the same name had (no ABA for stale forms).
+    """
+    rows = list(rows)
+    index = {row[0]: i for i, row in enumerate(rows)}
+    changes, removed, added = [], set(), []
+    new_version = max([revision, *map(_row_version, rows)]) + 1
+    for boss_name, expected_version, new_row in edits:
+        if boss_name is None:
+            added.append((*new_row, new_version))
+            changes.append((None, added[-1]))
+            continue
+        if boss_name not in index:
+            raise TimerConflict(boss_name, None)
+        i = index[boss_name]
+        row = rows[i]
+        if _row_version(row) != expected_version:
+            raise TimerConflict(boss_name, row)
+        if new_row is None:
+            removed.add(i)
+            changes.append((row, None))
+        elif tuple(new_row) != tuple(row[:3]):
+            rows[i] = (*new_row, expected_version + 1)
+            changes.append((row, rows[i]))
+    rows = [row for i, row in enumerate(rows) if i not in removed] + added
+    validate_boss_rows(rows)
+    return rows, changes
+
+
+def validate_boss_rows(rows) -> None:
+    """Raises ValueError unless every row has a unique name, a positive interval and a valid last spawn."""
+    seen = set()
+    for row in rows:
+        name = row[0]
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Every boss needs a name")
+        if name in seen:
+            raise ValueError(f"Duplicate boss name: {name!r}")
+        seen.add(name)
+        if isinstance(row[1], bool) or not isinstance(row[1], int) or row[1] <= 0:
+            raise ValueError(f"Invalid interval for {name}: {row[1]!r} (expected whole minutes > 0)")
+        parse_time_str(row[2])
+
+
+def catch_up_steps(next_ts, now_ts, interval):
+    """
+    Whole intervals to add to next_ts so it is no longer before now_ts (0 if it is not):
+    ceil((now - next) / interval) by floor division, on ints or arrays alike.
+    """
+    return np.maximum(0, -((next_ts - now_ts) // interval))
+
+
+def next_spawn_after(last_time: datetime, interval_minutes: int, now: datetime = None) -> datetime:
+    """The spawn after last_time caught up to now, exactly as TimerStore.update_next() does it."""
+    interval = int(interval_minutes) * 60
+    next_ts = int(last_time.timestamp()) + interval
+    next_ts += int(catch_up_steps(next_ts, math.ceil((now or now_manila()).timestamp()), interval)) * interval
+    return datetime.fromtimestamp(next_ts, tz=MANILA)
+
+
+# ------------------- Timer Store -------------------
+class TimerStore:
+    """
+    All field timers as parallel int64 arrays (epoch seconds), so catching every timer up
+    to "now" is one vectorized floor-division and sort order is one argsort.
+    Iterating / indexing yields read-only TimerEntry views over a row.
+
+    A store inside a TimerSnapshot is shared by every session, the API and the notifier, so
+    update_next() is the one mutation allowed on it: it runs under the store's lock, only
+    moves overdue timers forward by whole intervals and never back, so it does not matter
+    which caller catches up first or with which "now". Anything else (an edit) goes through
+    TimerCache and yields a new snapshot.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.names = [row[0] for row in rows]
+        self.interval = np.array([int(row[1]) * 60 for row in rows], dtype=np.int64)
+        self.last = np.array([int(parse_time_str(row[2]).timestamp()) for row in rows], dtype=np.int64)
+        self.saved_last = self.last.copy()  # as saved, before any catch-up
+        self.next = self.last + self.interval
+        self.versions = [_row_version(row) for row in rows]
+        self._entries = [TimerEntry(self, i) for i in range(len(rows))]
+        self._lock = threading.Lock()  # a shared store is caught up from many sessions at once
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __getitem__(self, i):
+        return self._entries[i]
+
+    def update_next(self, now: datetime = None, idx=None):
+        """Advance every overdue timer (or just row idx) by whole intervals until next_time >= now."""
+        now_ts = math.ceil((now or now_manila()).timestamp())
+        sl = slice(None) if idx is None else slice(idx, idx + 1)
+        interval = self.interval[sl]
+        with self._lock:
+            steps = catch_up_steps(self.next[sl], now_ts, interval)
+            moved = steps > 0
+            self.next[sl] += steps * interval
+            self.last[sl] = np.where(moved, self.next[sl] - interval, self.last[sl])
+
+    def order(self):
+        """Row indices sorted by next spawn."""
+        return np.argsort(self.next, kind="stable")
+
+    def sorted_entries(self):
+        return [self._entries[i] for i in self.order()]
+
+
+class TimerEntry:
+    """Thin view over one TimerStore row; keeps the old attribute API."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store: TimerStore, index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self.index]
+
+    @property
+    def version(self) -> int:
+        """Bumped on every save of this boss; the expected version for TimerCache.set_last_time()."""
+        return self._store.versions[self.index]
+
+    @property
+    def interval_seconds(self) -> int:
+        return int(self._store.interval[self.index])
+
+    @property
+    def interval_minutes(self) -> int:
+        return self.interval_seconds // 60
+
+    @property
+    def last_time(self) -> datetime:
+        return datetime.fromtimestamp(int(self._store.last[self.index]), tz=MANILA)
+
+    @property
+    def next_time(self) -> datetime:
+        return datetime.fromtimestamp(int(self._store.next[self.index]), tz=MANILA)
+
+    def update_next(self):
+        self._store.update_next(idx=self.index)
+
+    def countdown(self) -> timedelta:
+        return self.next_time - now_manila()
+
+
+# ------------------- Shared Timer Snapshot -------------------
+class TimerSnapshot:
+    """
+    One load of the field timers, shared by every session in the process: read-only apart
+    from catching its timers up with update_next() (see TimerStore).
+    """
+
+    __slots__ = ("version", "stamp", "timers")
+
+    def __init__(self, version: int, stamp, timers: TimerStore):
+        self.version = version
+        self.stamp = stamp
+        self.timers = timers
+
+
+class TimerCache:
+    """
+    Holds the current TimerSnapshot. A new snapshot (with the next version number) is built
+    when the state backend's timers stamp changes (any process's write) or the write path
+    calls invalidate(), so every session sees an admin's edit on its next rerun.
+    """
+
+    def __init__(self, state, default=None):
+        self.state = state  # a storage backend (SQLiteState / RedisState)
+        self.default = default  # rows used until the first save (default_boss_data if None)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+
+    def get(self) -> TimerSnapshot:
+        stamp = self.state.timers_stamp()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.stamp == stamp:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.stamp != stamp:
+                self._version += 1
+                snapshot = TimerSnapshot(self._version, stamp, TimerStore(self.state.load_timers(self.default)))
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def set_last_time(self, boss_name: str, last_time: datetime, expected_version: int):
+        """
+        Compare-and-swap one boss's last spawn and publish a new snapshot. Raises TimerConflict
+        if the row's version is no longer expected_version (another admin saved it), KeyError
+        if there is no such boss. Returns the new row (name, interval, last_time_str, version).
+        """
+        row = self.state.update_timer(boss_name, expected_version, last_time.strftime(TIME_FMT), self.default)
+        self.invalidate()
+        return row
+
+    def apply_edits(self, edits):
+        """
+        Compare-and-swap many boss rows in one storage write, and a new snapshot if anything changed.
+
+        edits: [(boss_name, expected_version, new_row)], where boss_name is None for a new boss
+        and new_row is (name, interval_minutes, last_time_str), or None to remove the boss; a
+        different name in new_row renames it (a new or re-added boss starts at a version no
+        earlier boss of that name had). All or nothing: raises TimerConflict if any edited
+        row changed (or was removed) since expected_version, ValueError if the result would be
+        invalid (e.g. two bosses with one name). Returns [(old_row, new_row)] for what changed (None = absent).
+        """
+        changes = self.state.apply_timer_edits(edits, self.default)
+        if changes:
+            self.invalidate()
+        return changes
@@ -0,0 +1,492 @@
+"""
+Durable Discord webhook delivery: SQLite outbox, per-webhook rate limiting and a
+background dispatcher with retry/backoff.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from .common import closing_commit
+from .metrics import METRICS
+
+# webhook outbox tuning
+WEBHOOK_MAX_ATTEMPTS = 8
+WEBHOOK_BACKOFF_BASE = 2.0  # seconds; doubles per failed attempt
+WEBHOOK_BACKOFF_MAX = 300.0
+WEBHOOK_RATE_PER_SECOND = 2.5  # Discord allows ~5 requests / 2 s per webhook
+WEBHOOK_BURST = 5
+OUTBOX_RETENTION_SECONDS = 7 * 86400
+
+# per-webhook circuit breaker
+BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures before a webhook is considered down
+BREAKER_COOLDOWN_SECONDS = 30.0  # first wait before a probe; doubles per failed probe
+BREAKER_COOLDOWN_MAX = 600.0
+BREAKER_PROBE_WAIT = 1.0  # other rows for a webhook wait this long while its probe is in flight
+
+
+def _post_webhook(webhook_url: str, payload: dict, session=None):
+    """
+    One delivery attempt.
+    Returns (status_code, retry_after_seconds, headers); status_code is None on network errors.
+    """
+    import requests  # imported on first send, not at startup
+
+    http = session or requests
+    start = time.perf_counter()
+    try:
+        r = http.post(webhook_url, json=payload, timeout=10)
+    except Exception:
+        METRICS.inc("webhook_requests_total", status="error")
+        return None, None, {}
+    finally:
+        METRICS.observe("webhook_request_seconds", time.perf_counter() - start)
+    METRICS.inc("webhook_requests_total", status=r.status_code)
+
+    retry_after = None
+    if r.status_code == 429:
+        # Discord rate limit
+        try:
+            retry_after = float(r.json().get("retry_after", 1.0))
+        except Exception:
+            retry_after = float(r.headers.get("Retry-After", 1.0))
+    return r.status_code, retry_after, r.headers
+
+
+class TokenBucket:
+    """Paces sends to one webhook so bursts stay under Discord's limit instead of hitting 429."""
+
+    def __init__(self, rate: float = WEBHOOK_RATE_PER_SECOND, burst: int = WEBHOOK_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns how many seconds to wait for one."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def observe(self, headers, retry_after=None) -> None:
+        """Honor Discord's X-RateLimit-* headers / retry_after from the last response."""
+        pause = retry_after or 0.0
+        try:
+            if headers.get("X-RateLimit-Remaining") == "0":
+                pause = max(pause, float(headers.get("X-RateLimit-Reset-After", 0)))
+        except (TypeError, ValueError):
+            pass
+        if pause:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+
+class CircuitBreaker:
+    """
+    Health of one webhook. After BREAKER_FAILURE_THRESHOLD consecutive failures (network
+    error, 5xx, or 401/403/404 for a revoked webhook; a 429 proves it is alive) the circuit opens and nothing is sent
+    until a cooldown passes; then one probe is let through (half-open). A success closes the
+    circuit, a failed probe re-opens it with twice the cooldown.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.last_ok = None  # wall-clock time of the last success
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_failure(status) -> bool:
+        return status is None or status >= 500 or status in (401, 403, 404)
+
+    def allow(self) -> float:
+        """0 if a request may go out now (possibly as the probe), else seconds to hold off."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now < self._open_until:
+                    return self._open_until - now
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return BREAKER_PROBE_WAIT
+            self._probing = True
+            return 0.0
+
+    def release(self) -> None:
+        """Gives back a probe allow() granted but the caller did not send after all."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def is_open(self) -> bool:
+        """True while sends to this webhook are being held back."""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() < self._open_until
+
+    def record(self, status) -> None:
+        with self._lock:
+            if not self.is_failure(status):
+                self.state, self.failures, self._cooldown = self.CLOSED, 0, self.base_cooldown
+                self.last_ok = time.time()
+                self._probing = False
+                return
+            self.failures += 1
+            self.last_error = f"HTTP {status}" if status else "network error"
+            if self.state == self.HALF_OPEN:
+                self._cooldown = min(self._cooldown * 2, BREAKER_COOLDOWN_MAX)
+            elif self.failures < self.threshold:
+                return
+            self.state = self.OPEN
+            self._open_until = time.monotonic() + self._cooldown
+            self._probing = False
+        METRICS.inc("webhook_circuit_opened_total")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            retry_in = max(self._open_until - time.monotonic(), 0.0) if self.state == self.OPEN else 0.0
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "last_ok": self.last_ok,
+                "retry_in": retry_in,
+            }
+
+
+class WebhookOutbox:
+    """
+    Durable queue of webhook posts (SQLite), keyed by an idempotency key so the same
+    notification is never enqueued twice. Rows stay "pending" until a 2xx marks them
+    "delivered"; permanent errors, exhausted retries and stale rows end as "failed"/"expired".
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    key TEXT PRIMARY KEY,
+                    target TEXT NOT NULL,
+                    webhook TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,
+                    expires_at REAL,
+                    created_at REAL NOT NULL,
+                    last_error TEXT
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+
+    def _connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=10))
+
+    def enqueue(self, key: str, target: str, webhook: str, payload: dict, expires_at: float = None) -> bool:
+        """Returns False if this key was already enqueued."""
+        now = time.time()
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO outbox (key, target, webhook, payload, next_attempt, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, target, webhook, json.dumps(payload), now, expires_at, now),
+            )
+            return cur.rowcount == 1
+
+    def due(self, limit: int = 50):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT key, webhook, payload, attempts, expires_at FROM outbox "
+                "WHERE status = 'pending' AND next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+
+    def next_due_in(self, skip=()) -> float:
+        """Seconds until the next pending row other than skip (e.g. those in flight) is due, or None."""
+        skip = set(skip)
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT key, next_attempt FROM outbox WHERE status = 'pending' ORDER BY next_attempt LIMIT ?",
+                (len(skip) + 1,),
+            ).fetchall()
+        for key, next_attempt in rows:
+            if key not in skip:
+                return max(next_attempt - time.time(), 0.0)
+        return None
+
+    def mark(self, key: str, status: str, attempts: int, next_attempt: float = 0.0, error: str = None) -> None:
+        with self._connect() as db:
+            db.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE key = ?",
+                (status, attempts, next_attempt, error, key),
+            )
+
+    def statuses(self, keys) -> dict:
+        keys = list(keys)
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT key, status FROM outbox WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self) -> None:
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM outbox WHERE status != 'pending' AND created_at < ?",
+                (time.time() - OUTBOX_RETENTION_SECONDS,),
+            )
+
+
+class DispatchHandle:
+    """Outbox keys for one fan-out; lets the UI show delivery progress without waiting."""
+
+    def __init__(self, outbox: WebhookOutbox, keys: dict, held=()):
+        self.outbox = outbox
+        self.keys = keys  # {target_name: outbox key}
+        self.held = set(held)  # targets whose circuit was open: queued, but not expected soon
+
+    def results(self) -> dict:
+        """
+        {target_name: True (delivered) / False (failed, or held by an open circuit)},
+        or None while still pending.
+        """
+        statuses = self.outbox.statuses(self.keys.values()) if self.keys else {}
+        results = {}
+        for name, key in self.keys.items():
+            status = statuses.get(key, "pending")
+            if status == "pending":
+                results[name] = False if name in self.held else None
+            else:
+                results[name] = status == "delivered"
+        return results
+
+    def done(self) -> bool:
+        return None not in self.results().values()
+
+    def wait(self, timeout: float = None) -> dict:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done() and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.1)
+        return self.results()
+
+    def summary(self) -> str:
+        results = self.results()
+        sent = sum(1 for ok in results.values() if ok)
+        held = f", {len(self.held)} held (target down)" if self.held else ""
+        if None in results.values():
+            return f"📨 Discord: sending… ({sent}/{len(results)} sent{held})"
+        return f"📨 Discord: {sent}/{len(results)} sent{held}"
+
+
+class WebhookDispatcher:
+    """
+    Delivers the webhook outbox in the background so the Streamlit script never blocks on Discord.
+
+    A worker thread picks due outbox rows, paces them through a token bucket per webhook and
+    posts them from a small thread pool (one keep-alive requests.Session per webhook host).
+    Failures are retried with exponential backoff, honoring retry_after on 429.
+    Each webhook has a CircuitBreaker: while a target is down its rows wait in the outbox
+    for the next probe instead of tying up workers on timeouts.
+    Pending rows left over from a previous process are picked up on start.
+    """
+
+    def __init__(self, outbox: WebhookOutbox, targets=(), max_workers: int = 8):
+        self.outbox = outbox
+        self.targets = list(targets)  # default fan-out for broadcast()
+        self._max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webhook")
+        self._sessions = {}
+        self._buckets = {}
+        self._breakers = {}
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="webhook-outbox", daemon=True)
+
+    def start(self) -> "WebhookDispatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops picking up rows; anything still pending stays in the outbox for the next start."""
+        self._stop.set()
+        self._wake.set()
+        self._pool.shutdown(wait=False)
+
+    def _session_for(self, webhook_url: str):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        host = urlsplit(webhook_url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._max_workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def _bucket_for(self, webhook_url: str) -> TokenBucket:
+        with self._lock:
+            return self._buckets.setdefault(webhook_url, TokenBucket())
+
+    def _breaker_for(self, webhook_url: str) -> CircuitBreaker:
+        with self._lock:
+            return self._breakers.setdefault(webhook_url, CircuitBreaker())
+
+    def health(self, targets=None):
+        """[{name, state, failures, last_error, last_ok, retry_in}] per target, for the admin UI."""
+        rows = []
+        for target in (self.targets if targets is None else targets):
+            webhook_url = target.get("webhook", "")
+            if not webhook_url or "discord.com/api/webhooks/" not in webhook_url:
+                info = {"state": "invalid", "failures": 0, "last_error": "invalid webhook url",
+                        "last_ok": None, "retry_in": 0.0}
+            else:
+                info = self._breaker_for(webhook_url).snapshot()
+            rows.append({"name": target.get("name", "unknown"), **info})
+        return rows
+
+    def broadcast(self, message_builder, targets=None, key: str = None, expires_at: datetime = None) -> DispatchHandle:
+        """
+        message_builder: function(target_dict) -> message_str
+        key: idempotency key for this notification (one outbox row per "key|target_name").
+        expires_at: give up on undelivered rows after this time (e.g. the spawn a warning is for).
+        Returns immediately; the handle tracks each target's delivery (a target whose circuit
+        is open resolves to False right away, though its row still goes out if it recovers).
+        """
+        key = key or uuid.uuid4().hex
+        expires_ts = expires_at.timestamp() if expires_at else None
+        keys, held = {}, []
+        for target in (self.targets if targets is None else targets):
+            target_name = target.get("name", "unknown")
+            webhook_url = target.get("webhook", "")
+            row_key = f"{key}|{target_name}"
+            self.outbox.enqueue(
+                row_key, target_name, webhook_url,
+                {"content": message_builder(target)}, expires_ts,
+            )
+            keys[target_name] = row_key
+            if webhook_url and self._breaker_for(webhook_url).is_open():
+                held.append(target_name)
+        self._wake.set()
+        return DispatchHandle(self.outbox, keys, held)
+
+    def _deliver(self, key: str, webhook_url: str, payload: dict, attempts: int) -> None:
+        try:
+            status, retry_after, headers = _post_webhook(webhook_url, payload, self._session_for(webhook_url))
+            self._bucket_for(webhook_url).observe(headers, retry_after)
+            self._breaker_for(webhook_url).record(status)
+            attempts += 1
+
+            if status is not None and 200 <= status < 300:
+                self.outbox.mark(key, "delivered", attempts)
+            elif status is not None and 400 <= status < 500 and status != 429:
+                # bad payload / deleted webhook: retrying will not help
+                self.outbox.mark(key, "failed", attempts, error=f"HTTP {status}")
+            elif attempts >= WEBHOOK_MAX_ATTEMPTS:
+                self.outbox.mark(key, "failed", attempts, error=f"HTTP {status}" if status else "network error")
+            else:
+                backoff = min(WEBHOOK_BACKOFF_BASE * 2 ** (attempts - 1), WEBHOOK_BACKOFF_MAX)
+                delay = retry_after if retry_after is not None else backoff * random.uniform(0.8, 1.2)
+                self.outbox.mark(key, "pending", attempts, time.time() + delay,
+                                 error=f"HTTP {status}" if status else "network error")
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+            self._wake.set()
+
+    def _dispatch_due(self) -> float:
+        """
+        Starts every due row its webhook's breaker lets through and that has a rate token;
+        returns seconds until worth checking again. The breaker is asked first so rows held
+        by an open circuit do not use up tokens the probe and the rows after it need.
+        """
+        wait = None
+        now = time.time()
+        for key, webhook_url, payload, attempts, expires_at in self.outbox.due():
+            with self._lock:
+                if key in self._inflight:
+                    continue
+
+            if not webhook_url or "discord.com/api/webhooks/" not in webhook_url:
+                self.outbox.mark(key, "failed", attempts, error="invalid webhook url")
+                continue
+            if expires_at is not None and now >= expires_at:
+                self.outbox.mark(key, "expired", attempts)
+                continue
+
+            breaker = self._breaker_for(webhook_url)
+            hold = breaker.allow()
+            if hold:
+                # target is down: park the row until the next probe so it does not crowd due()
+                self.outbox.mark(key, "pending", attempts, now + hold, error="circuit open")
+                continue
+
+            delay = self._bucket_for(webhook_url).try_acquire()
+            if delay:
+                breaker.release()  # if this row was to be the probe, the next one may be
+                wait = delay if wait is None else min(wait, delay)
+                continue
+
+            with self._lock:
+                self._inflight.add(key)
+            self._pool.submit(self._deliver, key, webhook_url, json.loads(payload), attempts)
+        return wait
+
+    def _run(self) -> None:
+        self.outbox.prune()
+        last_prune = time.monotonic()
+        while not self._stop.is_set():
+            timeout = 5.0
+            try:
+                bucket_wait = self._dispatch_due()
+                with self._lock:
+                    inflight = set(self._inflight)
+                # rows being posted are still pending and due; waiting on them would spin until they finish
+                due_in = self.outbox.next_due_in(inflight)
+                for candidate in (bucket_wait, due_in):
+                    if candidate is not None:
+                        timeout = min(timeout, candidate)
+
+                if time.monotonic() - last_prune > 3600:
+                    self.outbox.prune()
+                    last_prune = time.monotonic()
+            except Exception as exc:
+                # keep delivering; a failing outbox (disk full, locked database) shows up here
+                METRICS.inc("webhook_dispatcher_errors_total", error=type(exc).__name__)
+
+            self._wake.wait(max(timeout, 0.05))
+            self._wake.clear()
@@ -0,0 +1,165 @@
+"""
+Weekly bosses: the fixed day/time schedule and its compiled, bisect-searchable form.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import bisect
+import json
+import threading
+
+from .common import MANILA
+from .metrics import METRICS
+
+weekly_boss_data = [
+    ("Clemantis", ["Monday 11:30", "Thursday 19:00"]),
+    ("Saphirus", ["Sunday 17:00", "Tuesday 11:30"]),
+    ("Neutro", ["Tuesday 19:00", "Thursday 11:30"]),
+    ("Thymele", ["Monday 19:00", "Wednesday 11:30"]),
+    ("Milavy", ["Saturday 15:00"]),
+    ("Ringor", ["Saturday 17:00"]),
+    ("Roderick", ["Friday 19:00"]),
+    ("Auraq", ["Friday 22:00", "Wednesday 21:00"]),
+    ("Chaiflock", ["Sunday 15:00"]),
+    ("Benji", ["Sunday 21:00"]),
+    ("Libitina", ["Monday 21:00", "Saturday 21:00"]),
+    ("Rakajeth", ["Tuesday 22:00", "Sunday 19:00"]),
+    ("Camalia", ["Thursday 21:00"]),
+    ("Tumier", ["Sunday 19:00"]),
+    ("Icaruthia (Kransia)", ["Tuesday 21:00", "Friday 21:00"]),
+    ("Motti (Kransia)", ["Wednesday 19:00", "Saturday 19:00"]),
+    ("Nevaeh (Kransia)", ["Sunday 22:00"]),
+]
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WEEKDAY_INDEX = {day.lower(): i for i, day in enumerate(WEEKDAYS)}
+WEEK_SECONDS = 7 * 86400
+
+
+def parse_weekly_slot(day_time: str) -> int:
+    """
+    "Monday 11:30" -> seconds since Monday 00:00 (Manila). Raises ValueError on bad input.
+    """
+    parts = day_time.split()
+    if len(parts) != 2 or parts[0].lower() not in WEEKDAY_INDEX:
+        raise ValueError(f"Invalid weekly schedule: {day_time!r} (expected e.g. 'Monday 11:30')")
+    t = datetime.strptime(parts[1], "%H:%M")
+    return WEEKDAY_INDEX[parts[0].lower()] * 86400 + t.hour * 3600 + t.minute * 60
+
+
+class WeeklySchedule:
+    """
+    weekly_boss_data compiled once into a sorted array of offsets within the week,
+    so "next spawn" / "spawns in the next N seconds" are a bisect instead of a re-parse.
+    """
+
+    def __init__(self, data):
+        slots = sorted(
+            (parse_weekly_slot(sched), boss)
+            for boss, times in data
+            for sched in times
+        )
+        self.offsets = [off for off, _ in slots]
+        self.bosses = [boss for _, boss in slots]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @staticmethod
+    def week_start(now: datetime) -> datetime:
+        """Monday 00:00 (Manila) of now's week."""
+        return datetime.combine(
+            (now - timedelta(days=now.weekday())).date(), datetime.min.time()
+        ).replace(tzinfo=MANILA)
+
+    def upcoming(self, now: datetime):
+        """All weekly spawns as (boss_name, spawn_dt), soonest first, each strictly after now."""
+        week_start = self.week_start(now)
+        now_off = (now - week_start).total_seconds()
+
+        i = bisect.bisect_right(self.offsets, now_off)
+        n = len(self.offsets)
+        for k in range(n):
+            j = (i + k) % n
+            wrap = WEEK_SECONDS if i + k >= n else 0
+            yield self.bosses[j], week_start + timedelta(seconds=self.offsets[j] + wrap)
+
+    def next_spawn(self, now: datetime):
+        """(boss_name, spawn_dt) of the next weekly spawn, or None if the schedule is empty."""
+        return next(self.upcoming(now), None)
+
+    def occurrences(self, start: datetime, end_ts: float):
+        """
+        Lazily yields (spawn_ts, boss_name) for every spawn in (start, end_ts], soonest first,
+        walking the compiled offsets week after week.
+        """
+        if not self.offsets:
+            return
+        start_ts = start.timestamp()
+        base = self.week_start(start).timestamp()
+        i = bisect.bisect_right(self.offsets, start_ts - base)
+        while True:
+            for j in range(i, len(self.offsets)):
+                spawn_ts = base + self.offsets[j]
+                if spawn_ts > end_ts:
+                    return
+                yield int(spawn_ts), self.bosses[j]
+            base += WEEK_SECONDS
+            i = 0
+
+    def spawns_within(self, now: datetime, seconds: float):
+        """Weekly spawns in (now, now + seconds], soonest first."""
+        limit = now + timedelta(seconds=seconds)
+        out = []
+        for boss, spawn_dt in self.upcoming(now):
+            if spawn_dt > limit:
+                break
+            out.append((boss, spawn_dt))
+        return out
+
+
+def load_weekly_data(path: Path, default=None):
+    """
+    The schedule saved in an old weekly_bosses.json, or a copy of default (weekly_boss_data if
+    None) if there is none. Only the storage backends' one-shot import reads the file.
+    """
+    default = weekly_boss_data if default is None else default
+    if path.exists():
+        METRICS.inc("json_reads_total", file=path.name)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else list(default)
+    return list(default)
+
+
+class WeeklyScheduleCache:
+    """Process-wide compiled schedule; rebuilt only when the state backend's weekly stamp changes."""
+
+    def __init__(self, state, default=None):
+        self.state = state  # a storage backend (SQLiteState / RedisState)
+        self.default = default  # schedule used until the first save (weekly_boss_data if None)
+        self._lock = threading.Lock()
+        self._compiled = (object(), None)  # (stamp, WeeklySchedule)
+
+    def stamp(self):
+        """Changes whenever the saved schedule does (in any process)."""
+        return self.state.weekly_stamp()
+
+    def get(self) -> WeeklySchedule:
+        stamp = self.stamp()
+        compiled_stamp, schedule = self._compiled
+        if compiled_stamp != stamp:
+            with self._lock:
+                compiled_stamp, schedule = self._compiled
+                if compiled_stamp != stamp:
+                    schedule = WeeklySchedule(self.state.load_weekly(self.default))
+                    self._compiled = (stamp, schedule)
+        return schedule
+
+    def load(self):
+        return self.state.load_weekly(self.default)
+
+    def save(self, data) -> WeeklySchedule:
+        WeeklySchedule(data)  # compile first so an invalid schedule is never written
+        self.state.save_weekly(data)
+        return self.get()
@@ -0,0 +1,161 @@
+"""
+Constant CSS / HTML / JS fragments for the Streamlit pages.
+
+Kept in an imported module so they are built once per process instead of on every script rerun.
+"""
+
+BUTTON_CSS = """
+<style>
+div.stButton > button{
+    width: 100% !important;
+    border-radius: 12px !important;
+    border: 1px solid #cbd5e1 !important;
+    background: #f1f5f9 !important;
+    color: #0f172a !important;
+    font-weight: 600 !important;
+    padding: 0.6rem 0.85rem !important;
+    box-shadow: none !important;
+    transition: background-color .12s ease, transform .08s ease;
+}
+div.stButton > button:hover{
+    background: #e2e8f0 !important;
+}
+div.stButton > button:active{
+    transform: translateY(1px);
+}
+</style>
+"""
+
+BANNER_CSS = """
+<style>
+.banner-container {
+    display: flex;
+    justify-content: center;
+    margin: 20px 0 5px 0;
+}
+.boss-banner {
+    background: linear-gradient(90deg, #0f172a, #1d4ed8, #16a34a);
+    padding: 14px 28px;
+    border-radius: 999px;
+    box-shadow: 0 16px 40px rgba(15, 23, 42, 0.75);
+    color: #f9fafb;
+    display: inline-flex;
+    flex-direction: column;
+    align-items: center;
+    gap: 4px;
+}
+.boss-banner-title {
+    font-size: 28px;
+    font-weight: 800;
+    margin: 0;
+    letter-spacing: 0.03em;
+}
+.boss-banner-row {
+    display: flex;
+    align-items: center;
+    gap: 14px;
+    font-size: 18px;
+}
+.banner-chip {
+    padding: 4px 12px;
+    border-radius: 999px;
+    background: rgba(15, 23, 42, 0.6);
+    border: 1px solid rgba(148, 163, 184, 0.7);
+}
+</style>
+"""
+
+# format() fields: name, time_only, spawn_ts, cd_color, cd_str
+BANNER_HTML = """
+<div class="banner-container">
+    <div class="boss-banner">
+        <h2 class="boss-banner-title">
+            Next Boss: <strong>{name}</strong>
+        </h2>
+        <div class="boss-banner-row">
+            <span class="banner-chip">
+                🕒 <strong>{time_only}</strong>
+            </span>
+            <span class="banner-chip" data-spawn="{spawn_ts}" data-ok-color="limegreen"
+                  data-border="1" style="color:{cd_color}; border-color:{cd_color};">
+                ⏳ <strong class="cd-text">{cd_str}</strong>
+            </span>
+        </div>
+    </div>
+</div>
+"""
+
+FIELD_TABLE_CSS = """
+<style>
+table th {
+    text-align: center !important;
+    vertical-align: middle !important;
+}
+table td {
+    vertical-align: middle !important;
+}
+table td:nth-child(2), table th:nth-child(2),
+table td:nth-child(3), table th:nth-child(3),
+table td:nth-child(4), table th:nth-child(4),
+table td:nth-child(5), table th:nth-child(5),
+table td:nth-child(6), table th:nth-child(6) {
+    text-align: center !important;
+}
+</style>
+"""
+
+IK_CSS = """
+<style>
+.ik-card{
+  background: #ffffff;
+  border: 1px solid #e5e7eb;
+  border-radius: 14px;
+  padding: 16px 14px 14px 14px;
+  text-align: center;
+  margin-bottom: 14px;
+}
+
+.ik-name{
+  font-size: 13px;
+  font-weight: 800;
+  letter-spacing: .18em;
+  color: #111827;
+  text-transform: uppercase;
+  padding: 6px 0 10px 0;
+}
+
+.ik-card div.stButton > button{
+  margin-top: 6px !important;
+}
+</style>
+"""
+
+COUNTDOWN_TICKER_JS = """
+<script>
+(function () {
+  // Ticks every [data-spawn] countdown on the page once a second, in the browser.
+  const doc = window.parent.document;
+  const offsetMs = %(server_now_ms)d - Date.now();
+  const pad = (n) => String(n).padStart(2, "0");
+  function fmt(total) {
+    if (total < 0) return "00:00:00";
+    const days = Math.floor(total / 86400);
+    const h = Math.floor((total %% 86400) / 3600), m = Math.floor((total %% 3600) / 60), s = total %% 60;
+    return (days > 0 ? days + "d " : "") + pad(h) + ":" + pad(m) + ":" + pad(s);
+  }
+  function tick() {
+    const now = Date.now() + offsetMs;
+    doc.querySelectorAll("[data-spawn]").forEach((el) => {
+      const secs = Math.floor((Number(el.dataset.spawn) * 1000 - now) / 1000);
+      const color = secs <= 60 ? "red" : secs <= 300 ? "orange" : (el.dataset.okColor || "green");
+      (el.querySelector(".cd-text") || el).textContent = fmt(secs);
+      el.style.color = color;
+      if (el.dataset.border) el.style.borderColor = color;
+    });
+  }
+  if (window.parent.__bossTicker) window.parent.clearInterval(window.parent.__bossTicker);
+  tick();
+  window.parent.__bossTicker = window.parent.setInterval(tick, 1000);
+})();
+</script>
+"""
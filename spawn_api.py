@@ -0,0 +1,69 @@
+"""
+Read-only spawn-status API and event stream for bots and overlays, next to the Streamlit app
+and sharing its data files and .streamlit/secrets.toml (only the TENANTS tables and
+STORAGE_URL matter here; it never sends Discord messages).
+
+    python spawn_api.py [--host 0.0.0.0] [--port 8502]
+    gunicorn -w 2 --threads 16 -b 0.0.0.0:8502 spawn_api:application
+
+    curl -i localhost:8502/api/v1/spawns
+    curl -i -H 'If-None-Match: "<etag>"' localhost:8502/api/v1/spawns   # -> 304
+    curl -N localhost:8502/api/v1/events                                # SSE
+
+Each open event stream holds one server thread; for thousands of subscribers run it under
+gunicorn with a gevent worker (-k gevent) instead of threads. With STORAGE_URL set to Redis
+the events are there too, so an API replica streams kills made on any app replica; with
+SQLite it needs the app's data directory.
+"""
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+import argparse
+import tomllib
+
+from boss_engine import EventBroadcaster, TenantHub, tenant_configs
+from boss_engine.api import SpawnStatusAPI
+
+SECRETS_FILE = Path(".streamlit") / "secrets.toml"
+
+
+def load_secrets(path: Path = SECRETS_FILE) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def create_app(root: Path = Path(".")) -> SpawnStatusAPI:
+    """The hub is never started: this process only reads the stores (and tails the event log)."""
+    secrets = load_secrets(root / SECRETS_FILE)
+    hub = TenantHub(tenant_configs(secrets), root, storage=secrets.get("STORAGE_URL"))
+    return SpawnStatusAPI(hub, EventBroadcaster(hub.events).start())
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):  # one line per poll would drown the console
+        pass
+
+
+application = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+
+    with make_server(args.host, args.port, application, ThreadingWSGIServer, QuietHandler) as server:
+        print(f"Spawn API on http://{args.host}:{args.port}/api/v1/spawns")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Plain-HTML tables for the World page (no pandas).
+
+The static cells of a row (name, interval, dates...) are built once and reused until that
+row's spawn changes; a render only recomputes the countdown cells, from one shared "now".
+"""
+import html
+
+from boss_engine.common import format_seconds
+
+
+def countdown_color(remaining_seconds: float, ok_color: str = "green") -> str:
+    if remaining_seconds <= 60:
+        return "red"
+    if remaining_seconds <= 300:
+        return "orange"
+    return ok_color
+
+
+def countdown_cell(spawn_ts: int, now_ts: float) -> str:
+    """Countdown rendered once by the server; data-spawn lets the browser keep it ticking."""
+    remaining = spawn_ts - now_ts
+    return (
+        f"<span data-spawn='{spawn_ts}' style='color:{countdown_color(remaining)}'>"
+        f"{format_seconds(int(remaining))}</span>"
+    )
+
+
+class CachedTable:
+    """
+    One table's header plus a cache of static row HTML.
+    Rows are keyed by the caller (e.g. row index) and rebuilt only when their stamp changes.
+    """
+
+    def __init__(self, headers):
+        self._head = (
+            '<table border="1" class="dataframe">\n  <thead>\n    <tr style="text-align: right;">'
+            + "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+            + "</tr>\n  </thead>\n  <tbody>\n"
+        )
+        self._rows = {}
+
+    def static_row(self, key, stamp, build_cells) -> str:
+        cached = self._rows.get(key)
+        if cached is None or cached[0] != stamp:
+            cells = "".join(f"<td>{html.escape(str(cell))}</td>" for cell in build_cells())
+            cached = (stamp, f"    <tr>{cells}")
+            self._rows[key] = cached
+        return cached[1]
+
+    def render(self, rows, now_ts: float) -> str:
+        """
+        rows: iterable of (key, spawn_ts, build_cells) in display order, where build_cells()
+        returns the static cells and is only called on a cache miss.
+        """
+        parts = [self._head]
+        for key, spawn_ts, build_cells in rows:
+            parts.append(self.static_row(key, spawn_ts, build_cells))
+            parts.append(f"<td>{countdown_cell(spawn_ts, now_ts)}</td></tr>\n")
+        parts.append("  </tbody>\n</table>")
+        return "".join(parts)
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from boss_engine import TimingWheel
+
+DAY = 24 * 3600
+# one second, minute, hour and day either side of each level's boundary, and past the top level
+OFFSETS = [0, 1, 59, 60, 61, 3599, 3600, 3601, DAY - 1, DAY, DAY + 5, 8 * DAY - 1, 8 * DAY, 9 * DAY + 7]
+STARTS = [1_785_110_400, 1_785_110_400 + 59, 1_785_110_400 + DAY - 1, 1_785_110_400 + 7 * DAY + 3599]
+
+
+@pytest.mark.parametrize("start", STARTS)
+@pytest.mark.parametrize("offset", OFFSETS)
+def test_entry_fires_at_its_tick_and_not_before(start, offset):
+    wheel = TimingWheel(start)
+    timer = wheel.add(start + offset, "boss")
+    if offset:
+        assert wheel.advance(start + offset - 1) == []
+        assert timer.pending and len(wheel) == 1
+    assert wheel.advance(start + offset) == [timer]
+    assert not timer.pending and len(wheel) == 0
+    assert wheel.next_tick() is None
+
+
+@pytest.mark.parametrize("start", STARTS)
+def test_stepping_through_the_boundaries_one_advance_at_a_time(start):
+    wheel = TimingWheel(start)
+    timers = {wheel.add(start + offset, offset): offset for offset in OFFSETS}
+    fired = []
+    now = start
+    while len(wheel):
+        now = wheel.next_tick()
+        for timer in wheel.advance(now):
+            assert timer.tick == now
+            fired.append(timers[timer])
+    assert fired == sorted(OFFSETS)
+
+
+@pytest.mark.parametrize("start", STARTS)
+def test_cancel_at_every_level(start):
+    wheel = TimingWheel(start)
+    timers = [wheel.add(start + offset, offset) for offset in OFFSETS]
+    cancelled = timers[1::2]
+    for timer in cancelled:
+        wheel.cancel(timer)
+        wheel.cancel(timer)  # twice is harmless
+    assert len(wheel) == len(timers) - len(cancelled)
+    due = wheel.advance(start + 10 * DAY)
+    assert [timer.payload for timer in due] == OFFSETS[::2]
+    assert not any(timer.pending for timer in timers)
+
+
+def test_cancel_after_a_cascade():
+    start = STARTS[0]
+    wheel = TimingWheel(start)
+    timer = wheel.add(start + DAY + 90, "boss")
+    assert wheel.advance(start + DAY + 60) == []  # cascaded down to the seconds level by now
+    wheel.cancel(timer)
+    assert wheel.advance(start + DAY + 120) == [] and len(wheel) == 0
+
+
+def test_pop_until_and_reinsert():
+    start = STARTS[1]
+    wheel = TimingWheel(start)
+    near, far = wheel.add(start + 61, "near"), wheel.add(start + 3601, "far")
+    assert wheel.pop_until(start + 120) == [near]
+    assert wheel.current == start and len(wheel) == 1
+    wheel.reinsert(near)
+    wheel.cancel(far)
+    assert wheel.advance(start + 4000) == [near]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_a_brute_force_model(seed):
+    rng = random.Random(seed)
+    now = STARTS[0] + rng.randrange(DAY)
+    wheel = TimingWheel(now)
+    model = {}  # timer -> tick
+    for _ in range(2000):
+        op = rng.random()
+        if op < 0.5:
+            delay = rng.choice([rng.randrange(-5, 120), rng.randrange(4000), rng.randrange(10 * DAY)])
+            timer = wheel.add(now + delay + rng.random(), None)
+            model[timer] = timer.tick
+        elif op < 0.65 and model:
+            timer = rng.choice(list(model))
+            wheel.cancel(timer)
+            del model[timer]
+        else:
+            now += rng.choice([1, rng.randrange(60), rng.randrange(3600), rng.randrange(2 * DAY)])
+            due = wheel.advance(now)
+            expected = sorted(tick for tick in model.values() if tick <= now)
+            assert [timer.tick for timer in due] == expected
+            for timer in due:
+                del model[timer]
+        assert len(wheel) == len(model)
+        upcoming = wheel.next_tick()
+        if model:
+            assert upcoming is not None and upcoming <= max(min(model.values()), now)
@@ -0,0 +1,98 @@
+import json
+from datetime import datetime
+
+from boss_engine import MANILA, TenantHub, tenant_configs
+from boss_engine import api as api_module
+from boss_engine.api import SpawnStatusAPI
+
+ROWS = [
+    ("Venatus", 600, "2026-08-04 04:35 AM"),
+    ("Viorent", 600, "2026-08-04 04:40 AM"),
+]
+
+
+def _api(root):
+    """One worker process: its own hub and caches over the shared data directory."""
+    return SpawnStatusAPI(TenantHub(tenant_configs({"TENANTS": {"main": {"timers": ROWS, "weekly": []}}}), root))
+
+
+def _get(api, path="/api/v1/spawns", query="server=main", **headers):
+    response = {}
+
+    def start_response(status, header_list):
+        response["status"], response["headers"] = status, dict(header_list)
+
+    environ = {"REQUEST_METHOD": headers.pop("REQUEST_METHOD", "GET"), "PATH_INFO": path, "QUERY_STRING": query}
+    environ.update({"HTTP_" + name.upper(): value for name, value in headers.items()})
+    body = b"".join(api(environ, start_response))
+    return response["status"], response["headers"], body
+
+
+def test_workers_agree_on_the_etag(tmp_path):
+    first, second = _api(tmp_path), _api(tmp_path)
+    engine = first.hub["main"]
+    for _ in range(3):  # this worker's local snapshot counter moves on, the data does not
+        engine.timers.invalidate()
+        engine.snapshot()
+    _, headers, body = _get(first)
+    assert _get(second)[1]["ETag"] == headers["ETag"]
+    assert json.loads(body)["version"] == 0
+
+    row = engine.timers.get().timers[0]
+    engine.set_last_time("Venatus", row.last_time, row.version)
+    _, changed, body = _get(second)
+    assert changed["ETag"] != headers["ETag"] and json.loads(body)["version"] == 1
+    assert _get(first)[1]["ETag"] == changed["ETag"]
+
+
+def _clock(monkeypatch, when):
+    clock = {"now": when}
+    monkeypatch.setattr(api_module, "now_manila", lambda: clock["now"])
+    return clock
+
+
+def test_if_none_match_gets_an_empty_304(tmp_path, monkeypatch):
+    _clock(monkeypatch, datetime(2030, 1, 1, tzinfo=MANILA))
+    api = _api(tmp_path)
+    status, headers, body = _get(api)
+    assert status == "200 OK" and headers["Cache-Control"] == "public, max-age=5"
+    etag = headers["ETag"]
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        status, headers, body = _get(api, if_none_match=header)
+        assert (status, body, headers["ETag"]) == ("304 Not Modified", b"", etag)
+        assert "Content-Length" not in headers
+    assert _get(api, if_none_match='"other"')[0] == "200 OK"
+
+
+def test_max_age_never_outlives_the_earliest_spawn(tmp_path, monkeypatch):
+    clock = _clock(monkeypatch, datetime(2030, 1, 1, tzinfo=MANILA))
+    api = _api(tmp_path)
+    _, headers, body = _get(api)
+    first = json.loads(body)["field"][0]
+    clock["now"] = datetime.fromtimestamp(first["ts"] - 3, tz=MANILA)
+    status, capped, _ = _get(api, if_none_match=headers["ETag"])
+    assert status == "304 Not Modified" and capped["Cache-Control"] == "public, max-age=3"
+
+
+def test_rebuilt_once_the_earliest_spawn_passes(tmp_path, monkeypatch):
+    clock = _clock(monkeypatch, datetime(2030, 1, 1, tzinfo=MANILA))
+    api = _api(tmp_path)
+    _, headers, body = _get(api)
+    first = json.loads(body)["field"][0]
+    assert api.status("main") is api.status("main")  # served from the cache meanwhile
+
+    clock["now"] = datetime.fromtimestamp(first["ts"] + 1, tz=MANILA)
+    status, rebuilt, body = _get(api, if_none_match=headers["ETag"])
+    assert status == "200 OK" and rebuilt["ETag"] != headers["ETag"]
+    moved = {row["boss"]: row["ts"] for row in json.loads(body)["field"]}
+    assert moved[first["boss"]] == first["ts"] + first["interval_minutes"] * 60
+
+
+def test_unknown_routes_and_methods(tmp_path):
+    api = _api(tmp_path)
+    assert _get(api, query="server=nope")[0] == "404 Not Found"
+    assert _get(api, path="/api/v1/nothing")[0] == "404 Not Found"
+    assert json.loads(_get(api, path="/api/v1/servers")[2]) == [{"slug": "main", "title": "main"}]
+    assert _get(api, path="/healthz")[2] == b"ok"
+    status, headers, _ = _get(api, REQUEST_METHOD="POST")
+    assert status == "405 Method Not Allowed" and headers["Allow"] == "GET, HEAD"
@@ -0,0 +1,60 @@
+import json
+
+from boss_engine import Engine
+
+ROWS = [
+    ("Venatus", 600, "2026-08-04 04:35 AM", 0),
+    ("Viorent", 600, "2026-08-04 04:40 AM", 0),
+    ("Ego", 1260, "2026-08-04 06:35 AM", 0),
+]
+
+
+def _engine(tmp_path):
+    engine = Engine(tmp_path, targets=[], default_timers=ROWS, default_weekly=[])
+    engine.notifier._refresh({""})  # what the started notifier does first
+    engine.notifier._dirty.clear()
+    return engine
+
+
+def _queued(engine):
+    return {boss: phases for (source, boss), phases in engine.notifier._alerts[""].items() if source == "FIELD"}
+
+
+def test_save_timers_requeues_only_the_changed_bosses(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    ego_before = _queued(engine)["Ego"]
+    rescheduled = []
+    monkeypatch.setattr(engine.notifier, "reschedule", lambda key=None: rescheduled.append(key))
+
+    changes = engine.save_timers([
+        ("Venatus", 0, ("Venatus II", 600, "2026-08-04 04:35 AM")),
+        ("Viorent", 0, None),
+        (None, None, ("Newboss", 90, "2026-08-04 05:00 AM")),
+    ], "tester")
+
+    assert len(changes) == 3
+    assert rescheduled == []
+    queued = _queued(engine)
+    assert set(queued) == {"Venatus II", "Ego", "Newboss"}
+    assert queued["Ego"] is ego_before  # untouched
+
+
+def test_save_timers_swapping_two_names_keeps_both(tmp_path):
+    engine = _engine(tmp_path)
+    engine.save_timers([
+        ("Venatus", 0, ("Viorent", 600, "2026-08-04 04:35 AM")),
+        ("Viorent", 0, ("Venatus", 600, "2026-08-04 04:40 AM")),
+    ])
+    queued = _queued(engine)
+    assert set(queued) == {"Venatus", "Viorent", "Ego"}
+    (venatus_spawn, _, _), = queued["Venatus"].values()
+    (viorent_spawn, _, _), = queued["Viorent"].values()
+    assert venatus_spawn - viorent_spawn == 5 * 60
+
+
+def test_weekly_saves_are_events_not_history(tmp_path):
+    engine = _engine(tmp_path)
+    engine.save_weekly([("Clemantis", ["Monday 11:30"])], "tester")
+    assert engine.history.count() == 0 and engine.history.distinct("boss") == []
+    ((_, _, event_type, data),) = engine.events.since(0)
+    assert (event_type, json.loads(data)) == ("weekly", {"bosses": ["Clemantis"], "by": "tester"})
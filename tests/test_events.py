@@ -0,0 +1,141 @@
+import time
+import types
+from datetime import datetime
+
+import pytest
+
+from boss_engine import MANILA, Engine, EventBroadcaster, EventLog, RedisEventLog, events, open_events
+
+RING = 3  # small, so a resume can reach back past it
+
+
+def _redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def log(request, tmp_path):
+    if request.param == "sqlite":
+        return EventLog(tmp_path / "events.db")
+    return RedisEventLog(_redis())
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _broadcaster(log):
+    broadcaster = EventBroadcaster(log, poll_interval=0.01, ring_size=RING).start()
+    _wait_until(lambda: broadcaster.last_id == log.last_id())
+    return broadcaster
+
+
+def _ids(chunk: bytes):
+    return [int(line[4:]) for line in chunk.decode().splitlines() if line.startswith("id: ")]
+
+
+def _fill(log, n=6):
+    """Events 1..n for the default tenant, with one for another tenant in between."""
+    ids = []
+    for i in range(n):
+        ids.append(log.append("", "kill", {"boss": f"Boss {i}"}))
+        if i == 2:
+            log.append("other", "kill", {"boss": "elsewhere"})
+    return ids
+
+
+def test_resume_from_the_ring(log):
+    broadcaster = _broadcaster(log)  # events logged from here on go through its ring
+    ids = _fill(log)
+    _wait_until(lambda: broadcaster.last_id == log.last_id())
+    stream = broadcaster.subscribe("", ids[-3])
+    assert next(stream) == b"retry: 3000\n\n"
+    before = log.since
+    log.since = lambda *args, **kwargs: pytest.fail("read the log for events still in the ring")
+    try:
+        assert _ids(next(stream)) == ids[-2:]
+    finally:
+        log.since = before
+        broadcaster.stop()
+
+
+def test_resume_from_further_back_replays_the_log(log):
+    ids = _fill(log)
+    broadcaster = _broadcaster(log)
+    stream = broadcaster.subscribe("", ids[0])
+    next(stream)
+    replayed = []
+    while len(replayed) < len(ids) - 1:
+        replayed += _ids(next(stream))
+    broadcaster.stop()
+    assert replayed == ids[1:]  # in order, once each, without the other tenant's event
+    frame = events.sse_frame(ids[1], "kill", '{"boss": "Boss 1"}')
+    assert frame == f'id: {ids[1]}\nevent: kill\ndata: {{"boss": "Boss 1"}}\n\n'.encode()
+
+
+def test_new_subscribers_start_live_and_ids_from_a_reset_log_do_not_hide_events(log, monkeypatch):
+    monkeypatch.setattr(events, "SSE_KEEPALIVE_SECONDS", 0.05)
+    _fill(log)
+    broadcaster = _broadcaster(log)
+    streams = [broadcaster.subscribe(""), broadcaster.subscribe("", 10_000)]
+    for stream in streams:
+        assert next(stream).startswith(b"retry:")
+        assert next(stream) == b": keepalive\n\n"  # nothing replayed
+    new_id = log.append("", "edit", {"boss": "Boss 9"})
+    for stream in streams:
+        assert _ids(next(stream)) == [new_id]
+    broadcaster.stop()
+
+
+def test_idle_streams_get_a_keepalive(log, monkeypatch):
+    monkeypatch.setattr(events, "SSE_KEEPALIVE_SECONDS", 0.05)
+    broadcaster = _broadcaster(log)
+    stream = broadcaster.subscribe("")
+    next(stream)
+    assert next(stream) == b": keepalive\n\n"
+    broadcaster.stop()
+
+
+def test_warning_and_spawn_events_are_logged_once_across_processes(tmp_path):
+    first, second = Engine(tmp_path, targets=[]), Engine(tmp_path, targets=[])  # two app processes
+    spawn = datetime(2030, 1, 1, 12, 0, tzinfo=MANILA)
+    for engine in (first, second):
+        engine.send_spawn_warnings([("FIELD", "Venatus", spawn)], 300)
+        engine.send_spawn_warnings([("FIELD", "Venatus", spawn)], 60)
+        engine.publish_spawns([("FIELD", "Venatus", spawn)])
+    logged = [event_type for _, _, event_type, _ in first.events.since(0)]
+    assert logged == ["warning", "warning", "spawn"]
+    assert first.publish("kill", {"boss": "Venatus"}) != first.publish("kill", {"boss": "Venatus"})
+
+
+def test_redis_replicas_share_one_event_log(tmp_path):
+    redis = _redis()
+    (tmp_path / "app").mkdir()
+    (tmp_path / "api").mkdir()
+    app = Engine(tmp_path / "app", targets=[], storage=redis)
+    api = Engine(tmp_path / "api", targets=[], storage=redis)  # another host, another data directory
+    assert isinstance(app.events, RedisEventLog)
+    spawn = datetime(2030, 1, 1, 12, 0, tzinfo=MANILA)
+    app.publish_spawns([("FIELD", "Venatus", spawn)])
+    api.publish_spawns([("FIELD", "Venatus", spawn)])
+    kill_id = app.publish("kill", {"boss": "Venatus"})
+    assert [(event_id, event_type) for event_id, _, event_type, _ in api.events.since(0)] == [
+        (1, "spawn"), (kill_id, "kill"),
+    ]
+    assert api.events.last_id() == kill_id == 2
+    assert isinstance(open_events(None, tmp_path / "events.db"), EventLog)
+
+
+def test_redis_log_prunes_old_events(monkeypatch):
+    log = RedisEventLog(_redis())
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr("boss_engine.storage.time", types.SimpleNamespace(time=lambda: clock["now"]))
+    old = [log.append("", "kill", {"i": i}) for i in range(3)]
+    clock["now"] += events.EVENT_RETENTION_SECONDS + 1
+    new = log.append("", "kill", {"i": 3})
+    log.prune()
+    assert [row[0] for row in log.since(0)] == [new] and log.last_id() == new > max(old)
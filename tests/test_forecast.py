@@ -0,0 +1,84 @@
+import itertools
+import json
+import sys
+from datetime import datetime, timedelta
+
+from boss_engine import MANILA, TIME_FMT, Engine, TimerStore, WeeklySchedule, forecast, to_ics, to_json
+
+NOW = datetime(2026, 8, 3, 10, 20, tzinfo=MANILA)  # Monday
+ANCHOR = NOW.replace(minute=0)
+
+
+def _fmt(dt):
+    return dt.strftime(TIME_FMT)
+
+
+def _store():
+    return TimerStore([
+        ("Ten", 10, _fmt(NOW - timedelta(minutes=33))),  # 09:47, next 10:27
+        ("Hour", 60, _fmt(NOW - timedelta(minutes=5))),  # 10:15, next 11:15
+    ])
+
+
+def _spawns(stream):
+    return [(datetime.fromtimestamp(ts, tz=MANILA).strftime("%H:%M"), source, boss) for ts, source, boss in stream]
+
+
+def test_field_and_weekly_spawns_merge_in_time_order():
+    weekly = WeeklySchedule([("Clemantis", ["Monday 10:30"]), ("Milavy", ["Monday 10:57"])])
+    assert _spawns(forecast(_store(), weekly, NOW, 40 * 60)) == [
+        ("10:27", "FIELD", "Ten"), ("10:30", "WEEKLY", "Clemantis"), ("10:37", "FIELD", "Ten"),
+        ("10:47", "FIELD", "Ten"), ("10:57", "FIELD", "Ten"), ("10:57", "WEEKLY", "Milavy"),
+    ]
+
+
+def test_the_merge_is_lazy():
+    weekly = WeeklySchedule([("Clemantis", ["Monday 10:30"])])
+    first = list(itertools.islice(forecast(_store(), weekly, NOW, 10 ** 9), 3))
+    assert _spawns(first) == [("10:27", "FIELD", "Ten"), ("10:30", "WEEKLY", "Clemantis"), ("10:37", "FIELD", "Ten")]
+
+
+def test_an_anchor_before_now_gets_the_spawns_since_it():
+    shared = _store()
+    shared.update_next(NOW)  # as every session viewing the World page leaves it
+    anchored = _spawns(forecast(shared, WeeklySchedule([]), ANCHOR, 3600))
+    assert anchored == _spawns(forecast(_store(), WeeklySchedule([]), ANCHOR, 3600))
+    assert [when for when, _, boss in anchored if boss == "Ten"] == ["10:07", "10:17", "10:27", "10:37", "10:47", "10:57"]
+    # Hour was saved at 10:15: nothing is invented before it; the window ends an hour after the anchor
+    assert [when for when, _, boss in anchored if boss == "Hour"] == []
+    assert anchored == _spawns(forecast(shared, WeeklySchedule([]), ANCHOR, 3600))  # and the store is untouched
+
+
+def test_export_covers_the_horizon_from_its_anchor(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules["boss_engine.forecast"], "now_manila", lambda: NOW)
+    engine = Engine(tmp_path, targets=[], default_timers=[("Ten", 10, _fmt(NOW - timedelta(minutes=33)))],
+                    default_weekly=[])
+    engine.snapshot().timers.update_next(NOW)
+    body = json.loads(engine.forecast_export("json", 3600))
+    assert body["generated_at"] == ANCHOR.isoformat() and body["horizon_seconds"] == 3600
+    assert [row["spawn"][11:16] for row in body["spawns"]] == ["10:07", "10:17", "10:27", "10:37", "10:47", "10:57"]
+    assert engine.forecast_export("json", 3600) is engine.forecast_export("json", 3600)  # cached
+
+
+def test_json_rows():
+    spawn = int(NOW.timestamp())
+    body = json.loads(to_json([(spawn, "WEEKLY", "Clemantis")], NOW, 86400))
+    assert body == {
+        "generated_at": NOW.isoformat(),
+        "horizon_seconds": 86400,
+        "spawns": [{"boss": "Clemantis", "source": "weekly", "spawn": NOW.isoformat(), "ts": spawn}],
+    }
+
+
+def test_ics_events_alarms_escaping_and_folding():
+    spawn = int(NOW.timestamp())
+    name = "Motti, the; very long-named (Kransia) boss of the eastern marsh ünd more"
+    text = to_ics([(spawn, "FIELD", name), (spawn + 600, "WEEKLY", "Benji")], NOW, "Boss spawns", "srv").decode()
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert "\n" not in text.replace("\r\n", "")
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+    unfolded = text.replace("\r\n ", "")
+    assert unfolded.count("BEGIN:VEVENT") == 2 and unfolded.count("TRIGGER:-PT5M") == 2
+    assert "SUMMARY:Motti\\, the\\; very long-named (Kransia) boss of the eastern marsh ünd more spawns" in unfolded
+    assert "DTSTART:20260803T022000Z\r\nDTEND:20260803T023500Z" in unfolded
+    assert f"UID:srv-weekly-Benji-{spawn + 600}" in unfolded and "CATEGORIES:Weekly" in unfolded
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from boss_engine import TIME_FMT, HistoryStore, TimerStore, kill_drift, parse_time_str
+
+PREDICTED = "2026-08-04 10:00 AM"
+
+
+def _fmt(dt):
+    return dt.strftime(TIME_FMT)
+
+
+def _instakill_old_time(minutes_after_predicted: int, interval_minutes: int = 600):
+    """What InstaKill logs as old_time: the last spawn as the caught-up snapshot shows it."""
+    predicted = parse_time_str(PREDICTED)
+    kill = predicted + timedelta(minutes=minutes_after_predicted)
+    store = TimerStore([("Venatus", interval_minutes, _fmt(predicted - timedelta(minutes=interval_minutes)))])
+    store.update_next(kill)
+    return store[0].last_time.strftime(TIME_FMT), _fmt(kill)
+
+
+def test_instakill_five_minutes_late_is_plus_five():
+    old_time, new_time = _instakill_old_time(5)
+    assert old_time == PREDICTED
+    assert kill_drift(old_time, new_time, 600) == 5
+
+
+def test_instakill_five_minutes_early_is_minus_five():
+    old_time, new_time = _instakill_old_time(-5)
+    assert kill_drift(old_time, new_time, 600) == -5
+
+
+def test_instakill_on_time_is_zero():
+    old_time, new_time = _instakill_old_time(0)
+    assert kill_drift(old_time, new_time, 600) == 0
+
+
+def test_uncaught_up_old_time_uses_nearest_cycle():
+    # a Manage edit logs the stored last spawn, possibly several intervals back
+    old = parse_time_str(PREDICTED)
+    assert kill_drift(PREDICTED, _fmt(old + timedelta(minutes=3 * 60 + 7)), 60) == 7
+    assert kill_drift(PREDICTED, _fmt(old + timedelta(minutes=3 * 60 - 7)), 60) == -7
+
+
+def test_not_a_kill_is_none():
+    assert kill_drift(PREDICTED, "(removed)", 600) is None
+    assert kill_drift(PREDICTED, PREDICTED, None) is None
+    assert kill_drift(PREDICTED, _fmt(parse_time_str(PREDICTED) - timedelta(minutes=1)), 600) is None
+
+
+def test_rollups_from_appends(tmp_path):
+    history = HistoryStore(tmp_path / "history.db")
+    intervals = {"Venatus": 600}
+    for minutes in (-5, 5, 20):
+        old_time, new_time = _instakill_old_time(minutes)
+        history.append("Venatus", old_time, new_time, "ann", intervals=intervals)
+    history.append("Venatus", "(new boss)", "x", "bob", intervals=intervals)
+
+    (drift,) = history.drift_stats()
+    assert drift["kills"] == 3
+    assert drift["mean_drift"] == 20 / 3
+    assert (drift["p50_drift"], drift["p90_drift"]) == (5, 20)
+    assert drift["late_rate"] == 1 / 3
+    editors = {row["edited_by"]: row for row in history.editor_stats()}
+    assert (editors["ann"]["edits"], editors["ann"]["kills"]) == (3, 3)
+    assert (editors["bob"]["edits"], editors["bob"]["kills"], editors["bob"]["mean_drift"]) == (1, 0, None)
+
+
+def test_paging_newest_first(tmp_path):
+    history = HistoryStore(tmp_path / "history.db")
+    for i in range(5):
+        history.append(f"Boss {i}", "a", "b", "ann" if i % 2 else "bob")
+    assert history.count() == 5
+    assert history.count(editor="ann") == 2
+    assert [row["boss"] for row in history.query(limit=2, offset=1)] == ["Boss 3", "Boss 2"]
+    assert history.distinct("edited_by") == ["ann", "bob"]
+
+
+def test_rollups_from_an_older_kill_drift_are_rebuilt(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "history.db"
+    old_time, new_time = _instakill_old_time(5)
+    HistoryStore(path).append("Venatus", old_time, new_time, "ann", intervals={"Venatus": 600})
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("UPDATE drift_buckets SET drift = -595")  # what the k >= 1 formula stored
+        db.execute("PRAGMA user_version = 1")
+    db.close()
+
+    history = HistoryStore(path)
+    assert history.drift_stats() == []
+    assert history.catch_up({"Venatus": 600}) == 1
+    assert history.drift_stats()[0]["mean_drift"] == 5
+    assert history.editor_stats()[0]["edits"] == 1
@@ -0,0 +1,125 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+from boss_engine import MANILA, AlertStages, SpawnNotifier, WarnStore, WebhookDispatcher, WebhookOutbox
+from boss_engine import notifier as notifier_module
+from boss_engine.notifier import _group_key, _grouped_warning_message, send_spawn_warnings
+
+PERIOD = 600 * 60
+
+
+def _notifier(spawns, stages=lambda boss: (300,), keys=("",)):
+    """A notifier primed as the started thread would be, recording what it sends."""
+    sent = []
+    notifier = SpawnNotifier()
+    for key in keys:
+        feed = [("FIELD", boss, datetime.fromtimestamp(ts, tz=MANILA), PERIOD) for boss, ts in spawns]
+        notifier.watch(key, lambda feed=feed: feed,
+                       lambda batch, stage, key=key: sent.append((key, stage, [boss for _, boss, _ in batch])),
+                       stages=stages)
+    notifier._refresh(set(keys))
+    return notifier, sent
+
+
+def _spawn_time():
+    return (int(time.time()) // 60 + 60) * 60  # an hour out, on the minute
+
+
+def test_warnings_due_within_the_window_go_out_together():
+    t = _spawn_time()
+    notifier, sent = _notifier([("A", t), ("B", t + 120), ("C", t + 240)])
+    notifier._fire_due(t - 301)
+    assert sent == []
+    notifier._fire_due(t - 300)
+    assert sent == [("", 300, ["A", "B"])]
+    notifier._fire_due(t - 120)  # B's own tick: already sent
+    assert len(sent) == 1
+    notifier._fire_due(t - 60)
+    assert sent[-1] == ("", 300, ["C"])
+
+
+def test_shorter_stages_use_a_shorter_window():
+    t = _spawn_time()
+    notifier, sent = _notifier([("A", t), ("B", t + 30), ("C", t + 40)], stages=lambda boss: (60,))
+    notifier._fire_due(t - 60)  # 36 s window for the 1-minute stage
+    assert sent == [("", 60, ["A", "B"])]
+    notifier._fire_due(t - 20)
+    assert sent[-1] == ("", 60, ["C"])
+
+
+def test_other_stages_and_sources_are_not_pulled_in():
+    t = _spawn_time()
+    stages = {"A": (300,), "D": (60,)}
+    notifier, sent = _notifier([("A", t), ("D", t - 190)], stages=stages.get, keys=("one", "two"))
+    notifier._fire_due(t - 300)  # D's 1-minute warning is 50 s later, but another stage
+    assert sorted(sent) == [("one", 300, ["A"]), ("two", 300, ["A"])]
+    notifier._fire_due(t - 250)
+    assert sorted(sent[2:]) == [("one", 60, ["D"]), ("two", 60, ["D"])]
+
+
+NOON = datetime(2026, 8, 4, 12, 0, tzinfo=MANILA)
+TARGET = {"name": "discord_1", "webhook": "https://discord.invalid/api/webhooks/1/token", "role_id": "42"}
+
+
+def _spawns(*bosses_and_minutes):
+    return [("FIELD", boss, NOON + timedelta(minutes=minutes)) for boss, minutes in bosses_and_minutes]
+
+
+def test_the_coalesced_message_lists_every_boss_with_one_ping(monkeypatch):
+    monkeypatch.setattr(notifier_module, "now_manila", lambda: NOON - timedelta(minutes=5))
+    message = _grouped_warning_message(_spawns(("Venatus", 0), ("Ego", 2)), TARGET)
+    assert message == (
+        "⏳ 5-minute warning!\n"
+        "**Venatus** spawns at **12:00 PM** (in 00:05:00)\n"
+        "**Ego** spawns at **12:02 PM** (in 00:07:00)\n"
+        "(Manila Time)\n<@&42>"
+    )
+    spawning = _grouped_warning_message(_spawns(("Venatus", 0), ("Ego", 0)), {"name": "d", "role_id": ""}, 0)
+    assert spawning == "🔔 Spawning now!\n**Venatus** at **12:00 PM**\n**Ego** at **12:00 PM**\n(Manila Time)\n"
+    # one spawn keeps the single-boss message
+    assert _grouped_warning_message(_spawns(("Venatus", 0)), TARGET).startswith("⏳ 5-minute warning!\n**Venatus** spawns at")
+
+
+def test_group_key_is_the_same_for_the_same_spawns_and_stage():
+    group = _spawns(("Venatus", 0), ("Ego", 2))
+    key = _group_key(group)
+    assert key.startswith("GROUP|2026-08-04 12:00|")
+    assert _group_key(sorted(group[::-1], key=lambda spawn: spawn[2])) == key  # callers sort by spawn
+    assert _group_key(group, 60) != key and _group_key(_spawns(("Venatus", 0), ("Asta", 2))) != key
+    assert _group_key(group[:1]) == "FIELD|Venatus|2026-08-04 12:00"  # a single spawn keeps its event key
+
+
+def test_send_spawn_warnings_enqueues_one_message_for_the_unclaimed_bosses(tmp_path):
+    warns = WarnStore(tmp_path / "warns.db")
+    dispatcher = WebhookDispatcher(WebhookOutbox(tmp_path / "outbox.db"), [TARGET])  # never started
+    spawns = [("FIELD", boss, datetime.now(MANILA).replace(microsecond=0) + timedelta(minutes=minutes))
+              for boss, minutes in (("Ego", 6), ("Venatus", 4), ("Asta", 5))]
+    assert warns.claim(f"FIELD|Asta|{spawns[2][2]:%Y-%m-%d %H:%M}|discord_1")  # already warned about
+
+    handle = send_spawn_warnings(warns, dispatcher, spawns, key_prefix="main|")
+    ordered = [spawns[1], spawns[0]]
+    assert handle.keys == {"discord_1": f"main|{_group_key(ordered)}|discord_1"}
+    ((_, _, payload, _, expires_at),) = dispatcher.outbox.due()
+    content = json.loads(payload)["content"]
+    assert content.index("**Venatus**") < content.index("**Ego**") and "Asta" not in content
+    assert content.count("<@&42>") == 1
+    assert expires_at == spawns[0][2].timestamp()  # the last spawn in the message
+
+    assert send_spawn_warnings(warns, dispatcher, spawns, key_prefix="main|").keys == {}  # all claimed now
+
+
+def test_send_spawn_warnings_groups_per_target_stages(tmp_path):
+    warns = WarnStore(tmp_path / "warns.db")
+    dispatcher = WebhookDispatcher(WebhookOutbox(tmp_path / "outbox.db"))
+    quiet = dict(TARGET, name="discord_2", alert_stages=[1])  # no 5-minute warnings for this one
+    spawns = _spawns(("Venatus", 0), ("Ego", 2))
+    handle = send_spawn_warnings(warns, dispatcher, spawns, [TARGET, quiet], stages=AlertStages({"Ego": [5, 1]}))
+    assert handle.keys == {"discord_1": f"{_group_key(spawns)}|discord_1"}
+
+    handle = send_spawn_warnings(warns, dispatcher, spawns, [TARGET, quiet], stage=60,
+                                 stages=AlertStages({"Ego": [5, 1]}))
+    assert handle.keys == {  # Venatus has no 1-minute stage, except for the target that asked for it
+        "discord_1": "FIELD@60|Ego|2026-08-04 12:02|discord_1",
+        "discord_2": f"{_group_key(spawns, 60)}|discord_2",
+    }
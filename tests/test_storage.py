@@ -0,0 +1,289 @@
+import json
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from boss_engine import METRICS, RedisState, RedisWarnStore, SQLiteState, TimerConflict, now_manila, open_state, storage
+from boss_engine.dedup import WARN_KEY_GRACE_SECONDS
+
+ROWS = [
+    ("Venatus", 600, "2026-08-04 04:35 AM", 0),
+    ("Viorent", 600, "2026-08-04 04:40 AM", 0),
+    ("Ego", 1260, "2026-08-04 06:35 AM", 0),
+]
+
+
+def _redis():
+    # the Redis tests need the stand-in server (requirements-dev.txt); the SQLite ones do not
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def state(request, tmp_path):
+    if request.param == "sqlite":
+        state = SQLiteState(tmp_path)
+    else:
+        state = RedisState(_redis(), "test:")
+    state.save_timers(ROWS)
+    return state
+
+
+def _spawn_key(minutes_ahead: int, target: str = "t1") -> str:
+    spawn = (now_manila() + timedelta(minutes=minutes_ahead)).strftime("%Y-%m-%d %H:%M")
+    return f"FIELD|Venatus|{spawn}|{target}"
+
+
+def test_update_timer_bumps_the_version_and_the_stamp(state):
+    stamp = state.timers_stamp()
+    row = state.update_timer("Venatus", 0, "2026-08-04 02:35 PM")
+    assert row == ("Venatus", 600, "2026-08-04 02:35 PM", 1)
+    assert state.timers_stamp() != stamp
+    assert state.load_timers()[0] == row
+    assert [r[0] for r in state.load_timers()] == [r[0] for r in ROWS]
+
+
+def test_update_timer_stale_version_conflicts(state):
+    state.update_timer("Venatus", 0, "2026-08-04 02:35 PM")
+    stamp = state.timers_stamp()
+    with pytest.raises(TimerConflict) as conflict:
+        state.update_timer("Venatus", 0, "2026-08-04 03:00 PM")
+    assert conflict.value.current_row[2:] == ("2026-08-04 02:35 PM", 1)
+    with pytest.raises(KeyError):
+        state.update_timer("Nobody", 0, "2026-08-04 03:00 PM")
+    assert state.timers_stamp() == stamp
+    assert state.load_timers()[0][2] == "2026-08-04 02:35 PM"
+
+
+def test_apply_timer_edits_is_all_or_nothing(state):
+    state.update_timer("Ego", 0, "2026-08-04 07:00 AM")
+    stamp = state.timers_stamp()
+    with pytest.raises(TimerConflict):
+        state.apply_timer_edits([
+            ("Venatus", 0, ("Venatus", 660, "2026-08-04 04:35 AM")),
+            ("Ego", 0, None),  # stale
+        ])
+    with pytest.raises(ValueError):
+        state.apply_timer_edits([("Venatus", 0, ("Viorent", 600, "2026-08-04 04:35 AM"))])
+    assert state.timers_stamp() == stamp
+    assert state.load_timers()[0] == ROWS[0]
+
+    changes = state.apply_timer_edits([
+        ("Venatus", 0, ("Venatus II", 660, "2026-08-04 04:35 AM")),
+        ("Viorent", 0, None),
+        (None, None, ("Newboss", 90, "2026-08-04 05:00 AM")),
+    ])
+    assert [(old and old[0], new and new[0]) for old, new in changes] == [
+        ("Venatus", "Venatus II"), ("Viorent", None), (None, "Newboss"),
+    ]
+    assert state.load_timers() == [
+        ("Venatus II", 660, "2026-08-04 04:35 AM", 1),
+        ("Ego", 1260, "2026-08-04 07:00 AM", 1),
+        ("Newboss", 90, "2026-08-04 05:00 AM", 3),
+    ]
+
+
+def test_a_re_added_boss_does_not_reuse_a_version(state):
+    state.update_timer("Ego", 0, "2026-08-04 07:00 AM")
+    state.apply_timer_edits([("Ego", 1, None)])
+    state.apply_timer_edits([(None, None, ("Ego", 1260, "2026-08-04 08:00 AM"))])
+    version = state.load_timers()[-1][3]
+    assert version > 1
+    for stale in (0, 1):  # forms opened before the removal
+        with pytest.raises(TimerConflict):
+            state.update_timer("Ego", stale, "2026-08-04 09:00 AM")
+    assert state.update_timer("Ego", version, "2026-08-04 09:00 AM")
+
+
+def _writes(backend: str) -> float:
+    return sum(value for name, labels, value in METRICS.counters()
+               if name == "state_writes_total" and labels == {"backend": backend, "kind": "timers"})
+
+
+def test_redis_counts_a_retried_write_once(monkeypatch):
+    from redis.client import Pipeline
+
+    client = _redis()
+    state, other = RedisState(client, "test:"), RedisState(client, "test:")
+    state.save_timers(ROWS)
+    multi, raced = Pipeline.multi, []
+
+    def multi_after_a_race(pipe):
+        if len(raced) < races:  # another replica commits between our WATCHed reads and MULTI
+            raced.append(True)
+            other.update_timer("Viorent", len(raced) - 1, "2026-08-04 03:00 PM")
+        return multi(pipe)
+
+    monkeypatch.setattr(Pipeline, "multi", multi_after_a_race)
+    races = 1
+    before = _writes("redis")
+    assert state.update_timer("Venatus", 0, "2026-08-04 02:35 PM")[3] == 1
+    assert _writes("redis") - before == 2  # the other replica's write and ours, not the aborted attempt
+    assert state.timers_stamp() == 3
+
+    races = 2
+    before = _writes("redis")
+    state.apply_timer_edits([("Ego", 0, None)])
+    assert _writes("redis") - before == 2
+    state.apply_timer_edits([])  # nothing changed, nothing written
+    assert _writes("redis") - before == 2
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_defaults_until_the_first_save(tmp_path, backend):
+    state = SQLiteState(tmp_path) if backend == "sqlite" else RedisState(_redis(), "test:")
+    assert state.timers_stamp() == 0 and state.weekly_stamp() == 0
+    assert state.load_timers(ROWS) == ROWS
+    assert state.update_timer("Viorent", 0, "2026-08-04 02:35 PM", ROWS)[3] == 1
+    assert [row[3] for row in state.load_timers(ROWS)] == [0, 1, 0]
+    state.save_weekly([["Clemantis", ["Monday 11:30"]]])
+    assert state.load_weekly([]) == [["Clemantis", ["Monday 11:30"]]]
+
+
+def test_history_paging_and_rollups(state):
+    history = state.history
+    intervals = {"Venatus": 600}
+    history.append("Venatus", "2026-08-04 04:35 AM", "2026-08-04 04:40 AM", "ann", intervals=intervals)
+    history.append_many([
+        ("Venatus", "2026-08-04 02:35 PM", "2026-08-04 02:30 PM"),  # moved backwards: not a kill
+        ("Venatus", "2026-08-04 02:35 PM", "2026-08-05 12:20 AM"),  # 15 min early
+        ("Ego", "a", "b"),
+    ], "bob", intervals=intervals)
+    history.catch_up(intervals)
+
+    assert history.count() == 4
+    assert history.count(boss="Venatus") == 3
+    assert history.count(editor="bob") == 3
+    assert history.count("Venatus", "bob") == 2
+    assert [row["boss"] for row in history.query(limit=2)] == ["Ego", "Venatus"]
+    assert [row["edited_by"] for row in history.query(limit=2, offset=2)] == ["bob", "ann"]
+    assert history.query(offset=4) == []
+    assert history.distinct("boss") == ["Ego", "Venatus"]
+    assert history.distinct("edited_by") == ["ann", "bob"]
+
+    (drift,) = history.drift_stats()
+    assert (drift["boss"], drift["kills"], drift["mean_drift"]) == ("Venatus", 2, -5)
+    assert (drift["p50_drift"], drift["p90_drift"], drift["late_rate"]) == (-15, 5, 0)
+    editors = {row["edited_by"]: (row["edits"], row["kills"], row["mean_drift"]) for row in history.editor_stats()}
+    assert editors == {"ann": (1, 1, 5), "bob": (3, 1, -15)}
+
+
+def test_warn_claims_are_test_and_set(state):
+    key = _spawn_key(5)
+    assert state.warns.claim(key)
+    assert not state.warns.claim(key)
+    assert state.warns.claim(_spawn_key(5, "t2"))
+    state.warns.prune()
+    assert not state.warns.claim(key)
+
+
+def test_redis_claim_expires_after_the_spawn_grace():
+    redis = _redis()
+    state = RedisState(redis, "test:")
+    key = _spawn_key(5)
+    assert state.warns.claim(key)
+    spawn_ts = now_manila().replace(second=0, microsecond=0) + timedelta(minutes=5)
+    expected = spawn_ts.timestamp() + WARN_KEY_GRACE_SECONDS - time.time()
+    assert abs(redis.ttl("test:warn:" + key) - expected) <= 2
+    # a claim for a spawn long past still expires, after a second
+    old = "FIELD|Venatus|2020-01-01 00:00|t1"
+    assert state.warns.claim(old)
+    assert redis.ttl("test:warn:" + old) == 1
+
+
+def _legacy_dir(tmp_path):
+    (tmp_path / "boss_timers.json").write_text(json.dumps([list(row[:3]) for row in ROWS]))
+    (tmp_path / "weekly_bosses.json").write_text(json.dumps([["Clemantis", ["Monday 11:30"]]]))
+    (tmp_path / "boss_history.json").write_text(json.dumps([{
+        "boss": "Venatus", "old_time": "2026-08-04 04:35 AM", "new_time": "2026-08-04 04:37 AM",
+        "edited_at": "2026-08-04 04:40 AM", "edited_by": "old",
+    }]))
+    (tmp_path / "warn_sent.json").write_text(json.dumps([_spawn_key(5), "FIELD|Venatus|2020-01-01 00:00|t1"]))
+    return tmp_path
+
+
+def test_sqlite_imports_the_json_files_once(tmp_path):
+    data_dir = _legacy_dir(tmp_path)
+    state = SQLiteState(data_dir)
+    assert state.load_timers() == [(*row[:3], 0) for row in ROWS]
+    assert state.load_weekly() == [["Clemantis", ["Monday 11:30"]]]
+    assert state.history.count() == 1
+    assert not state.warns.claim(_spawn_key(5))
+
+    state.update_timer("Venatus", 0, "2026-08-04 02:35 PM")
+    (data_dir / "boss_timers.json").write_text("[]")
+    assert SQLiteState(data_dir).load_timers()[0][3] == 1
+
+
+def test_redis_migrates_the_data_directory_once(tmp_path):
+    data_dir = _legacy_dir(tmp_path)
+    redis = _redis()
+    state = open_state(redis, data_dir, "srv")
+    assert isinstance(state, RedisState)
+    assert state.load_timers() == [(*row[:3], 0) for row in ROWS]
+    assert state.load_weekly() == [["Clemantis", ["Monday 11:30"]]]
+    assert state.history.count() == 1
+    assert state.history.drift_stats()[0]["mean_drift"] == 2
+    assert not state.warns.claim(_spawn_key(5))
+    assert redis.keys("bosstimer:srv:warn:*") == [f"bosstimer:srv:warn:{_spawn_key(5)}"]
+
+    # the next replica to start finds it migrated and keeps the newer state
+    state.update_timer("Venatus", 0, "2026-08-04 02:35 PM")
+    again = open_state(redis, data_dir, "srv")
+    assert again.load_timers()[0][3] == 1
+    assert again.history.count() == 1
+    # another tenant on the same server is keyed apart
+    assert open_state(redis, tmp_path / "missing", "other").load_timers([]) == []
+
+
+def test_open_state_rejects_an_unknown_url(tmp_path):
+    with pytest.raises(ValueError):
+        open_state("postgres://localhost/db", tmp_path)
+    assert isinstance(open_state(None, tmp_path), SQLiteState)
+
+
+def test_redis_migration_failing_partway_is_retried(tmp_path, monkeypatch):
+    data_dir = _legacy_dir(tmp_path)
+    redis = _redis()
+
+    def fail(self, claims):
+        raise ConnectionError("lost the server")
+
+    monkeypatch.setattr(RedisWarnStore, "_import", fail)  # the last step: history is already in
+    with pytest.raises(ConnectionError):
+        open_state(redis, data_dir, "srv")
+    assert not redis.exists("bosstimer:srv:migrated") and not redis.exists("bosstimer:srv:migrating")
+
+    monkeypatch.undo()
+    state = open_state(redis, data_dir, "srv")
+    assert redis.exists("bosstimer:srv:migrated")
+    assert state.history.count() == 1  # not twice
+    assert not state.warns.claim(_spawn_key(5))
+
+
+def test_redis_replicas_wait_for_a_migration_in_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MIGRATION_POLL_SECONDS", 0.01)
+    data_dir = _legacy_dir(tmp_path)
+    redis = _redis()
+    redis.set("bosstimer:srv:migrating", "another replica")
+    opened = []
+    waiter = threading.Thread(target=lambda: opened.append(open_state(redis, data_dir, "srv")))
+    waiter.start()
+    time.sleep(0.1)
+    assert waiter.is_alive() and not opened  # not serving the defaults meanwhile
+
+    RedisState(redis, "bosstimer:srv:")._import_local(data_dir)  # what the other replica does
+    redis.set("bosstimer:srv:migrated", 1)
+    redis.delete("bosstimer:srv:migrating")
+    waiter.join(5)
+    assert opened[0].load_timers()[0][3] == 0 and opened[0].history.count() == 1
+
+
+def test_redis_migration_lock_left_by_a_dead_replica_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MIGRATION_POLL_SECONDS", 0.01)
+    redis = _redis()
+    redis.set("bosstimer:srv:migrating", "dead replica", px=50)
+    state = open_state(redis, _legacy_dir(tmp_path), "srv")
+    assert state.history.count() == 1 and redis.exists("bosstimer:srv:migrated")
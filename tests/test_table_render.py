@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from table_render import CachedTable, countdown_color  # noqa: E402
+
+SPAWN = 1_786_000_000
+
+
+def _rows(spawns, builds):
+    def cells(name):
+        def build():
+            builds.append(name)
+            return (name, 600)
+        return build
+
+    return [(name, spawn_ts, cells(name)) for name, spawn_ts in spawns]
+
+
+def test_static_cells_are_built_once_and_countdowns_every_render():
+    table, builds = CachedTable(["Boss Name", "Interval (min)", "Countdown"]), []
+    spawns = [("Venatus", SPAWN + 600), ("Ego", SPAWN + 30)]
+
+    first = table.render(_rows(spawns, builds), SPAWN)
+    second = table.render(_rows(spawns, builds), SPAWN + 20)
+    assert builds == ["Venatus", "Ego"]  # the second render was all cache hits
+    assert "<td>Venatus</td><td>600</td>" in first and "<td>Venatus</td><td>600</td>" in second
+    assert f"data-spawn='{SPAWN + 30}' style='color:red'>00:00:30" in first
+    assert f"data-spawn='{SPAWN + 30}' style='color:red'>00:00:10" in second
+    assert first.index("Venatus") < first.index("Ego")  # the caller's order, not the cache's
+
+
+def test_a_row_is_rebuilt_only_when_its_spawn_changes():
+    table, builds = CachedTable(["Boss Name", "Interval (min)", "Countdown"]), []
+    table.render(_rows([("Venatus", SPAWN), ("Ego", SPAWN)], builds), SPAWN)
+    builds.clear()
+
+    html = table.render(_rows([("Venatus", SPAWN + 36000), ("Ego", SPAWN)], builds), SPAWN)
+    assert builds == ["Venatus"]
+    assert f"data-spawn='{SPAWN + 36000}'" in html
+
+
+def test_cells_and_headers_are_escaped():
+    table = CachedTable(["<Boss>"])
+    html = table.render([("x", SPAWN, lambda: ("<b>Tom & Jerry</b>",))], SPAWN)
+    assert "<th>&lt;Boss&gt;</th>" in html
+    assert "<td>&lt;b&gt;Tom &amp; Jerry&lt;/b&gt;</td>" in html
+    assert html.startswith('<table border="1" class="dataframe">') and html.endswith("</table>")
+
+
+def test_countdown_color_thresholds():
+    assert countdown_color(30) == "red"
+    assert countdown_color(60) == "red"
+    assert countdown_color(61) == "orange"
+    assert countdown_color(300) == "orange"
+    assert countdown_color(301) == "green"
+    assert countdown_color(301, ok_color="white") == "white"
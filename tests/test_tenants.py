@@ -0,0 +1,83 @@
+import json
+import sqlite3
+from datetime import timedelta
+
+import pytest
+
+from boss_engine import EventBroadcaster, TenantConfig, TenantHub, now_manila
+from boss_engine.engine import OUTBOX_FILE
+
+ROWS = [
+    ("Venatus", 600, "2026-08-04 04:35 AM", 0),
+    ("Ego", 1260, "2026-08-04 06:35 AM", 0),
+]
+
+
+def _target(name):
+    return {"name": name, "webhook": f"https://discord.invalid/api/webhooks/{name}", "role_id": ""}
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def hub(request, tmp_path):
+    """Two tenants with the same roster and target names, sharing one process (never started)."""
+    storage = None
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        storage = fakeredis.FakeRedis(decode_responses=True)
+    configs = [
+        TenantConfig(slug, targets=[_target("discord_1")], default_timers=ROWS, default_weekly=[])
+        for slug in ("alpha", "beta")
+    ]
+    return TenantHub(configs, tmp_path, storage=storage)
+
+
+def test_each_tenant_has_its_own_data_dir(hub, tmp_path):
+    assert hub["alpha"].data_dir == tmp_path / "tenants" / "alpha"
+    assert hub["beta"].data_dir == tmp_path / "tenants" / "beta"
+    assert hub["alpha"].data_dir.is_dir() and hub["beta"].data_dir.is_dir()
+    assert hub["alpha"].dispatcher is hub["beta"].dispatcher  # the workers are shared, the data is not
+
+
+def test_timers_and_history_stay_with_their_tenant(hub):
+    alpha, beta = hub["alpha"], hub["beta"]
+    row = alpha.timers.get().timers[0]
+    alpha.set_last_time("Venatus", row.last_time + timedelta(minutes=7), row.version, by="alice")
+    alpha.log_edit("Venatus", "04:35 AM", "04:42 AM", "alice")
+    alpha.save_weekly([("Clemantis", ["Monday 11:30"])])
+
+    assert alpha.state.timers_stamp() == 1 and beta.state.timers_stamp() == 0
+    assert alpha.state.load_timers()[0][2] == "2026-08-04 04:42 AM"
+    assert beta.state.load_timers(ROWS) == ROWS  # still the defaults: nothing saved for beta
+    assert beta.load_weekly() == []
+    assert alpha.history.count() == 1 and beta.history.count() == 0
+
+    beta.set_last_time("Venatus", row.last_time, 0)  # same name and version, other tenant: no conflict
+    assert beta.state.load_timers()[0][3] == 1
+
+
+def test_events_are_tagged_and_streamed_per_tenant(hub):
+    hub["alpha"].publish("kill", {"boss": "Venatus"})
+    hub["beta"].publish("kill", {"boss": "Ego"})
+    hub["alpha"].publish("kill", {"boss": "Ego"})
+    assert [tenant for _, tenant, _, _ in hub.events.since(0)] == ["alpha", "beta", "alpha"]
+
+    broadcaster = EventBroadcaster(hub.events, poll_interval=0.01)
+    stream = broadcaster.subscribe("beta", 0)
+    assert next(stream) == b"retry: 3000\n\n"
+    frames = next(stream).decode()
+    assert frames.count("event: kill") == 1 and '"Ego"' in frames and "Venatus" not in frames
+
+
+def test_warnings_are_claimed_and_keyed_per_tenant(hub):
+    spawn = (now_manila() + timedelta(minutes=4)).replace(second=0, microsecond=0)
+    handles = [hub[slug].send_spawn_warning("FIELD", "Venatus", spawn) for slug in ("alpha", "beta")]
+    assert [list(handle.keys.values()) for handle in handles] == [
+        [f"alpha|FIELD|Venatus|{spawn:%Y-%m-%d %H:%M}|discord_1"],
+        [f"beta|FIELD|Venatus|{spawn:%Y-%m-%d %H:%M}|discord_1"],
+    ]
+    assert hub["alpha"].send_spawn_warning("FIELD", "Venatus", spawn).keys == {}  # already claimed
+
+    with sqlite3.connect(hub.root / OUTBOX_FILE) as db:
+        rows = db.execute("SELECT key, payload FROM outbox ORDER BY key").fetchall()
+    assert [key.split("|")[0] for key, _ in rows] == ["alpha", "beta"]
+    assert all("**Venatus**" in json.loads(payload)["content"] for _, payload in rows)
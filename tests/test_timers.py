@@ -0,0 +1,114 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from boss_engine import (
+    TIME_FMT, SQLiteState, TimerCache, TimerConflict, TimerStore, next_spawn_after, parse_time_str,
+)
+
+LAST = "2026-08-04 04:35 AM"
+
+
+def _store():
+    return TimerStore([("Venatus", 600, LAST, 3), ("Ego", 60, LAST, 0)])
+
+
+def _cache(data_dir):
+    return TimerCache(SQLiteState(data_dir), default=[("Venatus", 600, LAST, 0), ("Ego", 60, LAST, 0)])
+
+
+def test_update_next_catches_up_by_whole_intervals():
+    store = _store()
+    now = parse_time_str(LAST) + timedelta(minutes=605)
+    store.update_next(now)
+    venatus, ego = store
+    assert venatus.last_time == parse_time_str(LAST) + timedelta(minutes=600)
+    assert venatus.next_time == parse_time_str(LAST) + timedelta(minutes=1200)
+    assert ego.next_time - now == timedelta(minutes=55)
+    assert (venatus.version, ego.version) == (3, 0)
+
+
+def test_update_next_never_moves_back():
+    store = _store()
+    later = parse_time_str(LAST) + timedelta(minutes=1300)
+    store.update_next(later)
+    caught_up = store.last.copy(), store.next.copy()
+    store.update_next(later - timedelta(minutes=700))  # a session with an older "now"
+    store.update_next(later)
+    assert (store.last == caught_up[0]).all() and (store.next == caught_up[1]).all()
+
+
+@pytest.mark.parametrize("minutes", [0, 1, 599, 600, 601, 1200, 10 * 365 * 24 * 60 + 7])
+def test_next_spawn_after_agrees_with_update_next(minutes):
+    last = parse_time_str(LAST)
+    now = last + timedelta(minutes=minutes)
+    store = TimerStore([("Venatus", 600, LAST)])
+    store.update_next(now)
+    assert next_spawn_after(last, 600, now) == store[0].next_time
+
+
+def test_a_spawn_due_right_now_is_still_the_next_one():
+    last = parse_time_str(LAST)
+    assert next_spawn_after(last, 10, last + timedelta(minutes=10)) == last + timedelta(minutes=10)
+    assert next_spawn_after(last, 10, last) == last + timedelta(minutes=10)
+    assert next_spawn_after(last, 10, last + timedelta(minutes=10, microseconds=1)) == last + timedelta(minutes=20)
+
+
+def test_entries_are_read_only_views():
+    entry = _store()[0]
+    with pytest.raises(AttributeError):
+        entry.last_time = parse_time_str(LAST)
+    with pytest.raises(AttributeError):
+        entry.next_time = parse_time_str(LAST)
+    assert entry.last_time.strftime(TIME_FMT) == LAST
+
+
+def test_set_last_time_publishes_a_new_snapshot(tmp_path):
+    cache = _cache(tmp_path)
+    before = cache.get()
+    assert cache.get() is before
+    killed = parse_time_str("2026-08-04 02:35 PM")
+    row = cache.set_last_time("Venatus", killed, before.timers[0].version)
+    assert row == ("Venatus", 600, "2026-08-04 02:35 PM", 1)
+    after = cache.get()
+    assert after.version == before.version + 1
+    assert after.timers[0].last_time == killed and after.timers[0].version == 1
+    assert before.timers[0].last_time == parse_time_str(LAST)  # old readers keep their view
+    # another process's cache sees the write through the stamp
+    assert _cache(tmp_path).get().timers[0].version == 1
+
+
+def test_set_last_time_with_a_stale_version_conflicts(tmp_path):
+    cache, other = _cache(tmp_path), _cache(tmp_path)
+    stale = other.get()
+    cache.set_last_time("Venatus", parse_time_str("2026-08-04 02:35 PM"), 0)
+    with pytest.raises(TimerConflict) as conflict:
+        other.set_last_time("Venatus", parse_time_str("2026-08-04 03:00 PM"), stale.timers[0].version)
+    assert conflict.value.boss_name == "Venatus"
+    assert conflict.value.current_row[2:] == ("2026-08-04 02:35 PM", 1)
+    assert other.get() is not stale and other.get().timers[0].last_time == parse_time_str("2026-08-04 02:35 PM")
+    with pytest.raises(KeyError):
+        cache.set_last_time("Nobody", parse_time_str(LAST), 0)
+
+
+def test_racing_saves_of_one_version_have_one_winner(tmp_path):
+    cache = _cache(tmp_path)
+    cache.get()
+    wins, conflicts = [], []
+    start = threading.Barrier(8)
+
+    def save(i):
+        start.wait()
+        try:
+            wins.append(cache.set_last_time("Ego", parse_time_str(LAST) + timedelta(minutes=i), 0))
+        except TimerConflict:
+            conflicts.append(i)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (len(wins), len(conflicts)) == (1, 7)
+    assert cache.get().timers[1].last_time.strftime(TIME_FMT) == wins[0][2]
@@ -0,0 +1,259 @@
+import sqlite3
+import time
+import types
+from datetime import datetime
+
+import pytest
+
+from boss_engine import METRICS, CircuitBreaker, TokenBucket, WebhookDispatcher, WebhookOutbox, webhooks
+from boss_engine.webhooks import BREAKER_COOLDOWN_MAX, BREAKER_PROBE_WAIT, WEBHOOK_BACKOFF_MAX, WEBHOOK_MAX_ATTEMPTS
+
+
+URL = "https://discord.com/api/webhooks/1/token"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the webhooks module's clock; advance it with clock.now += seconds."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(webhooks, "time", types.SimpleNamespace(
+        monotonic=lambda: clock.now, time=lambda: clock.now, sleep=lambda seconds: None))
+    return clock
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30.0)
+    for status in (500, None):
+        breaker.record(status)
+    breaker.record(200)  # a success in between resets the count
+    for status in (503, 404, None):
+        assert breaker.allow() == 0
+        breaker.record(status)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.is_open()
+    assert breaker.snapshot()["last_error"] == "network error"
+    assert breaker.allow() == 30.0
+
+    clock.now += 29.5
+    assert breaker.allow() == 0.5
+    clock.now += 0.5
+    assert breaker.allow() == 0  # the probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN and not breaker.is_open()
+    assert breaker.allow() == BREAKER_PROBE_WAIT  # everyone else waits for it
+    breaker.record(204)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot() == {"state": "closed", "failures": 0, "last_error": "network error",
+                                  "last_ok": clock.now, "retry_in": 0.0}
+    assert breaker.allow() == 0 and breaker.allow() == 0
+
+
+def test_failed_probe_doubles_the_cooldown_up_to_the_cap(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30.0)
+    breaker.record(502)
+    waits = []
+    for _ in range(7):
+        clock.now += breaker.allow()
+        assert breaker.allow() == 0
+        breaker.record(502)
+        waits.append(breaker.snapshot()["retry_in"])
+    assert waits == [60.0, 120.0, 240.0, 480.0, BREAKER_COOLDOWN_MAX, BREAKER_COOLDOWN_MAX, BREAKER_COOLDOWN_MAX]
+
+    clock.now += breaker.allow()
+    assert breaker.allow() == 0
+    breaker.record(200)
+    breaker.record(500)  # closed again, with the base cooldown
+    assert breaker.snapshot()["retry_in"] == 30.0
+
+
+def test_rate_limits_do_not_open_the_breaker(clock):
+    breaker = CircuitBreaker(threshold=2)
+    for status in (429, 429, 400, 429):
+        breaker.record(status)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_bucket_bursts_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.5, burst=5)
+    assert [bucket.try_acquire() for _ in range(5)] == [0] * 5
+    assert bucket.try_acquire() == pytest.approx(0.4)
+    clock.now += 0.2
+    assert bucket.try_acquire() == pytest.approx(0.2)  # half a token so far
+    clock.now += 0.2
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.4)
+
+    clock.now += 100  # refills to the burst, not beyond
+    assert [bucket.try_acquire() for _ in range(6)][-2:] == [0, pytest.approx(0.4)]
+
+
+def test_bucket_honors_discords_rate_limit_headers(clock):
+    bucket = TokenBucket(rate=2.5, burst=5)
+    bucket.observe({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "1.5"})
+    assert bucket.try_acquire() == 1.5
+    bucket.observe({}, retry_after=3.0)
+    bucket.observe({"X-RateLimit-Remaining": "2"})  # not exhausted: no pause
+    bucket.observe({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "soon"})
+    clock.now += 2.0
+    assert bucket.try_acquire() == 1.0
+    clock.now += 1.0
+    assert bucket.try_acquire() == 0
+
+
+@pytest.fixture
+def dispatcher(tmp_path, monkeypatch):
+    """A dispatcher that is driven by hand; its posts are recorded, not sent."""
+    dispatcher = WebhookDispatcher(WebhookOutbox(tmp_path / "outbox.db"))
+    dispatcher.posted = []
+
+    def post(webhook_url, payload, session=None):
+        dispatcher.posted.append(payload["content"])
+        return dispatcher.responses.pop(0) if dispatcher.responses else (204, None, {})
+
+    dispatcher.responses = []
+    monkeypatch.setattr(webhooks, "_post_webhook", post)
+    yield dispatcher
+    dispatcher.stop()
+
+
+def _run_once(dispatcher):
+    """One pass of the loop; the posts it starts run after it, in order, as if each took a while."""
+    started = []
+    dispatcher._pool = types.SimpleNamespace(submit=lambda fn, *args: started.append((fn, args)),
+                                             shutdown=lambda wait=True: None)
+    wait = dispatcher._dispatch_due()
+    for fn, args in started:
+        fn(*args)
+    return wait
+
+
+def _targets(n):
+    return [{"name": f"t{i}", "webhook": URL} for i in range(n)]
+
+
+def _row(dispatcher, key):
+    """(status, attempts, next_attempt, last_error) of one outbox row."""
+    with sqlite3.connect(dispatcher.outbox.path) as db:
+        return db.execute("SELECT status, attempts, next_attempt, last_error FROM outbox WHERE key = ?",
+                          (key,)).fetchone()
+
+
+def _send(dispatcher, *responses, expires_at=None):
+    dispatcher.responses.extend(responses)
+    (key,) = dispatcher.broadcast(lambda target: "hi", _targets(1), expires_at=expires_at).keys.values()
+    _run_once(dispatcher)
+    return key
+
+
+def test_2xx_is_delivered_and_other_4xx_fail_without_a_retry(clock, dispatcher):
+    assert _row(dispatcher, _send(dispatcher, (200, None, {})))[:2] == ("delivered", 1)
+    key = _send(dispatcher, (404, None, {}))
+    assert _row(dispatcher, key) == ("failed", 1, 0.0, "HTTP 404")
+    clock.now += 3600
+    _run_once(dispatcher)
+    assert len(dispatcher.posted) == 2
+
+
+def test_429_waits_exactly_retry_after(clock, dispatcher):
+    key = _send(dispatcher, (429, 7.5, {}))
+    assert _row(dispatcher, key) == ("pending", 1, clock.now + 7.5, "HTTP 429")
+    assert dispatcher._breaker_for(URL).state == CircuitBreaker.CLOSED
+    clock.now += 7
+    _run_once(dispatcher)
+    assert len(dispatcher.posted) == 1  # not due yet
+    clock.now += 0.5
+    _run_once(dispatcher)
+    assert _row(dispatcher, key)[:2] == ("delivered", 2)
+
+
+def test_5xx_and_network_errors_back_off_exponentially_with_jitter(clock, dispatcher, monkeypatch):
+    jitter = {"factor": 1.2}
+    monkeypatch.setattr(webhooks, "random", types.SimpleNamespace(uniform=lambda low, high: jitter["factor"]))
+    key = _send(dispatcher, (503, None, {}))
+    assert _row(dispatcher, key) == ("pending", 1, pytest.approx(clock.now + 2.0 * 1.2), "HTTP 503")
+    clock.now += 2.4
+    jitter["factor"] = 0.8
+    dispatcher.responses.append((None, None, {}))
+    _run_once(dispatcher)
+    assert _row(dispatcher, key) == ("pending", 2, pytest.approx(clock.now + 4.0 * 0.8), "network error")
+
+    monkeypatch.setattr(webhooks, "WEBHOOK_MAX_ATTEMPTS", 20)
+    dispatcher.outbox.mark(key, "pending", 12, clock.now)
+    dispatcher._breaker_for(URL).record(200)
+    dispatcher.responses.append((502, None, {}))
+    _run_once(dispatcher)
+    assert _row(dispatcher, key)[2] == pytest.approx(clock.now + WEBHOOK_BACKOFF_MAX * 0.8)  # capped
+
+
+def test_the_last_attempt_fails_the_row(clock, dispatcher):
+    dispatcher.responses.append((500, None, {}))
+    (key,) = dispatcher.broadcast(lambda target: "hi", _targets(1)).keys.values()
+    dispatcher.outbox.mark(key, "pending", WEBHOOK_MAX_ATTEMPTS - 1, clock.now)
+    _run_once(dispatcher)
+    assert _row(dispatcher, key) == ("failed", WEBHOOK_MAX_ATTEMPTS, 0.0, "HTTP 500")
+
+
+def test_rows_past_their_expiry_are_dropped_unsent(clock, dispatcher):
+    key = _send(dispatcher, expires_at=datetime.fromtimestamp(clock.now - 1))
+    assert _row(dispatcher, key)[:2] == ("expired", 0) and dispatcher.posted == []
+
+
+def test_rows_held_by_an_open_circuit_leave_the_rate_tokens(clock, dispatcher):
+    breaker = dispatcher._breaker_for(URL)
+    for _ in range(3):
+        breaker.record(500)
+    dispatcher.broadcast(lambda target: target["name"], _targets(8))
+    _run_once(dispatcher)
+    assert dispatcher.posted == []
+    bucket = dispatcher._bucket_for(URL)
+    assert [bucket.try_acquire() for _ in range(5)] == [0] * 5  # the whole burst is still there
+    bucket._tokens = 5.0
+
+    clock.now += 30  # the parked rows and the probe come due together
+    _run_once(dispatcher)
+    assert len(dispatcher.posted) == 1 and breaker.state == CircuitBreaker.CLOSED
+    clock.now += 1  # the rest waited out the probe; now they go at the bucket's pace
+    _run_once(dispatcher)
+    assert len(dispatcher.posted) == 6
+
+
+def test_a_probe_without_a_token_is_given_back(clock, dispatcher):
+    breaker = dispatcher._breaker_for(URL)
+    for _ in range(3):
+        breaker.record(None)
+    clock.now += 30
+    bucket = dispatcher._bucket_for(URL)
+    bucket._tokens = 0.0
+    bucket._updated = clock.now
+    dispatcher.broadcast(lambda target: "hi", _targets(1))
+    assert _run_once(dispatcher) == pytest.approx(0.4)
+    assert dispatcher.posted == []
+    assert breaker.allow() == 0  # still free to be the probe
+
+
+def test_rows_in_flight_do_not_count_as_due(tmp_path):
+    outbox = WebhookOutbox(tmp_path / "outbox.db")
+    assert outbox.next_due_in() is None
+    outbox.enqueue("a", "t", URL, {"content": "a"})
+    outbox.enqueue("b", "t", URL, {"content": "b"})
+    outbox.mark("b", "pending", 1, webhooks.time.time() + 60)
+    assert outbox.next_due_in() == 0
+    assert 59 < outbox.next_due_in(skip={"a"}) <= 60
+    assert outbox.next_due_in(skip={"a", "b"}) is None
+
+
+def test_dispatcher_loop_errors_are_counted(dispatcher, monkeypatch):
+    def broken(limit=50):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(dispatcher.outbox, "due", broken)
+    errors = {"error": "OperationalError"}
+
+    def counted():
+        return sum(value for name, labels, value in METRICS.counters()
+                   if name == "webhook_dispatcher_errors_total" and labels == errors)
+
+    before = counted()
+    dispatcher.start()
+    deadline = time.monotonic() + 5
+    while counted() == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert counted() > before and dispatcher._thread.is_alive()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from boss_engine import MANILA, WEEK_SECONDS, WeeklySchedule, parse_weekly_slot
+
+DATA = [
+    ("Clemantis", ["Monday 11:30", "Thursday 19:00"]),
+    ("Benji", ["Sunday 21:00"]),
+    ("Milavy", ["Monday 11:30"]),
+]
+MONDAY = datetime(2026, 8, 3, tzinfo=MANILA)  # a Monday, 00:00
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_upcoming_wraps_into_next_week():
+    schedule = WeeklySchedule(DATA)
+    upcoming = list(schedule.upcoming(_at(6, 22)))  # Sunday night, after the last slot
+    assert upcoming == [
+        ("Clemantis", _at(7, 11, 30)), ("Milavy", _at(7, 11, 30)), ("Clemantis", _at(10, 19)), ("Benji", _at(13, 21)),
+    ]
+    assert list(schedule.upcoming(_at(3, 20)))[:2] == [("Benji", _at(6, 21)), ("Clemantis", _at(7, 11, 30))]
+
+
+def test_a_spawn_at_now_is_already_past():
+    schedule = WeeklySchedule(DATA)
+    now = _at(3, 19)  # Thursday 19:00, Clemantis's slot
+    assert schedule.next_spawn(now) == ("Benji", _at(6, 21))
+    assert schedule.spawns_within(now, 0) == []
+    assert schedule.spawns_within(now - timedelta(seconds=1), 1) == [("Clemantis", now)]
+    assert list(schedule.occurrences(now, now.timestamp())) == []
+    assert list(schedule.occurrences(now - timedelta(seconds=1), now.timestamp())) == [
+        (int(now.timestamp()), "Clemantis"),
+    ]
+
+
+def test_occurrences_walk_week_after_week():
+    schedule = WeeklySchedule(DATA)
+    start = _at(6, 22)
+    spawns = list(schedule.occurrences(start, start.timestamp() + 3 * WEEK_SECONDS))
+    assert len(spawns) == 3 * len(schedule)
+    assert [ts for ts, _ in spawns] == sorted(ts for ts, _ in spawns)
+    assert spawns[0] == (int(_at(7, 11, 30).timestamp()), "Clemantis")
+    assert spawns[-1] == (int(_at(27, 21).timestamp()), "Benji")
+
+
+def test_spawns_within_stops_at_the_horizon():
+    schedule = WeeklySchedule(DATA)
+    assert schedule.spawns_within(_at(0, 11), 30 * 60) == [("Clemantis", _at(0, 11, 30)), ("Milavy", _at(0, 11, 30))]
+    assert schedule.spawns_within(_at(0, 11), 29 * 60) == []
+
+
+def test_empty_schedule():
+    schedule = WeeklySchedule([])
+    assert len(schedule) == 0
+    assert list(schedule.upcoming(MONDAY)) == []
+    assert schedule.next_spawn(MONDAY) is None
+    assert schedule.spawns_within(MONDAY, WEEK_SECONDS) == []
+    assert list(schedule.occurrences(MONDAY, MONDAY.timestamp() + WEEK_SECONDS)) == []
+
+
+def test_slots_are_validated():
+    assert parse_weekly_slot("sunday 23:59") == WEEK_SECONDS - 60
+    for bad in ("Funday 11:30", "Monday", "Monday 25:00"):
+        with pytest.raises(ValueError):
+            parse_weekly_slot(bad)
@@ -1,25 +1,20 @@
 import streamlit as st
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-from streamlit_autorefresh import st_autorefresh
-import pandas as pd
-import requests
-import json
+import streamlit.components.v1 as components
+from boss_engine import (
+    FORECAST_HORIZONS, HISTORY_COLUMNS, LATE_KILL_MINUTES, MANILA, METRICS, TIME_FMT, WEEK_SECONDS, Engine,
+    HistoryStore, TenantConfig, TenantHub, TimerConflict, TimerSnapshot, TimerStore, WeeklySchedule, format_timedelta,
+    manage_order, now_manila, parse_time_str, row_layout, tenant_configs,
+)
+from page_assets import BANNER_CSS, BANNER_HTML, BUTTON_CSS, COUNTDOWN_TICKER_JS, FIELD_TABLE_CSS, IK_CSS
+from table_render import CachedTable, countdown_color
 from pathlib import Path
+import html
+import math
 import time
 
-# ------------------- Config -------------------
-MANILA = ZoneInfo("Asia/Manila")
-
-DATA_FILE = Path("boss_timers.json")
-HISTORY_FILE = Path("boss_history.json")
-WARN_FILE = Path("warn_sent.json")
-
-ADMIN_PASSWORD = st.secrets.get("ADMIN_PASSWORD", "bestgame")
-WARNING_WINDOW_SECONDS = 5 * 60  # 5 minutes
-
 # ------------------- Discord (TWO TARGETS) -------------------
-DISCORD_TARGETS = [
+DEFAULT_DISCORD_TARGETS = [
     {
         "name": "discord_1",
         "webhook": "https://discord.com/api/webhooks/1474251528377466932/gO9aIgcH4F8-OFme1G2ghp4frY2d-1FZO5EGcLFlw5D1pdyYBUJo_FWfNf8qnCtJboXc1",
@@ -33,328 +28,163 @@ DISCORD_TARGETS = [
 ]
 
 
-def _post_webhook(webhook_url: str, payload: dict) -> bool:
-    if not webhook_url or "discord.com/api/webhooks/" not in webhook_url:
-        return False
-
+@st.cache_resource
+def load_settings() -> dict:
+    """
+    st.secrets parsed once per process.
+    ADMIN_PASSWORD and (optionally) a DISCORD_TARGETS list override the defaults above;
+    METRICS_FILE turns on the Prometheus text-file export.
+    STORAGE_URL (a redis:// URL) keeps timers, history and warn claims in Redis so several
+    replicas share them; without it they are SQLite files next to the app.
+    ALERT_STAGES ({boss or "*": [minutes before spawn]}, 0 = "spawning now") replaces the single
+    5-minute warning; a Discord target may also carry its own alert_stages list.
+
+    A [TENANTS.<slug>] table per game server serves several servers from this process
+    (see boss_engine.TenantConfig.from_dict for its keys); without it there is one server.
+    """
     try:
-        r = requests.post(webhook_url, json=payload, timeout=10)
+        secrets = dict(st.secrets)
+    except Exception:  # no secrets.toml
+        secrets = {}
+    admin_password = secrets.get("ADMIN_PASSWORD", "bestgame")
+    discord_targets = [dict(t) for t in secrets.get("DISCORD_TARGETS", DEFAULT_DISCORD_TARGETS)]
+    tenants = tenant_configs(secrets, discord_targets)
+    return {
+        "admin_password": admin_password,
+        "discord_targets": discord_targets,
+        "metrics_file": secrets.get("METRICS_FILE"),
+        "storage": secrets.get("STORAGE_URL"),
+        "tenants": {cfg.slug: cfg for cfg in tenants},
+    }
 
-        # Discord rate limit
-        if r.status_code == 429:
-            try:
-                data = r.json()
-                retry_after = float(data.get("retry_after", 1.0))
-            except Exception:
-                retry_after = 1.0
 
-            time.sleep(min(retry_after, 2.5))
-            r = requests.post(webhook_url, json=payload, timeout=10)
+DISCORD_TARGETS = load_settings()["discord_targets"]
+METRICS_FILE = load_settings()["metrics_file"]
+STORAGE_URL = load_settings()["storage"]
+TENANTS = load_settings()["tenants"]
 
-        return 200 <= r.status_code < 300
-    except Exception:
-        return False
 
+# ------------------- Engines (one hub per server process) -------------------
+@st.cache_resource
+def get_hub() -> TenantHub:
+    """Every tenant's engine plus the one notifier thread and webhook dispatcher they share."""
+    return TenantHub(TENANTS.values(), Path("."), METRICS_FILE and Path(METRICS_FILE), STORAGE_URL).start()
 
-def send_discord_message_per_target(message_builder) -> dict:
-    """
-    message_builder: function(target_dict) -> message_str
-    Returns: dict {target_name: True/False}
-    """
-    results = {}
-    for target in DISCORD_TARGETS:
-        msg = message_builder(target)
-        ok = _post_webhook(target.get("webhook", ""), {"content": msg})
-        results[target.get("name", "unknown")] = ok
-    return results
 
+def current_tenant() -> TenantConfig:
+    return TENANTS[st.session_state.tenant]
 
-# ------------------- Helpers -------------------
-def now_manila() -> datetime:
-    return datetime.now(tz=MANILA)
 
+def get_engine() -> Engine:
+    """Timer state, schedules and history of the game server this session is looking at."""
+    return get_hub()[st.session_state.tenant]
 
-def format_timedelta(td: timedelta) -> str:
-    total_seconds = int(td.total_seconds())
-    if total_seconds < 0:
-        return "00:00:00"
-    days, rem = divmod(total_seconds, 86400)
-    hours, rem = divmod(rem, 3600)
-    minutes, seconds = divmod(rem, 60)
-    if days > 0:
-        return f"{days}d {hours:02}:{minutes:02}:{seconds:02}"
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
 
+def get_timer_snapshot() -> TimerSnapshot:
+    return get_engine().snapshot()
 
-def logout_and_go_world():
-    st.session_state.auth = False
-    st.session_state.username = ""
-    goto("world")
 
+def set_last_time(boss_name: str, last_time: datetime, expected_version: int, reason: str = "edit"):
+    """
+    Compare-and-swap one boss's last spawn (raises TimerConflict) and publish a new snapshot,
+    plus a "kill" / "edit" event for the API's event stream.
+    """
+    by = st.session_state.get("username", "Unknown")
+    return get_engine().set_last_time(boss_name, last_time, expected_version, reason, by)
 
-# ------------------- Default Boss Data -------------------
-default_boss_data = [
-    ("Venatus", 600, "2026-08-04 04:35 AM"),
-    ("Viorent", 600, "2026-08-04 04:35 AM"),
-    ("Lady Dalia", 1080, "2026-08-04 12:54 AM"),
-    ("Ego", 1260, "2026-08-04 06:35 AM"),
-    ("Livera", 1440, "2026-08-03 12:37 PM"),
-    ("Araneo", 1440, "2026-08-03 12:40 PM"),
-    ("Undomiel", 1440, "2026-08-03 12:42 PM"),
-    ("General Aquleus", 1740, "2026-08-03 05:51 PM"),
-    ("Amentis", 1740, "2026-08-03 05:55 PM"),
-    ("Baron Braudmore", 1920, "2026-08-03 08:38 PM"),
-    ("Gareth", 1920, "2026-08-03 08:44 PM"),
-    ("Catena", 2100, "2026-08-03 11:36 PM"),
-    ("Larba", 2100, "2026-08-03 11:40 PM"),
-    ("Shuliar", 2100, "2026-08-03 11:43 PM"),
-    ("Titore", 2220, "2026-08-04 01:49 AM"),
-    ("Wanitas", 2880, "2026-08-02 12:45 PM"),
-    ("Metus", 2880, "2026-08-02 12:46 PM"),
-    ("Duplican", 2880, "2026-08-02 12:48 PM"),
-    ("Asta", 3720, "2026-08-02 12:39 PM"),
-    ("Ordo", 3720, "2026-08-02 12:41 PM"),
-    ("Secreta", 3720, "2026-08-02 12:43 PM"),
-    ("Supore", 3720, "2026-08-02 12:44 PM"),
-]
 
-# ------------------- JSON Persistence -------------------
-def load_boss_data():
-    if DATA_FILE.exists():
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, list) else default_boss_data.copy()
-    return default_boss_data.copy()
+def get_weekly_schedule() -> WeeklySchedule:
+    """Process-wide compiled schedule; rebuilt only when the saved schedule changes."""
+    return get_engine().schedule()
 
 
-def save_boss_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+def weekly_stamp():
+    return get_engine().weekly.stamp()
 
 
-# ------------------- Global Warn Storage -------------------
-def load_warn_sent() -> dict:
-    if WARN_FILE.exists():
-        try:
-            with open(WARN_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return data if isinstance(data, dict) else {}
-        except Exception:
-            return {}
-    return {}
+def load_weekly_data():
+    return get_engine().load_weekly()
 
 
-def save_warn_sent(warn_dict: dict) -> None:
-    # keep the file from growing forever
-    if len(warn_dict) > 2000:
-        warn_dict = dict(list(warn_dict.items())[-1500:])
+def save_weekly_data(data):
+    get_engine().save_weekly(data, st.session_state.get("username", "Unknown"))
 
-    with open(WARN_FILE, "w", encoding="utf-8") as f:
-        json.dump(warn_dict, f, indent=2)
 
+def get_history_store() -> HistoryStore:
+    return get_engine().history
 
-# ------------------- Edit History -------------------
-def log_edit(boss_name: str, old_time: str, new_time: str):
-    history = []
-    if HISTORY_FILE.exists():
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
 
+def log_edit(boss_name: str, old_time: str, new_time: str):
     edited_by = st.session_state.get("username", "Unknown")
-    entry = {
-        "boss": boss_name,
-        "old_time": old_time,
-        "new_time": new_time,
-        "edited_at": now_manila().strftime("%Y-%m-%d %I:%M %p"),
-        "edited_by": edited_by,
-    }
-    history.append(entry)
-
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=4)
-
-
-# ------------------- Timer Class -------------------
-class TimerEntry:
-    def __init__(self, name: str, interval_minutes: int, last_time_str: str):
-        self.name = name
-        self.interval_minutes = int(interval_minutes)
-        self.interval_seconds = self.interval_minutes * 60
-        self.last_time = datetime.strptime(last_time_str, "%Y-%m-%d %I:%M %p").replace(tzinfo=MANILA)
-        self.next_time = self.last_time + timedelta(seconds=self.interval_seconds)
-
-    def update_next(self):
-        now = now_manila()
-        while self.next_time < now:
-            self.last_time = self.next_time
-            self.next_time = self.last_time + timedelta(seconds=self.interval_seconds)
-
-    def countdown(self) -> timedelta:
-        return self.next_time - now_manila()
-
-
-def build_timers():
-    return [TimerEntry(*row) for row in load_boss_data()]
-
-
-# ------------------- Weekly Boss Data -------------------
-weekly_boss_data = [
-    ("Clemantis", ["Monday 11:30", "Thursday 19:00"]),
-    ("Saphirus", ["Sunday 17:00", "Tuesday 11:30"]),
-    ("Neutro", ["Tuesday 19:00", "Thursday 11:30"]),
-    ("Thymele", ["Monday 19:00", "Wednesday 11:30"]),
-    ("Milavy", ["Saturday 15:00"]),
-    ("Ringor", ["Saturday 17:00"]),
-    ("Roderick", ["Friday 19:00"]),
-    ("Auraq", ["Friday 22:00", "Wednesday 21:00"]),
-    ("Chaiflock", ["Sunday 15:00"]),
-    ("Benji", ["Sunday 21:00"]),
-    ("Libitina", ["Monday 21:00", "Saturday 21:00"]),
-    ("Rakajeth", ["Tuesday 22:00", "Sunday 19:00"]),
-    ("Camalia", ["Thursday 21:00"]),
-    ("Tumier", ["Sunday 19:00"]),
-    ("Icaruthia (Kransia)", ["Tuesday 21:00", "Friday 21:00"]),
-    ("Motti (Kransia)", ["Wednesday 19:00", "Saturday 19:00"]),
-    ("Nevaeh (Kransia)", ["Sunday 22:00"]),
-]
+    get_engine().log_edit(boss_name, old_time, new_time, edited_by)
 
 
-def get_next_weekly_spawn(day_time: str) -> datetime:
-    now = now_manila()
-    day_time = " ".join(day_time.split())
-    day, time_str = day_time.split(" ", 1)
-    target_time = datetime.strptime(time_str, "%H:%M").time()
+def save_timers(edits):
+    """Batched Manage save (raises TimerConflict / ValueError); returns what changed."""
+    return get_engine().save_timers(edits, st.session_state.get("username", "Unknown"))
 
-    weekday_map = {
-        "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
-        "Friday": 4, "Saturday": 5, "Sunday": 6,
-    }
-    target_weekday = weekday_map[day]
 
-    days_ahead = (target_weekday - now.weekday()) % 7
-    spawn_date = (now + timedelta(days=days_ahead)).date()
-    spawn_dt = datetime.combine(spawn_date, target_time).replace(tzinfo=MANILA)
+def log_timer_edits(changes):
+    get_engine().log_timer_edits(changes, st.session_state.get("username", "Unknown"))
 
-    if spawn_dt <= now:
-        spawn_dt += timedelta(days=7)
-    return spawn_dt
 
+def send_discord_message_per_target(message_builder, timeout: float = 30) -> dict:
+    """
+    message_builder: function(target_dict) -> message_str
+    Returns: dict {target_name: True/False} (False if still undelivered after timeout)
+    """
+    results = get_engine().broadcast(message_builder).wait(timeout)
+    return {name: bool(ok) for name, ok in results.items()}
 
-# ------------------- 5-minute warning logic (NO DUPLICATES PER DISCORD) -------------------
-def _warn_key(source: str, boss_name: str, spawn_dt: datetime, target_name: str) -> str:
-    # per-target key so discord_1 and discord_2 are tracked separately
-    return f"{source}|{boss_name}|{spawn_dt.strftime('%Y-%m-%d %H:%M')}|{target_name}"
 
+# ------------------- Helpers -------------------
+def logout_and_go_world():
+    st.session_state.auth = False
+    st.session_state.username = ""
+    goto("world")
 
-def _claim_warn_key(warn_sent: dict, key: str) -> bool:
-    """
-    Claim the key BEFORE sending (helps avoid duplicates across multiple open sessions).
-    Returns True if we successfully claimed it (it was not set yet).
-    """
-    if warn_sent.get(key, False):
-        return False
-    warn_sent[key] = True
-    save_warn_sent(warn_sent)  # save immediately so other sessions see it
-    return True
 
+# ------------------- Browser-side countdowns -------------------
+WORLD_POLL_SECONDS = 3  # how often the World page asks the server whether anything changed
 
-def send_5min_warnings(field_timers):
-    now = now_manila()
-    warn_sent = load_warn_sent()
-
-    # -------- FIELD BOSSES --------
-    for t in field_timers:
-        spawn_dt = t.next_time
-        remaining = (spawn_dt - now).total_seconds()
-
-        if 0 < remaining <= WARNING_WINDOW_SECONDS:
-            spawn_time_only = spawn_dt.strftime("%I:%M %p")
-
-            def build_msg(target):
-                role_id = target.get("role_id", "")
-                ping = f"<@&{role_id}>" if role_id and "PASTE_ROLE_ID" not in role_id else ""
-                return (
-                    f"⏳ 5-minute warning!\n"
-                    f"**{t.name}** spawns at **{spawn_time_only}** (Manila Time)\n"
-                    f"Time left: **{format_timedelta(spawn_dt - now)}**\n"
-                    f"{ping}"
-                )
-
-            for target in DISCORD_TARGETS:
-                target_name = target.get("name", "unknown")
-                key = _warn_key("FIELD", t.name, spawn_dt, target_name)
-
-                # skip if already sent (per-target)
-                if not _claim_warn_key(warn_sent, key):
-                    continue
-
-                # send to that single target
-                msg = build_msg(target)
-                ok = _post_webhook(target.get("webhook", ""), {"content": msg})
-
-                # If you WANT retries on failure, uncomment this block.
-                # If you prefer "never duplicate ever", keep it commented.
-                #
-                # if not ok:
-                #     warn_sent.pop(key, None)
-                #     save_warn_sent(warn_sent)
-
-    # -------- WEEKLY BOSSES --------
-    for boss, times in weekly_boss_data:
-        for sched in times:
-            spawn_dt = get_next_weekly_spawn(sched)
-            remaining = (spawn_dt - now).total_seconds()
-
-            if 0 < remaining <= WARNING_WINDOW_SECONDS:
-                spawn_time_only = spawn_dt.strftime("%I:%M %p")
-
-                def build_msg(target):
-                    role_id = target.get("role_id", "")
-                    ping = f"<@&{role_id}>" if role_id and "PASTE_ROLE_ID" not in role_id else ""
-                    return (
-                        f"⏳ 5-minute warning!\n"
-                        f"**{boss}** spawns at **{spawn_time_only}** (Manila Time)\n"
-                        f"Time left: **{format_timedelta(spawn_dt - now)}**\n"
-                        f"{ping}"
-                    )
+def countdown_ticker():
+    components.html(COUNTDOWN_TICKER_JS % {"server_now_ms": int(time.time() * 1000)}, height=0)
 
-                for target in DISCORD_TARGETS:
-                    target_name = target.get("name", "unknown")
-                    key = _warn_key("WEEKLY", boss, spawn_dt, target_name)
 
-                    if not _claim_warn_key(warn_sent, key):
-                        continue
+def display_version():
+    """Changes whenever the World page content needs a server rerun (timer or schedule edit)."""
+    return get_timer_snapshot().version, weekly_stamp()
 
-                    msg = build_msg(target)
-                    ok = _post_webhook(target.get("webhook", ""), {"content": msg})
 
-                    # retries (optional)
-                    # if not ok:
-                    #     warn_sent.pop(key, None)
-                    #     save_warn_sent(warn_sent)
+@st.fragment(run_every=WORLD_POLL_SECONDS)
+def rerun_on_change(rendered_version, next_spawn_ts: float):
+    """
+    Cheap partial rerun: only reruns the whole page when the data changed or a spawn
+    passed (so the tables re-sort); the countdowns themselves tick client-side.
+    """
+    with METRICS.timer("rerun_phase_seconds", phase="poll"):
+        changed = display_version() != rendered_version or time.time() >= next_spawn_ts
+    if changed:
+        st.rerun()
 
 
 # ------------------- Banner -------------------
-def next_boss_banner_combined(field_timers):
-    if not field_timers:
+def next_boss_banner_combined(field_timers: TimerStore):
+    if not len(field_timers):
         st.warning("No timers loaded.")
         return
 
     now = now_manila()
-    field_next = min(field_timers, key=lambda x: x.next_time)
+    field_next = field_timers[int(field_timers.order()[0])]
     field_cd = field_next.next_time - now
 
     weekly_best_name = None
     weekly_best_time = None
     weekly_best_cd = None
-    for boss, times in weekly_boss_data:
-        for sched in times:
-            spawn_dt = get_next_weekly_spawn(sched)
-            cd = spawn_dt - now
-            if weekly_best_cd is None or cd < weekly_best_cd:
-                weekly_best_cd = cd
-                weekly_best_name = boss
-                weekly_best_time = spawn_dt
+    weekly_next = get_weekly_schedule().next_spawn(now)
+    if weekly_next:
+        weekly_best_name, weekly_best_time = weekly_next
+        weekly_best_cd = weekly_best_time - now
 
     chosen_name = field_next.name
     chosen_time = field_next.next_time
@@ -364,151 +194,69 @@ def next_boss_banner_combined(field_timers):
         chosen_time = weekly_best_time
         chosen_cd = weekly_best_cd
 
-    remaining = chosen_cd.total_seconds()
-    if remaining <= 60:
-        cd_color = "red"
-    elif remaining <= 300:
-        cd_color = "orange"
-    else:
-        cd_color = "limegreen"
+    cd_color = countdown_color(chosen_cd.total_seconds(), ok_color="limegreen")
 
     time_only = chosen_time.strftime("%I:%M %p")
     cd_str = format_timedelta(chosen_cd)
 
     st.markdown(
-        f"""
-        <style>
-        .banner-container {{
-            display: flex;
-            justify-content: center;
-            margin: 20px 0 5px 0;
-        }}
-        .boss-banner {{
-            background: linear-gradient(90deg, #0f172a, #1d4ed8, #16a34a);
-            padding: 14px 28px;
-            border-radius: 999px;
-            box-shadow: 0 16px 40px rgba(15, 23, 42, 0.75);
-            color: #f9fafb;
-            display: inline-flex;
-            flex-direction: column;
-            align-items: center;
-            gap: 4px;
-        }}
-        .boss-banner-title {{
-            font-size: 28px;
-            font-weight: 800;
-            margin: 0;
-            letter-spacing: 0.03em;
-        }}
-        .boss-banner-row {{
-            display: flex;
-            align-items: center;
-            gap: 14px;
-            font-size: 18px;
-        }}
-        .banner-chip {{
-            padding: 4px 12px;
-            border-radius: 999px;
-            background: rgba(15, 23, 42, 0.6);
-            border: 1px solid rgba(148, 163, 184, 0.7);
-        }}
-        </style>
-
-        <div class="banner-container">
-            <div class="boss-banner">
-                <h2 class="boss-banner-title">
-                    Next Boss: <strong>{chosen_name}</strong>
-                </h2>
-                <div class="boss-banner-row">
-                    <span class="banner-chip">
-                        🕒 <strong>{time_only}</strong>
-                    </span>
-                    <span class="banner-chip" style="color:{cd_color}; border-color:{cd_color};">
-                        ⏳ <strong>{cd_str}</strong>
-                    </span>
-                </div>
-            </div>
-        </div>
-        """,
+        BANNER_CSS + BANNER_HTML.format(
+            name=html.escape(chosen_name),
+            time_only=time_only,
+            spawn_ts=int(chosen_time.timestamp()),
+            cd_color=cd_color,
+            cd_str=cd_str,
+        ),
         unsafe_allow_html=True,
     )
 
 
 # ------------------- Tables -------------------
-def display_boss_table_sorted_newstyle(timers_list):
-    timers_sorted = sorted(timers_list, key=lambda t: t.next_time)
-
-    countdown_cells = []
-    for t in timers_sorted:
-        secs = t.countdown().total_seconds()
-        if secs <= 60:
-            color = "red"
-        elif secs <= 300:
-            color = "orange"
-        else:
-            color = "green"
-        countdown_cells.append(f"<span style='color:{color}'>{format_timedelta(t.countdown())}</span>")
-
-    data = {
-        "Boss Name": [t.name for t in timers_sorted],
-        "Interval (min)": [t.interval_minutes for t in timers_sorted],
-        "Last Spawn": [t.last_time.strftime("%m-%d-%Y | %H:%M") for t in timers_sorted],
-        "Next Spawn Date": [t.next_time.strftime("%b %d, %Y (%a)") for t in timers_sorted],
-        "Next Spawn Time": [t.next_time.strftime("%I:%M %p") for t in timers_sorted],
-        "Countdown": countdown_cells,
-    }
-
-    df = pd.DataFrame(data)
-
-    st.markdown("""
-    <style>
-    table th {
-        text-align: center !important;
-        vertical-align: middle !important;
-    }
-    table td {
-        vertical-align: middle !important;
-    }
-    table td:nth-child(2), table th:nth-child(2),
-    table td:nth-child(3), table th:nth-child(3),
-    table td:nth-child(4), table th:nth-child(4),
-    table td:nth-child(5), table th:nth-child(5),
-    table td:nth-child(6), table th:nth-child(6) {
-        text-align: center !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-    st.write(df.to_html(escape=False, index=False), unsafe_allow_html=True)
+@st.cache_resource(max_entries=2 * len(TENANTS))
+def _field_table(tenant: str, version: int) -> CachedTable:
+    # one row cache per tenant and timer snapshot version
+    return CachedTable(["Boss Name", "Interval (min)", "Last Spawn", "Next Spawn Date", "Next Spawn Time", "Countdown"])
+
+
+@st.cache_resource(max_entries=2 * len(TENANTS))
+def _weekly_table(tenant: str, schedule_stamp) -> CachedTable:
+    return CachedTable(["Boss Name", "Day", "Time", "Countdown"])
+
+
+def display_boss_table_sorted_newstyle(timers_list: TimerStore, version: int):
+    def field_cells(t):
+        return lambda: (
+            t.name,
+            t.interval_minutes,
+            t.last_time.strftime("%m-%d-%Y | %H:%M"),
+            t.next_time.strftime("%b %d, %Y (%a)"),
+            t.next_time.strftime("%I:%M %p"),
+        )
+
+    rows = (
+        (int(i), int(timers_list.next[i]), field_cells(timers_list[int(i)]))
+        for i in timers_list.order()
+    )
+    st.markdown(FIELD_TABLE_CSS, unsafe_allow_html=True)
+    st.write(_field_table(st.session_state.tenant, version).render(rows, time.time()), unsafe_allow_html=True)
 
 
 def display_weekly_boss_table_newstyle():
+    def weekly_cells(boss, spawn_dt):
+        return lambda: (boss, spawn_dt.strftime("%A"), spawn_dt.strftime("%I:%M %p"))
+
     now = now_manila()
-    upcoming = []
-    for boss, times in weekly_boss_data:
-        for sched in times:
-            spawn_dt = get_next_weekly_spawn(sched)
-            countdown = spawn_dt - now
-            upcoming.append((boss, spawn_dt, countdown))
-
-    upcoming_sorted = sorted(upcoming, key=lambda x: x[1])
-
-    data = {
-        "Boss Name": [row[0] for row in upcoming_sorted],
-        "Day": [row[1].strftime("%A") for row in upcoming_sorted],
-        "Time": [row[1].strftime("%I:%M %p") for row in upcoming_sorted],
-        "Countdown": [
-            f"<span style='color:{'red' if row[2].total_seconds() <= 60 else 'orange' if row[2].total_seconds() <= 300 else 'green'}'>{format_timedelta(row[2])}</span>"
-            for row in upcoming_sorted
-        ],
-    }
-    df = pd.DataFrame(data)
-    st.write(df.to_html(escape=False, index=False), unsafe_allow_html=True)
+    rows = []
+    for boss, spawn_dt in get_weekly_schedule().upcoming(now):
+        spawn_ts = int(spawn_dt.timestamp())
+        # key = boss + slot within the week, so the cache doesn't grow week over week
+        rows.append(((boss, spawn_ts % WEEK_SECONDS), spawn_ts, weekly_cells(boss, spawn_dt)))
+    st.write(_weekly_table(st.session_state.tenant, weekly_stamp()).render(rows, now.timestamp()), unsafe_allow_html=True)
 
 
 # ------------------- UI Helpers -------------------
 def admin_nav(active_page: str):
-    c1, c2, c3, c4, c5, c6 = st.columns([1.2, 1.2, 1.2, 1.2, 1.2, 2.0])
+    c1, c2, c3, c4, c5, c6, c7, c8, c9 = st.columns([1.2, 1.2, 1.2, 1.2, 1.2, 1.2, 1.2, 1.2, 2.0])
 
     with c1:
         if st.button("⏱️ Boss Tracker", use_container_width=True):
@@ -523,69 +271,123 @@ def admin_nav(active_page: str):
         if st.button("📜 History", use_container_width=True):
             goto("history")
     with c5:
+        if st.button("📈 Stats", use_container_width=True):
+            goto("stats")
+    with c6:
+        if st.button("📊 Diagnostics", use_container_width=True):
+            goto("diagnostics")
+    with c7:
+        if st.button("📅 Weekly", use_container_width=True):
+            goto("weekly")
+    with c8:
         if st.button("🚪 Logout", use_container_width=True):
             logout_and_go_world()
-    with c6:
+    with c9:
         st.success(f"Admin: {st.session_state.username}")
 
 
+def grid_edits(base, grid):
+    """
+    [(boss_name, expected_version, new_row)] for Engine.save_timers from the Manage grid,
+    against the base rows it was built from. Raises ValueError on an incomplete row.
+    """
+    import pandas as pd
+
+    base_by_name = {row[0]: row for row in base}
+    edits, kept = [], set()
+    for record in grid.to_dict("records"):
+        original = record["original"] if isinstance(record["original"], str) else None
+        name = record["boss"].strip() if isinstance(record["boss"], str) else ""
+        interval, last_spawn = record["interval_minutes"], record["last_spawn"]
+        if original is None and not name and pd.isna(interval) and pd.isna(last_spawn):
+            continue  # untouched new row
+        if not name or pd.isna(interval) or pd.isna(last_spawn):
+            raise ValueError(f"{name or original or 'New boss'} needs a name, an interval and a last spawn.")
+        new_row = (name, int(interval), pd.Timestamp(last_spawn).strftime(TIME_FMT))
+        if original is None:
+            edits.append((None, None, new_row))
+            continue
+        kept.add(original)
+        old_row = base_by_name[original]
+        if new_row != tuple(old_row[:3]):
+            edits.append((original, old_row[3], new_row))
+    edits.extend((name, row[3], None) for name, row in base_by_name.items() if name not in kept)
+    return edits
+
+
+# ------------------- Tenant (game server) -------------------
+def switch_tenant(slug: str):
+    """Each server has its own admins, so switching logs out and drops per-server edit state."""
+    st.session_state.tenant = slug
+    st.session_state.auth = False
+    st.session_state.username = ""
+    for key in ("manage_saved_msgs", "manage_base", "ik_seen_versions"):
+        st.session_state.pop(key, None)
+    st.session_state.ik_toast = None
+    if st.session_state.get("page") not in (None, "world", "login"):
+        st.session_state.page = "world"
+
+
+rerun_started = time.perf_counter()
+requested_tenant = st.query_params.get("server")
+if requested_tenant in TENANTS and requested_tenant != st.session_state.get("tenant"):
+    switch_tenant(requested_tenant)
+st.session_state.setdefault("tenant", next(iter(TENANTS)))
+if st.session_state.tenant not in TENANTS:  # tenant removed from secrets since this session started
+    switch_tenant(next(iter(TENANTS)))
+tenant = current_tenant()
+ADMIN_PASSWORD = tenant.admin_password or load_settings()["admin_password"]
+
+
 # ------------------- Streamlit Setup -------------------
-st.set_page_config(page_title="Lord9 Santiago 2 Boss Timer", layout="wide")
-st.title("🛡️ Lord9 Santiago 2 Boss Timer")
-
-st.markdown("""
-<style>
-div.stButton > button{
-    width: 100% !important;
-    border-radius: 12px !important;
-    border: 1px solid #cbd5e1 !important;
-    background: #f1f5f9 !important;
-    color: #0f172a !important;
-    font-weight: 600 !important;
-    padding: 0.6rem 0.85rem !important;
-    box-shadow: none !important;
-    transition: background-color .12s ease, transform .08s ease;
-}
-div.stButton > button:hover{
-    background: #e2e8f0 !important;
-}
-div.stButton > button:active{
-    transform: translateY(1px);
-}
-</style>
-""", unsafe_allow_html=True)
+st.set_page_config(page_title=f"{tenant.title} Boss Timer", layout="wide")
+st.title(f"🛡️ {tenant.title} Boss Timer")
+
+if len(TENANTS) > 1:
+    slugs = list(TENANTS)
+    chosen = st.selectbox(
+        "Server", slugs, index=slugs.index(tenant.slug), format_func=lambda slug: TENANTS[slug].title
+    )
+    if chosen != tenant.slug:
+        st.query_params["server"] = chosen
+        switch_tenant(chosen)
+        st.rerun()
+
+st.markdown(BUTTON_CSS, unsafe_allow_html=True)
 
 
 # ------------------- Session defaults -------------------
 st.session_state.setdefault("auth", False)
 st.session_state.setdefault("username", "")
-st.session_state.setdefault("page", "world")  # world | login | manage | history | instakill
+st.session_state.setdefault("page", "world")  # world | login | forecast | manage | history | stats | instakill | weekly | diagnostics
 st.session_state.setdefault("manage_saved_msgs", {})
 st.session_state.setdefault("ik_toast", None)
+st.session_state.setdefault("manage_base", None)
+st.session_state.setdefault("manage_grid_rev", 0)
+st.session_state.setdefault("ik_seen_versions", {})
+
+
+def reset_manage_grid():
+    """Drops the Manage grid's unsaved edits; it is rebuilt from the latest timers."""
+    st.session_state.manage_base = None
+    st.session_state.manage_grid_rev += 1
 
 
 def goto(page_name: str):
     if st.session_state.page == "manage" and page_name != "manage":
         st.session_state.manage_saved_msgs = {}
+        reset_manage_grid()
     st.session_state.page = page_name
     st.rerun()
 
 
-# ------------------- Auto-refresh ONLY on World page -------------------
-if st.session_state.page == "world":
-    st_autorefresh(interval=1000, key="timer_refresh")
-
-
-# ------------------- Load timers -------------------
-if "timers" not in st.session_state:
-    st.session_state.timers = build_timers()
-
-timers = st.session_state.timers
-for t in timers:
-    t.update_next()
-
-if st.session_state.page == "world":
-    send_5min_warnings(timers)
+# ------------------- Load timers (shared across sessions) -------------------
+with METRICS.timer("rerun_phase_seconds", phase="load_timers"):
+    rendered_version = display_version()
+    snapshot = get_timer_snapshot()
+    timers = snapshot.timers
+with METRICS.timer("rerun_phase_seconds", phase="update_next"):
+    timers.update_next()
 
 
 # ------------------- WORLD PAGE HEADER -------------------
@@ -599,11 +401,24 @@ if st.session_state.page == "world":
         else:
             if st.button("🛠️ Manage / Edit"):
                 goto("manage")
+        if st.button("📆 Forecast"):
+            goto("forecast")
 
-    with mid_banner:
+    with mid_banner, METRICS.timer("rerun_phase_seconds", phase="banner"):
         next_boss_banner_combined(timers)
 else:
-    next_boss_banner_combined(timers)
+    with METRICS.timer("rerun_phase_seconds", phase="banner"):
+        next_boss_banner_combined(timers)
+
+countdown_ticker()
+
+# ------------------- Rerun World page only when something changed -------------------
+if st.session_state.page == "world":
+    weekly_next = get_weekly_schedule().next_spawn(now_manila())
+    spawn_candidates = [weekly_next[1].timestamp()] if weekly_next else []
+    if len(timers):
+        spawn_candidates.append(float(timers.next.min()))
+    rerun_on_change(rendered_version, min(spawn_candidates, default=time.time() + 3600))
 
 st.divider()
 
@@ -613,9 +428,9 @@ if st.session_state.page == "world":
     st.subheader("🗡️ Field Boss Spawns (Sorted by Next Spawn)")
 
     col1, col2 = st.columns([2, 1])
-    with col1:
-        display_boss_table_sorted_newstyle(timers)
-    with col2:
+    with col1, METRICS.timer("rerun_phase_seconds", phase="field_table"):
+        display_boss_table_sorted_newstyle(timers, snapshot.version)
+    with col2, METRICS.timer("rerun_phase_seconds", phase="weekly_table"):
         st.subheader("📅 Weekly Boss Spawns (Auto-Sorted)")
         display_weekly_boss_table_newstyle()
 
@@ -645,6 +460,63 @@ elif st.session_state.page == "login":
             st.error("❌ Invalid name or password.")
 
 
+# ------------------- FORECAST PAGE -------------------
+elif st.session_state.page == "forecast":
+    st.subheader("📆 Spawn Forecast (Field + Weekly)")
+
+    f1, f2, f3 = st.columns([1, 2, 1])
+    with f1:
+        horizon_label = st.radio("Horizon", list(FORECAST_HORIZONS), horizontal=True, key="forecast_horizon")
+    with f2:
+        boss_filter = st.multiselect("Bosses", sorted(set(timers.names) | set(get_weekly_schedule().bosses)), key="forecast_bosses")
+    with f3:
+        if st.button("⬅️ Back", use_container_width=True):
+            goto("world")
+
+    horizon = FORECAST_HORIZONS[horizon_label]
+    spawns = get_engine().forecast(horizon)
+    if boss_filter:
+        wanted = set(boss_filter)
+        spawns = (spawn for spawn in spawns if spawn[2] in wanted)
+
+    now = now_manila()
+    rows = []
+    for ts, source, boss in spawns:
+        spawn_dt = datetime.fromtimestamp(ts, tz=MANILA)
+        rows.append({
+            "Boss Name": boss,
+            "Type": source.title(),
+            "Date": spawn_dt.strftime("%a %b %d"),
+            "Time": spawn_dt.strftime("%I:%M %p"),
+            "In": format_timedelta(spawn_dt - now),
+        })
+    st.caption(f"{len(rows)} spawns in the next {horizon_label} (Manila Time)")
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No spawns in this horizon.")
+
+    e1, e2, _ = st.columns([1, 1, 2])
+    file_stem = f"{tenant.slug}-forecast-{horizon_label}"
+    with e1:
+        st.download_button(
+            "⬇️ Calendar (.ics)",
+            get_engine().forecast_export("ics", horizon, f"{tenant.title} boss spawns"),
+            file_name=f"{file_stem}.ics",
+            mime="text/calendar",
+            use_container_width=True,
+        )
+    with e2:
+        st.download_button(
+            "⬇️ JSON",
+            get_engine().forecast_export("json", horizon),
+            file_name=f"{file_stem}.json",
+            mime="application/json",
+            use_container_width=True,
+        )
+    st.caption("Exports cover every boss and start at the top of the hour; they are rebuilt only when timers change.")
+
+
 # ------------------- MANAGE PAGE -------------------
 elif st.session_state.page == "manage":
     if not st.session_state.auth:
@@ -654,106 +526,306 @@ elif st.session_state.page == "manage":
     else:
         admin_nav("manage")
 
-        st.subheader("🛠️ Edit Boss Timers (Edit Last Time, Next auto-updates)")
-
-        # ✅ YOUR CUSTOM ORDER
-        CUSTOM_MANAGE_ORDER = [
-            "Venatus",
-            "Viorent",
-            "Lady Dalia",
-            "Ego",
-            "Livera",
-            "Araneo",
-            "Undomiel",
-            "General Aquleus",
-            "Amentis",
-            "Baron Braudmore",
-            "Gareth",
-            "Shuliar",
-            "Larba",
-            "Catena",
-            "Titore",
-            "Wanitas",
-            "Metus",
-            "Duplican",
-            "Asta",
-            "Ordo",
-            "Secreta",
-            "Supore",
-        ]
+        st.subheader("🛠️ Edit Boss Timers")
+        st.caption(
+            "Edit last spawns and intervals, add bosses in the empty bottom row or delete selected rows, "
+            "then save everything at once. Next spawns follow from the last spawn."
+        )
+        import pandas as pd  # only the admin pages need pandas
+
+        # rows (name, interval, last spawn, version) this admin is editing from; a save fails
+        # if someone else saved any edited boss in between
+        if st.session_state.manage_base is None:
+            name_to_timer = {t.name: t for t in timers}
+            st.session_state.manage_base = [
+                (t.name, t.interval_minutes, t.last_time.strftime(TIME_FMT), t.version)
+                for t in (name_to_timer[name] for name in manage_order(name_to_timer, tenant.manage_order))
+            ]
+        base = st.session_state.manage_base
+
+        current_versions = {t.name: t.version for t in timers}
+        if current_versions != {row[0]: row[3] for row in base}:
+            st.info("Timers were changed by someone else since this grid was loaded. Reload to see them.")
+
+        grid = pd.DataFrame({
+            "boss": [row[0] for row in base],
+            "interval_minutes": [row[1] for row in base],
+            "last_spawn": [parse_time_str(row[2]).replace(tzinfo=None) for row in base],
+            "original": [row[0] for row in base],
+        })
+        edited = st.data_editor(
+            grid,
+            key=f"manage_grid_{st.session_state.manage_grid_rev}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "boss": st.column_config.TextColumn("Boss", required=True),
+                "interval_minutes": st.column_config.NumberColumn("Interval (min)", min_value=1, step=1, required=True),
+                "last_spawn": st.column_config.DatetimeColumn(
+                    "Last spawn (Manila)", format="YYYY-MM-DD hh:mm A", step=60, required=True,
+                ),
+                "original": None,  # which saved boss a row is, so renames are not a remove + add
+            },
+        )
 
-        # ✅ Create order map
-        order_index = {name: i for i, name in enumerate(CUSTOM_MANAGE_ORDER)}
+        try:
+            edits = grid_edits(base, edited)
+            invalid = None
+        except ValueError as e:
+            edits, invalid = [], str(e)
+
+        s1, s2, s3 = st.columns([1.5, 1.5, 4])
+        with s1:
+            save_clicked = st.button("💾 Save changes", use_container_width=True, disabled=not edits or bool(invalid))
+        with s2:
+            if st.button("↻ Reload", use_container_width=True):
+                reset_manage_grid()
+                st.rerun()
+        with s3:
+            if invalid:
+                st.warning(invalid)
+            elif edits:
+                st.caption(f"{len(edits)} unsaved change{'s' if len(edits) != 1 else ''}.")
 
-        # ✅ Sort timers based on your custom order
-        timers_sorted = sorted(timers, key=lambda x: order_index.get(x.name, 999))
+        if save_clicked:
+            try:
+                changes = save_timers(edits)
+            except TimerConflict as e:
+                st.session_state.manage_saved_msgs = {"warning": (
+                    f"⚠️ Nothing saved: {e.boss_name} was changed or removed by someone else. "
+                    "The grid now shows the latest timers; apply your edits again."
+                )}
+            except ValueError as e:
+                st.session_state.manage_saved_msgs = {"warning": f"⚠️ Nothing saved: {e}"}
+            else:
+                log_timer_edits(changes)
+                st.session_state.manage_saved_msgs = {"success": (
+                    f"✅ Saved {len(changes)} boss{'es' if len(changes) != 1 else ''}."
+                )}
+            reset_manage_grid()
+            st.rerun()
 
-        for timer in timers_sorted:
-            i = timers.index(timer)  # IMPORTANT: keep correct index for saving
+        for level, msg in st.session_state.manage_saved_msgs.items():
+            (st.warning if level == "warning" else st.success)(msg)
 
-            with st.expander(f"Edit {timer.name}", expanded=False):
-                new_date = st.date_input(
-                    f"{timer.name} Last Date",
-                    value=timer.last_time.date(),
-                    key=f"{timer.name}_last_date",
-                )
 
-                new_time = st.time_input(
-                    f"{timer.name} Last Time",
-                    value=timer.last_time.time(),
-                    key=f"{timer.name}_last_time",
-                    step=60,
-                )
+# ------------------- HISTORY PAGE -------------------
+elif st.session_state.page == "history":
+    if not st.session_state.auth:
+        st.warning("You must login first.")
+        if st.button("Go to Login", use_container_width=True):
+            goto("login")
+    else:
+        admin_nav("history")
 
-                if st.button(f"Save {timer.name}", key=f"save_{timer.name}"):
-                    old_time_str = timer.last_time.strftime("%Y-%m-%d %I:%M %p")
+        st.subheader("📜 Edit History")
 
-                    updated_last_time = datetime.combine(new_date, new_time).replace(tzinfo=MANILA)
-                    updated_next_time = updated_last_time + timedelta(seconds=timer.interval_seconds)
+        history_store = get_history_store()
 
-                    st.session_state.timers[i].last_time = updated_last_time
-                    st.session_state.timers[i].next_time = updated_next_time
+        f1, f2, f3 = st.columns([2, 2, 1])
+        with f1:
+            boss_filter = st.selectbox("Boss", ["All"] + history_store.distinct("boss"), key="history_boss")
+        with f2:
+            editor_filter = st.selectbox("Edited by", ["All"] + history_store.distinct("edited_by"), key="history_editor")
+        with f3:
+            page_size = st.selectbox("Rows per page", [25, 100, 500], index=1, key="history_page_size")
 
-                    save_boss_data([
-                        (t.name, t.interval_minutes, t.last_time.strftime("%Y-%m-%d %I:%M %p"))
-                        for t in st.session_state.timers
-                    ])
+        boss_filter = None if boss_filter == "All" else boss_filter
+        editor_filter = None if editor_filter == "All" else editor_filter
 
-                    log_edit(timer.name, old_time_str, updated_last_time.strftime("%Y-%m-%d %I:%M %p"))
+        total = history_store.count(boss_filter, editor_filter)
+        if total:
+            pages = math.ceil(total / page_size)
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="history_page")
+            st.caption(f"{total} edits · page {page} of {pages} (newest first)")
 
-                    st.session_state.manage_saved_msgs[timer.name] = (
-                        f"✅ {timer.name} updated! Next: {updated_next_time.strftime('%Y-%m-%d %I:%M %p')}"
-                    )
+            rows = history_store.query(boss_filter, editor_filter, limit=page_size, offset=(page - 1) * page_size)
+            import pandas as pd  # only the admin pages need pandas
 
-                    st.rerun()
+            df_history = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+            df_history["edited_at"] = df_history["edited_at"].map(lambda d: d.strftime("%Y-%m-%d %I:%M:%S %p"))
+            st.dataframe(df_history, use_container_width=True, hide_index=True)
+        else:
+            st.info("No edits yet.")
 
-                msg = st.session_state.manage_saved_msgs.get(timer.name)
-                if msg:
-                    st.success(msg)
 
+# ------------------- STATS PAGE -------------------
+elif st.session_state.page == "stats":
+    if not st.session_state.auth:
+        st.warning("You must login first.")
+        if st.button("Go to Login", use_container_width=True):
+            goto("login")
+    else:
+        admin_nav("stats")
+
+        st.subheader("📈 Spawn Drift")
+        st.caption(
+            "How far each logged kill was from the spawn the timer predicted, in minutes (positive = later). "
+            f"Late = more than {LATE_KILL_MINUTES} minutes after. Edits that move a timer backwards are not counted."
+        )
+
+        def fmt_minutes(minutes):
+            return None if minutes is None else round(minutes, 1)
+
+        drift = [
+            {
+                "boss": row["boss"],
+                "kills": row["kills"],
+                "mean": fmt_minutes(row["mean_drift"]),
+                "p50": row["p50_drift"],
+                "p90": row["p90_drift"],
+                "late kills": f"{row['late_rate']:.0%}",
+            }
+            for row in get_engine().drift_stats()
+        ]
+        if drift:
+            st.dataframe(drift, use_container_width=True, hide_index=True)
+        else:
+            st.info("No kills logged yet.")
+
+        st.markdown("**Editors**")
+        editors = [
+            {
+                "edited by": row["edited_by"],
+                "edits": row["edits"],
+                "kills": row["kills"],
+                "mean drift": fmt_minutes(row["mean_drift"]),
+                "first edit": row["first_edit"].strftime("%Y-%m-%d %I:%M %p"),
+                "last edit": row["last_edit"].strftime("%Y-%m-%d %I:%M %p"),
+            }
+            for row in get_engine().editor_stats()
+        ]
+        if editors:
+            st.dataframe(editors, use_container_width=True, hide_index=True)
+        else:
+            st.info("No edits yet.")
 
-# ------------------- HISTORY PAGE -------------------
-elif st.session_state.page == "history":
+
+# ------------------- DIAGNOSTICS PAGE -------------------
+elif st.session_state.page == "diagnostics":
     if not st.session_state.auth:
         st.warning("You must login first.")
         if st.button("Go to Login", use_container_width=True):
             goto("login")
     else:
-        admin_nav("history")
+        admin_nav("diagnostics")
+
+        st.subheader("📊 Diagnostics")
+        st.caption(
+            "Totals since this server process started; p50/p99 over the last 1,024 samples of each timing. "
+            f"State backend: {get_engine().state.backend}."
+        )
+
+        def fmt_labels(labels):
+            return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+        def fmt_ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 2)
+
+        health_icons = {"closed": "🟢 up", "half-open": "🟡 probing", "open": "🔴 down", "invalid": "⚪ invalid"}
+        health = [
+            {
+                "target": row["name"],
+                "state": health_icons.get(row["state"], row["state"]),
+                "failures": row["failures"],
+                "last error": row["last_error"] or "",
+                "last success": (
+                    datetime.fromtimestamp(row["last_ok"], tz=MANILA).strftime("%Y-%m-%d %I:%M:%S %p")
+                    if row["last_ok"] else ""
+                ),
+                "next probe in": format_timedelta(timedelta(seconds=row["retry_in"])) if row["retry_in"] else "",
+            }
+            for row in get_engine().target_health()
+        ]
+        st.markdown("**Discord targets**")
+        if health:
+            st.dataframe(health, use_container_width=True, hide_index=True)
+            st.caption("A target that keeps failing is paused (its messages wait) and probed again after a cooldown.")
+        else:
+            st.info("No Discord targets configured.")
+
+        metrics = get_engine().metrics
+        timings = [
+            {
+                "timing": name,
+                "labels": fmt_labels(labels),
+                "count": count,
+                "p50 (ms)": fmt_ms(p50),
+                "p99 (ms)": fmt_ms(p99),
+                "mean (ms)": fmt_ms(total / count if count else None),
+            }
+            for name, labels, count, total, p50, p99 in metrics.histograms()
+        ]
+        counters = [
+            {"counter": name, "labels": fmt_labels(labels), "value": value}
+            for name, labels, value in metrics.counters()
+        ]
 
-        st.subheader("📜 Edit History")
+        st.markdown("**Timings**")
+        if timings:
+            st.dataframe(timings, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nothing timed yet.")
+
+        st.markdown("**Counters**")
+        if counters:
+            st.dataframe(counters, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nothing counted yet.")
+
+        st.download_button(
+            "⬇️ Prometheus metrics",
+            metrics.render_prometheus(),
+            file_name="bosstimer.prom",
+            mime="text/plain",
+        )
+        if METRICS_FILE:
+            st.caption(f"Also written to `{METRICS_FILE}` every 15 seconds.")
+        else:
+            st.caption("Set `METRICS_FILE` in secrets to write this to a file for a Prometheus textfile scraper.")
+
+
+# ------------------- WEEKLY SCHEDULE PAGE -------------------
+elif st.session_state.page == "weekly":
+    if not st.session_state.auth:
+        st.warning("You must login first.")
+        if st.button("Go to Login", use_container_width=True):
+            goto("login")
+    else:
+        admin_nav("weekly")
 
-        if HISTORY_FILE.exists():
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                history = json.load(f)
+        st.subheader("📅 Edit Weekly Boss Schedule")
+        st.caption("One row per boss. Schedule is a comma-separated list like `Monday 11:30, Thursday 19:00` (Manila Time).")
 
-            if history:
-                df_history = pd.DataFrame(history).sort_values("edited_at", ascending=False)
-                st.dataframe(df_history, use_container_width=True)
+        import pandas as pd  # only the admin pages need pandas
+
+        weekly_rows = [
+            {"Boss Name": boss, "Schedule": ", ".join(times)}
+            for boss, times in load_weekly_data()
+        ]
+        edited = st.data_editor(
+            pd.DataFrame(weekly_rows, columns=["Boss Name", "Schedule"]),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="weekly_editor",
+        )
+
+        if st.button("Save Weekly Schedule", key="save_weekly"):
+            new_weekly = []
+            for _, row in edited.iterrows():
+                boss = str(row["Boss Name"] or "").strip()
+                times = [" ".join(x.split()) for x in str(row["Schedule"] or "").split(",") if x.strip()]
+                if boss and times:
+                    new_weekly.append((boss, times))
+
+            try:
+                save_weekly_data(new_weekly)
+            except ValueError as e:
+                st.error(f"❌ {e}")
             else:
-                st.info("No edits yet.")
-        else:
-            st.info("No edit history yet.")
+                st.success("✅ Weekly schedule saved!")
 
 
 # ------------------- INSTAKILL PAGE -------------------
@@ -767,41 +839,17 @@ elif st.session_state.page == "instakill":
 
         st.subheader("💀 InstaKill")
 
-        # ✅ PERFECT CUSTOM ROW LAYOUT
-        ROW_LAYOUT = [
-            ["Venatus", "Viorent", "Lady Dalia", "Ego", "Livera", "Araneo", "Undomiel"],
-            ["General Aquleus", "Amentis", "Baron Braudmore", "Gareth", "Shuliar", "Larba", "Catena"],
-            ["Titore", "Wanitas", "Metus", "Duplican", "Asta", "Ordo", "Secreta", "Supore"],
-        ]
-
         # Map timer names
         name_to_timer = {t.name: t for t in timers}
 
-        st.markdown("""
-        <style>
-        .ik-card{
-          background: #ffffff;
-          border: 1px solid #e5e7eb;
-          border-radius: 14px;
-          padding: 16px 14px 14px 14px;
-          text-align: center;
-          margin-bottom: 14px;
-        }
-
-        .ik-name{
-          font-size: 13px;
-          font-weight: 800;
-          letter-spacing: .18em;
-          color: #111827;
-          text-transform: uppercase;
-          padding: 6px 0 10px 0;
-        }
-
-        .ik-card div.stButton > button{
-          margin-top: 6px !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        # ✅ This server's custom row layout (bosses it doesn't place get extra rows)
+        ROW_LAYOUT = row_layout(list(name_to_timer), tenant.row_layout)
+
+        st.markdown(IK_CSS, unsafe_allow_html=True)
+
+        # versions shown by the previous render = what the admin clicked on
+        ik_seen_versions = st.session_state.ik_seen_versions
+        st.session_state.ik_seen_versions = {t.name: t.version for t in timers}
 
         # ✅ MANUAL ROW RENDERING
         for row in ROW_LAYOUT:
@@ -817,7 +865,7 @@ elif st.session_state.page == "instakill":
                         continue
 
                     st.markdown(
-                        f"<div class='ik-card'><div class='ik-name'>{t.name}</div>",
+                        f"<div class='ik-card'><div class='ik-name'>{html.escape(t.name)}</div>",
                         unsafe_allow_html=True
                     )
 
@@ -835,6 +883,18 @@ elif st.session_state.page == "instakill":
                         updated_last = now_manila()
                         updated_next = updated_last + timedelta(seconds=t.interval_seconds)
 
+                        # Save first (compare-and-swap against the version shown on screen),
+                        # so two admins killing the same boss don't both announce it
+                        try:
+                            set_last_time(t.name, updated_last, ik_seen_versions.get(t.name, t.version), "kill")
+                        except TimerConflict as e:
+                            st.session_state.ik_toast = {
+                                "msg": f"⚠️ {t.name} was already updated by someone else (last spawn {e.current_row[2]}).",
+                                "ts": now_manila(),
+                                "warning": True,
+                            }
+                            st.rerun()
+
                         killer = st.session_state.get("username", "Unknown")
                         spawn_str = updated_next.strftime("%B %d, %Y | %I:%M %p")
 
@@ -844,26 +904,11 @@ elif st.session_state.page == "instakill":
                             f"Updated by {killer}"
                         )
 
-                        # Send to Discord targets
-                        for target in DISCORD_TARGETS:
-                            _post_webhook(target.get("webhook", ""), {"content": msg})
-
-                        # Update timer in session
-                        for idx, obj in enumerate(st.session_state.timers):
-                            if obj.name == t.name:
-                                st.session_state.timers[idx].last_time = updated_last
-                                st.session_state.timers[idx].next_time = updated_next
-                                break
-
-                        # Save updated data
-                        save_boss_data([
-                            (
-                                x.name,
-                                x.interval_minutes,
-                                x.last_time.strftime("%Y-%m-%d %I:%M %p")
-                            )
-                            for x in st.session_state.timers
-                        ])
+                        # Send to Discord targets (in the background)
+                        dispatch = get_engine().broadcast(
+                            lambda target: msg,
+                            key=f"KILL|{t.name}|{updated_last.strftime('%Y-%m-%d %H:%M:%S')}",
+                        )
 
                         # Log history
                         log_edit(
@@ -879,6 +924,7 @@ elif st.session_state.page == "instakill":
                                 f"Next: {updated_next.strftime('%Y-%m-%d %I:%M %p')}"
                             ),
                             "ts": now_manila(),
+                            "dispatch": dispatch,
                         }
 
                         st.rerun()
@@ -888,9 +934,20 @@ elif st.session_state.page == "instakill":
             toast = st.session_state.ik_toast
             age = (now_manila() - toast["ts"]).total_seconds()
 
-            st.success(toast["msg"])
+            if toast.get("warning"):
+                st.warning(toast["msg"])
+            else:
+                st.success(toast["msg"])
+            if toast.get("dispatch"):
+                st.caption(toast["dispatch"].summary())
+            from streamlit_autorefresh import st_autorefresh
+
             st_autorefresh(interval=500, key="ik_refresh")
 
             if age >= 2.5:
                 st.session_state.ik_toast = None
                 st.rerun()
+
+
+# ------------------- Rerun timing (reruns cut short by st.rerun() are not counted) -------------------
+METRICS.observe("rerun_phase_seconds", time.perf_counter() - rerun_started, phase="total")